@@ -21,6 +21,7 @@ class ContextCallTypes:
 
 
 class DBAction:
+    ACTIVATE = 'activate'
     CREATE = 'create'
     DELETE = 'delete'
     UPDATE = 'update'
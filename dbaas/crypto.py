@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from dbaas.database import DBEnvVar
+from dbaas.metrics import CRYPTO_PENDING_JOBS
+from dbaas.timings import timed, TimingKind
+
+
+_logger = logging.getLogger(__name__)
+
+
+class EncryptionMode:
+    FERNET = 'fernet'
+    ENVELOPE = 'envelope'
+
+    @classmethod
+    def all(cls):
+        return cls.FERNET, cls.ENVELOPE
+
+
+class KeyRing:
+    """
+    Ordered set of master keys: the first one is the primary key, used for encryption.
+    Decryption tries all the keys in order, so values encrypted with retired keys are still
+    readable until they are re-encrypted.
+
+    In `fernet` mode every value is a Fernet token. In `envelope` mode values are sealed with
+    AES-GCM under a data key, which is itself wrapped by the primary master key and stored in
+    the value header:
+
+    `version (1) | wrapped data key (60) | nonce (12) | ciphertext + tag`
+
+    Both formats are always accepted for decryption, the mode only selects the output format.
+    """
+
+    ENVELOPE_VERSION = b'\x01'
+    NONCE_LENGTH = 12
+    TAG_LENGTH = 16
+    DATA_KEY_BIT_LENGTH = 256
+    WRAPPED_DATA_KEY_LENGTH = NONCE_LENGTH + DATA_KEY_BIT_LENGTH // 8 + TAG_LENGTH
+    DATA_KEY_MAX_USES = 2 ** 20
+    DATA_KEY_CACHE_SIZE = 1024
+
+    def __init__(self, keys: Sequence[bytes], mode: str = EncryptionMode.FERNET):
+        if not keys:
+            raise ValueError('At least one encryption key is required.')
+
+        if mode not in EncryptionMode.all():
+            raise ValueError(f'Unknown encryption mode: {mode}.')
+
+        self.mode = mode
+        self._fernet = MultiFernet([Fernet(key) for key in keys])
+        self._key_encryption_keys = [AESGCM(self._derive_kek(key)) for key in keys]
+
+        self._data_key: Optional[tuple[bytes, AESGCM]] = None
+        self._data_key_uses = 0
+        self._unwrapped_data_keys: dict[bytes, AESGCM] = {}
+        self._lock = threading.Lock()
+
+    def encrypt(self, value: bytes) -> bytes:
+        if self.mode == EncryptionMode.ENVELOPE:
+            return self._envelope_encrypt(value)
+
+        return self._fernet.encrypt(value)
+
+    def decrypt(self, token: bytes) -> bytes:
+        if token[:1] == self.ENVELOPE_VERSION:
+            return self._envelope_decrypt(token)
+
+        return self._fernet.decrypt(token)
+
+    def rotate(self, token: bytes) -> bytes:
+        return self.encrypt(self.decrypt(token))
+
+    def _envelope_encrypt(self, value: bytes) -> bytes:
+        wrapped_data_key, data_key = self._current_data_key()
+        header = self.ENVELOPE_VERSION + wrapped_data_key
+
+        nonce = os.urandom(self.NONCE_LENGTH)
+        return header + nonce + data_key.encrypt(nonce, value, header)
+
+    def _envelope_decrypt(self, token: bytes) -> bytes:
+        header_length = 1 + self.WRAPPED_DATA_KEY_LENGTH
+        # AES-GCM raises `ValueError` on a truncated nonce, reject such values as invalid.
+        if len(token) < header_length + self.NONCE_LENGTH + self.TAG_LENGTH:
+            raise InvalidToken
+
+        header = token[:header_length]
+        nonce = token[header_length:header_length + self.NONCE_LENGTH]
+
+        data_key = self._unwrap_data_key(header[1:])
+        try:
+            return data_key.decrypt(nonce, token[header_length + self.NONCE_LENGTH:], header)
+
+        except InvalidTag:
+            raise InvalidToken
+
+    def _current_data_key(self) -> tuple[bytes, AESGCM]:
+        with self._lock:
+            if (not self._data_key) or self._data_key_uses >= self.DATA_KEY_MAX_USES:
+                raw_data_key = AESGCM.generate_key(bit_length=self.DATA_KEY_BIT_LENGTH)
+
+                nonce = os.urandom(self.NONCE_LENGTH)
+                wrapped_data_key = nonce + self._key_encryption_keys[0].encrypt(
+                    nonce, raw_data_key, self.ENVELOPE_VERSION,
+                )
+
+                self._data_key = (wrapped_data_key, AESGCM(raw_data_key))
+                self._data_key_uses = 0
+
+            self._data_key_uses += 1
+            return self._data_key
+
+    def _unwrap_data_key(self, wrapped_data_key: bytes) -> AESGCM:
+        data_key = self._unwrapped_data_keys.get(wrapped_data_key)
+        if data_key:
+            return data_key
+
+        nonce = wrapped_data_key[:self.NONCE_LENGTH]
+        for key_encryption_key in self._key_encryption_keys:
+            try:
+                raw_data_key = key_encryption_key.decrypt(
+                    nonce, wrapped_data_key[self.NONCE_LENGTH:], self.ENVELOPE_VERSION,
+                )
+                break
+
+            except InvalidTag:
+                continue
+
+        else:
+            raise InvalidToken
+
+        data_key = AESGCM(raw_data_key)
+        with self._lock:
+            if len(self._unwrapped_data_keys) >= self.DATA_KEY_CACHE_SIZE:
+                self._unwrapped_data_keys.pop(next(iter(self._unwrapped_data_keys)))
+
+            self._unwrapped_data_keys[wrapped_data_key] = data_key
+
+        return data_key
+
+    @staticmethod
+    def _derive_kek(key: bytes) -> bytes:
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'dbaas-key-encryption-key',
+        ).derive(key)
+
+
+class CryptoExecutor:
+    """
+    Runs credentials encryption/decryption (and the BSON work around it) outside of the event
+    loop, on a dedicated thread pool. Callers submit whole batches as one job, so a page of
+    documents costs a single hand-off.
+
+    With no workers the work runs inline; every inline job taking longer than the lag
+    threshold is logged, as it stalls all other coroutines for that long.
+    """
+
+    def __init__(self, max_workers: int, lag_threshold: float):
+        self.max_workers = max_workers
+        self.lag_threshold = lag_threshold
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='dbaas-crypto',
+        ) if max_workers else None
+
+    async def run(self, func: Callable, *args) -> Any:
+        with timed(TimingKind.CRYPTO):
+            if self._executor:
+                return await self._run_in_executor(func, *args)
+
+            return self._run_inline(func, *args)
+
+    async def _run_in_executor(self, func: Callable, *args) -> Any:
+        CRYPTO_PENDING_JOBS.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+        finally:
+            CRYPTO_PENDING_JOBS.dec()
+
+    def _run_inline(self, func: Callable, *args) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+
+        finally:
+            self._guard_loop_lag(func, time.perf_counter() - started_at)
+
+    def _guard_loop_lag(self, func: Callable, duration: float):
+        if duration > self.lag_threshold:
+            _logger.warning(
+                'Inline crypto call %s blocked the event loop for %.1f ms.',
+                getattr(func, '__qualname__', func),
+                duration * 1000,
+            )
+
+
+def get_crypto_executor(config: dict) -> CryptoExecutor:
+    max_workers = int(config.get('DB_CRYPTO_EXECUTOR_WORKERS', 2))
+    lag_threshold_ms = float(config.get('DB_CRYPTO_LOOP_LAG_THRESHOLD_MS', 10))
+
+    return _build_crypto_executor(max_workers, lag_threshold_ms / 1000)
+
+
+@lru_cache(maxsize=4)
+def _build_crypto_executor(max_workers: int, lag_threshold: float) -> CryptoExecutor:
+    return CryptoExecutor(max_workers, lag_threshold)
+
+
+def get_key_ring(config: dict) -> KeyRing:
+    retired_keys = _split_keys(config.get(DBEnvVar.RETIRED_ENCRYPTION_KEYS))
+    mode = config.get(DBEnvVar.ENCRYPTION_MODE) or EncryptionMode.FERNET
+
+    return _build_key_ring((config[DBEnvVar.ENCRYPTION_KEY], *retired_keys), mode)
+
+
+@lru_cache(maxsize=8)
+def _build_key_ring(hex_keys: tuple, mode: str) -> KeyRing:
+    return KeyRing([bytes.fromhex(hex_key) for hex_key in hex_keys], mode=mode)
+
+
+def _split_keys(value: str) -> list[str]:
+    if not value:
+        return []
+
+    return [key.strip() for key in value.split(',') if key.strip()]
@@ -4,21 +4,38 @@
 # All rights reserved.
 #
 
+import threading
 import urllib
 from logging import LoggerAdapter
 
+import pymongo
 from connect.eaas.core.inject.common import get_config
 from fastapi import Depends
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
 from pymongo.errors import CollectionInvalid, PyMongoError
 
+from dbaas.metrics import get_mongo_event_listeners
+from dbaas.slow_queries import get_slow_query_listener
+from dbaas.tracing import MongoTracingListener
+
 
 DBException = PyMongoError
 
+SEARCH_NAME_BACKFILL_BATCH_SIZE = 500
+
+# Clients are shared by all requests of the process, so connection pools (and the listeners
+# tracking them) are reused instead of being created for every request.
+_clients = {}
+_clients_lock = threading.Lock()
+
 
 class Collections:
     DB = 'db'
     REGION = 'region'
+    JOB = 'job'
+    DB_STATS = 'db_stats'
+    LEAD_TIMES = 'lead_times'
 
 
 class DBEnvVar:
@@ -46,6 +63,20 @@ class DBEnvVar:
     ```
     """
 
+    RETIRED_ENCRYPTION_KEYS = 'DB_RETIRED_ENCRYPTION_KEYS'
+    """
+    `DB_RETIRED_ENCRYPTION_KEYS` - Optional comma-separated list of previous `DB_ENCRYPTION_KEY`
+    values, newest first. They are only used for decryption, which allows the key to be rotated
+    without downtime.
+    """
+
+    ENCRYPTION_MODE = 'DB_ENCRYPTION_MODE'
+    """
+    `DB_ENCRYPTION_MODE` - Format of newly encrypted credentials, `fernet` (default) or `envelope`
+    (AES-GCM with cached data keys wrapped by `DB_ENCRYPTION_KEY`). Values stored in any of
+    the formats are always readable, so the mode can be switched at any time.
+    """
+
 
 def get_db(config: dict = Depends(get_config)) -> AsyncIOMotorDatabase:
     db_host = config[DBEnvVar.HOST]
@@ -55,11 +86,46 @@ def get_db(config: dict = Depends(get_config)) -> AsyncIOMotorDatabase:
     assert config[DBEnvVar.ENCRYPTION_KEY]
 
     connection_str = get_full_connection_string(f'{db_user}:{db_password}@{db_host}')
-    client = AsyncIOMotorClient(connection_str, serverSelectionTimeoutMS=5000)
+    client_key = (
+        connection_str,
+        config.get('DB_SLOW_QUERY_THRESHOLD_MS'),
+        config.get('DB_SLOW_QUERY_EXPLAIN'),
+    )
+
+    with _clients_lock:
+        client = _clients.get(client_key)
+        if client is None:
+            client = _clients[client_key] = _create_client(connection_str, config)
 
     return client[config[DBEnvVar.DB]]
 
 
+def _create_client(connection_str: str, config: dict) -> AsyncIOMotorClient:
+    event_listeners = [*get_mongo_event_listeners(), MongoTracingListener()]
+    slow_query_listener = get_slow_query_listener(config, (Collections.DB, Collections.REGION))
+    if slow_query_listener:
+        event_listeners.append(slow_query_listener)
+
+    client = AsyncIOMotorClient(
+        connection_str,
+        serverSelectionTimeoutMS=5000,
+        event_listeners=event_listeners,
+    )
+    if slow_query_listener:
+        slow_query_listener.bind(client.delegate)
+
+    return client
+
+
+def close_db_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        client.close()
+
+
 def get_full_connection_string(conn_str: str) -> str:
     return f'mongodb+srv://{conn_str}/'
 
@@ -94,10 +160,73 @@ async def prepare_db_collection(
         collection = db[coll_name]
 
     await collection.create_index('id', unique=True)
+    await collection.create_index([
+        ('updated_at', pymongo.ASCENDING),
+        ('id', pymongo.ASCENDING),
+    ])
+    await collection.create_index([
+        ('account_id', pymongo.ASCENDING),
+        ('updated_at', pymongo.ASCENDING),
+        ('id', pymongo.ASCENDING),
+    ])
+    await collection.create_index([('events.created.at', pymongo.DESCENDING)])
+    await collection.create_index([
+        ('account_id', pymongo.ASCENDING),
+        ('events.created.at', pymongo.DESCENDING),
+    ])
+    await collection.create_index([
+        ('status', pymongo.ASCENDING),
+        ('events.created.at', pymongo.ASCENDING),
+    ])
+    await collection.create_index([('account_id', pymongo.ASCENDING), ('id', pymongo.ASCENDING)])
+    await collection.create_index([('search_name', pymongo.ASCENDING)])
+    await collection.create_index([
+        ('account_id', pymongo.ASCENDING),
+        ('search_name', pymongo.ASCENDING),
+    ])
+    await collection.create_index([
+        ('account_id', pymongo.ASCENDING),
+        ('description', pymongo.TEXT),
+    ])
+    await _backfill_db_updated_at(collection)
+    await _backfill_db_search_name(collection)
 
     return collection
 
 
+async def _backfill_db_updated_at(collection: AsyncIOMotorCollection):
+    await collection.update_many(
+        {'updated_at': {'$exists': False}},
+        [{'$set': {'updated_at': {'$ifNull': ['$events.created.at', '$$NOW']}}}],
+    )
+
+
+async def _backfill_db_search_name(collection: AsyncIOMotorCollection):
+    # Names are lowercased here rather than with `$toLower`, which only handles ASCII, so they
+    # match the search names stored on writes.
+    cursor = collection.find(
+        {'search_name': {'$exists': False}},
+        projection={'name': 1},
+    ).batch_size(SEARCH_NAME_BACKFILL_BATCH_SIZE)
+
+    updates = []
+    async for db_document in cursor:
+        updates.append(UpdateOne(
+            {'_id': db_document['_id']},
+            {'$set': {'search_name': get_search_name(db_document.get('name') or '')}},
+        ))
+        if len(updates) == SEARCH_NAME_BACKFILL_BATCH_SIZE:
+            await collection.bulk_write(updates, ordered=False)
+            updates = []
+
+    if updates:
+        await collection.bulk_write(updates, ordered=False)
+
+
+def get_search_name(name: str) -> str:
+    return name.lower()
+
+
 async def prepare_region_collection(
     db: AsyncIOMotorDatabase,
     logger: LoggerAdapter,
@@ -112,6 +241,7 @@ async def prepare_region_collection(
         collection = db[coll_name]
 
     await collection.create_index('id', unique=True)
+    await collection.create_index('name')
 
     return collection
 
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+from collections import Counter
+from typing import Optional
+
+from dbaas.metrics import get_connect_endpoint
+
+
+_HTTP_REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    503: 'Service Unavailable',
+}
+
+
+class FakeConnectApi:
+    """
+    A stand-in Connect API for load testing: a minimal HTTP/1.1 server emulating the endpoints
+    the extension calls.
+
+    * `POST devops/services/{id}/installations/{id}/impersonate`
+    * `GET devops/installations/{id}`
+    * `GET accounts/{id}/users/{id}`
+    * `POST helpdesk/cases` and `POST helpdesk/cases/{id}/resolve`
+
+    Every response is delayed by `latency` seconds plus up to `jitter` seconds, and fails with
+    `503` with the probability `error_rate`. Both can be overridden per endpoint, which is named
+    like in the Connect metrics (`helpdesk/cases/{id}/resolve`). The server runs its own event
+    loop in a background thread, so it does not compete with the tested application.
+    """
+
+    PATH_PREFIX = '/public/v1'
+    OWNER_ACCOUNT_ID = 'VA-000-000'
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        endpoint_latency: Optional[dict[str, float]] = None,
+        endpoint_error_rate: Optional[dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.endpoint_latency = endpoint_latency or {}
+        self.endpoint_error_rate = endpoint_error_rate or {}
+        self.requests = Counter()
+        self.errors = Counter()
+        self.port: Optional[int] = None
+
+        self._random = random.Random(seed)
+        self._case_ids = itertools.count(1)
+        self._routes = (
+            ('POST', re.compile(r'devops/services/[^/]+/installations/([^/]+)/impersonate'),
+             self._impersonate),
+            ('GET', re.compile(r'devops/installations/([^/]+)'), self._installation),
+            ('GET', re.compile(r'accounts/([^/]+)/users/([^/]+)'), self._user),
+            ('POST', re.compile(r'helpdesk/cases'), self._create_case),
+            ('POST', re.compile(r'helpdesk/cases/([^/]+)/resolve'), self._resolve_case),
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._connections = {}
+        self._started = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='dbaas-fake-connect',
+            daemon=True,
+        )
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}{self.PATH_PREFIX}'
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, '127.0.0.1', 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+
+        await self._stopping.wait()
+
+        server.close()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, data = await self.handle(method, target, body)
+
+                payload = json.dumps(data).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {_HTTP_REASONS.get(status, "")}\r\n'
+                    'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload,
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def handle(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        path = target.split('?', 1)[0]
+        if path.startswith(self.PATH_PREFIX):
+            path = path[len(self.PATH_PREFIX):]
+        path = path.strip('/')
+
+        endpoint = get_connect_endpoint(path)
+        self.requests[f'{method} {endpoint}'] += 1
+
+        delay = self.endpoint_latency.get(endpoint, self.latency)
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._random.random() < self.endpoint_error_rate.get(endpoint, self.error_rate):
+            self.errors[f'{method} {endpoint}'] += 1
+            return 503, self._error('FAKE_503', 'Injected failure.')
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+
+            if route_method != method:
+                return 405, self._error('HTTP_405', 'Method not allowed.')
+
+            return handler(*match.groups(), data=json.loads(body) if body else {})
+
+        return 404, self._error('HTTP_404', 'Not found.')
+
+    @staticmethod
+    def _error(error_code: str, message: str) -> dict:
+        return {'error_code': error_code, 'errors': [message]}
+
+    @staticmethod
+    def _impersonate(installation_id: str, data: dict) -> tuple[int, dict]:
+        return 200, {'installation_api_key': f'ApiKey SU-000-000:{installation_id}'}
+
+    def _installation(self, installation_id: str, data: dict) -> tuple[int, dict]:
+        return 200, {
+            'id': installation_id,
+            'environment': {'extension': {'owner': {'id': self.OWNER_ACCOUNT_ID}}},
+        }
+
+    @staticmethod
+    def _user(account_id: str, user_id: str, data: dict) -> tuple[int, dict]:
+        return 200, {
+            'id': user_id,
+            'name': f'User {user_id}',
+            'email': f'{user_id.lower()}@example.com',
+            'active': True,
+        }
+
+    def _create_case(self, data: dict) -> tuple[int, dict]:
+        case_number = next(self._case_ids)
+
+        return 201, {
+            'id': f'CS-{case_number // 1000000:03}-{case_number // 1000 % 1000:03}'
+                  f'-{case_number % 1000:03}',
+            'subject': data.get('subject'),
+            'state': 'pending',
+        }
+
+    @staticmethod
+    def _resolve_case(case_id: str, data: dict) -> tuple[int, dict]:
+        return 200, {'id': case_id, 'state': 'resolved'}
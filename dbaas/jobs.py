@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from logging import LoggerAdapter
+from typing import Optional
+
+from bson import ObjectId
+from cryptography.fernet import InvalidToken
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+
+from dbaas.crypto import get_crypto_executor, get_key_ring, KeyRing
+from dbaas.database import Collections, get_db, validate_db_configuration
+
+
+class CredentialsReEncryption:
+    """
+    Re-encrypts stored DB credentials with the primary `DB_ENCRYPTION_KEY`.
+
+    Documents are streamed by `_id` in bounded batches and written back with a single
+    `bulk_write` per batch. Progress is checkpointed after every batch, so an interrupted run
+    continues where it stopped, and the job is throttled to a target number of documents per
+    second to keep the load on the cluster predictable. Documents whose credentials cannot be
+    decrypted with any known key are logged and skipped, so they don't block the job.
+    """
+
+    NAME = 'credentials_re_encryption'
+    COLLECTION = Collections.DB
+    CHECKPOINT_COLLECTION = Collections.JOB
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_OPS_PER_SECOND = 200
+
+    @classmethod
+    async def run(
+        cls,
+        db: AsyncIOMotorDatabase,
+        config: dict,
+        logger: LoggerAdapter,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        ops_per_second: Optional[float] = DEFAULT_OPS_PER_SECOND,
+        restart: bool = False,
+    ) -> int:
+        key_ring = get_key_ring(config)
+        crypto_executor = get_crypto_executor(config)
+        checkpoint = None if restart else await cls._load_checkpoint(db)
+
+        last_id = checkpoint['last_id'] if checkpoint else None
+        processed = checkpoint['processed'] if checkpoint else 0
+        skipped = checkpoint.get('skipped', 0) if checkpoint else 0
+        if checkpoint:
+            logger.info('Resuming re-encryption after %s (%d processed).', last_id, processed)
+
+        while True:
+            started_at = time.monotonic()
+
+            db_documents = await cls._next_batch(db, last_id, batch_size)
+            if not db_documents:
+                break
+
+            updates, skipped_documents = await crypto_executor.run(
+                cls._prepare_updates, db_documents, key_ring,
+            )
+            if updates:
+                await db[cls.COLLECTION].bulk_write(updates, ordered=False)
+
+            for db_document in skipped_documents:
+                logger.warning(
+                    'Skipped %s (%s): credentials cannot be decrypted.',
+                    db_document['_id'],
+                    db_document.get('id'),
+                )
+
+            last_id = db_documents[-1]['_id']
+            processed += len(updates)
+            skipped += len(skipped_documents)
+            await cls._save_checkpoint(db, last_id, processed, skipped)
+            logger.info('Re-encrypted %d documents.', processed)
+
+            await cls._throttle(started_at, len(db_documents), ops_per_second)
+
+        await cls._clear_checkpoint(db)
+        logger.info('Re-encryption is completed: %d documents.', processed)
+        if skipped:
+            logger.warning('%d documents with undecryptable credentials were skipped.', skipped)
+
+        return processed
+
+    @classmethod
+    async def _next_batch(
+        cls,
+        db: AsyncIOMotorDatabase,
+        last_id: Optional[ObjectId],
+        batch_size: int,
+    ) -> list[dict]:
+        query = {'credentials': {'$type': 'binData'}}
+        if last_id:
+            query['_id'] = {'$gt': last_id}
+
+        cursor = db[cls.COLLECTION].find(
+            query,
+            projection={'_id': True, 'id': True, 'credentials': True},
+        ).sort('_id', ASCENDING).limit(batch_size)
+
+        return await cursor.to_list(length=batch_size)
+
+    @classmethod
+    def _prepare_updates(
+        cls,
+        db_documents: list[dict],
+        key_ring: KeyRing,
+    ) -> tuple[list[UpdateOne], list[dict]]:
+        """ Returns the updates and the documents skipped as undecryptable. """
+        updates = []
+        skipped_documents = []
+        for db_document in db_documents:
+            try:
+                updates.append(cls._prepare_update(db_document, key_ring))
+
+            except InvalidToken:
+                skipped_documents.append(db_document)
+
+        return updates, skipped_documents
+
+    @staticmethod
+    def _prepare_update(db_document: dict, key_ring: KeyRing) -> UpdateOne:
+        credentials = db_document['credentials']
+
+        # Matching on the old value skips documents re-activated while the batch was processed.
+        return UpdateOne(
+            {'_id': db_document['_id'], 'credentials': credentials},
+            {'$set': {'credentials': key_ring.rotate(credentials)}},
+        )
+
+    @classmethod
+    async def _load_checkpoint(cls, db: AsyncIOMotorDatabase) -> Optional[dict]:
+        return await db[cls.CHECKPOINT_COLLECTION].find_one({'_id': cls.NAME})
+
+    @classmethod
+    async def _save_checkpoint(
+        cls,
+        db: AsyncIOMotorDatabase,
+        last_id: ObjectId,
+        processed: int,
+        skipped: int = 0,
+    ):
+        await db[cls.CHECKPOINT_COLLECTION].update_one(
+            {'_id': cls.NAME},
+            {'$set': {
+                'last_id': last_id,
+                'processed': processed,
+                'skipped': skipped,
+                'updated_at': datetime.now(tz=timezone.utc),
+            }},
+            upsert=True,
+        )
+
+    @classmethod
+    async def _clear_checkpoint(cls, db: AsyncIOMotorDatabase):
+        await db[cls.CHECKPOINT_COLLECTION].delete_one({'_id': cls.NAME})
+
+    @staticmethod
+    async def _throttle(started_at: float, ops: int, ops_per_second: Optional[float]):
+        if not ops_per_second:
+            return
+
+        delay = ops / ops_per_second - (time.monotonic() - started_at)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Re-encrypt stored DB credentials with the primary DB_ENCRYPTION_KEY.',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=CredentialsReEncryption.DEFAULT_BATCH_SIZE,
+    )
+    parser.add_argument(
+        '--ops-per-second',
+        type=float,
+        default=CredentialsReEncryption.DEFAULT_OPS_PER_SECOND,
+        help='Max number of re-encrypted documents per second, 0 disables throttling.',
+    )
+    parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.LoggerAdapter(logging.getLogger('dbaas.jobs'), {})
+
+    config = dict(os.environ)
+    validate_db_configuration(config)
+
+    asyncio.run(CredentialsReEncryption.run(
+        get_db(config),
+        config,
+        logger,
+        batch_size=args.batch_size,
+        ops_per_second=args.ops_per_second,
+        restart=args.restart,
+    ))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
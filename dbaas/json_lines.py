@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import atexit
+import json
+import logging
+import queue
+import threading
+from typing import IO
+
+
+_logger = logging.getLogger(__name__)
+_CLOSE = object()
+
+
+class JsonLinesWriter:
+    """
+    Writes records as lines of JSON from a background thread, so that neither serializing nor
+    writing blocks the event loop. The records queued meanwhile are written in one batch with a
+    single flush. When `max_queue_size` records are waiting, new ones are dropped and counted
+    instead of growing the memory. The writer closes on exit, `close_stream` also closes the
+    stream then.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        close_stream: bool = False,
+        max_batch_size: int = 512,
+        max_queue_size: int = 10000,
+        name: str = 'dbaas-json-lines',
+    ):
+        self.stream = stream
+        self.close_stream = close_stream
+        self.max_batch_size = max_batch_size
+        self.dropped = 0
+
+        self._queue = queue.Queue(max_queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: dict):
+        if self._closed:
+            self.dropped += 1
+            return
+
+        try:
+            self._queue.put_nowait(record)
+
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """ Waits until the queued records are written. """
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.close_stream:
+            self.stream.close()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            lines = []
+            for record in batch:
+                if record is _CLOSE:
+                    closing = True
+                else:
+                    lines.append(json.dumps(record, default=str) + '\n')
+
+            try:
+                if lines:
+                    self.stream.write(''.join(lines))
+                    self.stream.flush()
+
+            except (OSError, ValueError) as e:
+                _logger.warning('Failed to write %s JSON lines: %s', len(lines), e)
+
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,546 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from logging import LoggerAdapter
+from typing import Optional
+
+import httpx
+import uvicorn
+from connect.client import ClientError
+from connect.eaas.core.utils import client_error_exception_handler
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from dbaas.constants import ContextCallTypes, DBAction, DBStatus, DBWorkload
+from dbaas.database import close_db_clients, Collections, get_db
+from dbaas.fake_connect import FakeConnectApi
+from dbaas.seed import DatasetSeeder
+from dbaas.webapp import DBaaSWebApplication
+
+
+WORKLOADS = {
+    'list-heavy': {'list': 80, 'retrieve': 20},
+    'create-burst': {'create': 100},
+    'reconfigure-storm': {'reconfigure': 100},
+    'mixed': {'list': 60, 'retrieve': 25, 'create': 10, 'reconfigure': 5},
+}
+
+PERCENTILES = (50, 90, 99)
+
+EXTENSION_ID = 'SRVC-0000-0000'
+INSTALLATION_ID = 'EIN-0000-0000'
+_CONTEXT_HEADERS = {
+    'account_id': 'X-Connect-Account-Id',
+    'user_id': 'X-Connect-User-Id',
+    'call_type': 'X-Connect-Call-Type',
+}
+
+
+def get_connect_headers(connect_url: str, config_header: str, context: dict) -> dict:
+    """
+    Headers the Connect runtime sends with a request of the given call `context`
+    (`account_id`, `user_id` and `call_type`), with `connect_url` as the API gateway.
+    """
+    headers = {
+        'X-Connect-Api-Gateway-Url': connect_url,
+        'X-Connect-User-Agent': 'dbaas-loadtest',
+        'X-Connect-Extension-Id': EXTENSION_ID,
+        'X-Connect-Installation-Id': INSTALLATION_ID,
+        'X-Connect-Config': config_header,
+    }
+    for name, header in _CONTEXT_HEADERS.items():
+        if context.get(name):
+            headers[header] = context[name]
+
+    return headers
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """ Nearest-rank percentile of already sorted values. """
+    if not sorted_values:
+        return 0.0
+
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+
+    return sorted_values[rank - 1]
+
+
+class LoadReport:
+    """ Durations and statuses of the operations of one workload run. """
+
+    def __init__(self, workload: str, concurrency: Optional[int] = None):
+        self.workload = workload
+        self.concurrency = concurrency
+        self.durations = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.skipped = Counter()
+        self.elapsed = 0.0
+
+    def record(self, operation: str, status: int, duration: float):
+        self.durations[operation].append(duration)
+        self.statuses[operation][status] += 1
+
+    def summary(self) -> list[dict]:
+        rows = []
+        for operation in sorted(self.durations):
+            durations = sorted(self.durations[operation])
+            statuses = self.statuses[operation]
+
+            rows.append({
+                'operation': operation,
+                'requests': len(durations),
+                'errors': sum(count for status, count in statuses.items() if status >= 400),
+                'throughput': len(durations) / self.elapsed if self.elapsed else 0.0,
+                **{f'p{q}': percentile(durations, q) for q in PERCENTILES},
+                'max': durations[-1],
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            })
+
+        return rows
+
+    def to_dict(self) -> dict:
+        requests = sum(len(durations) for durations in self.durations.values())
+
+        return {
+            'workload': self.workload,
+            'concurrency': self.concurrency,
+            'elapsed': self.elapsed,
+            'requests': requests,
+            'throughput': requests / self.elapsed if self.elapsed else 0.0,
+            'operations': self.summary(),
+            'skipped': dict(self.skipped),
+        }
+
+    def render(self) -> str:
+        report = self.to_dict()
+        lines = [
+            f"{self.workload}: {report['requests']} requests in {self.elapsed:.2f} s, "
+            f"{report['throughput']:.1f} req/s"
+            + (f', concurrency {self.concurrency}' if self.concurrency else ''),
+            f"  {'operation':<12} {'requests':>8} {'errors':>7} {'req/s':>8} "
+            + ' '.join(f"{f'p{q} ms':>8}" for q in PERCENTILES)
+            + f" {'max ms':>8}",
+        ]
+        for row in report['operations']:
+            lines.append(
+                f"  {row['operation']:<12} {row['requests']:>8} {row['errors']:>7} "
+                f"{row['throughput']:>8.1f} "
+                + ' '.join(f"{row[f'p{q}'] * 1000:>8.1f}" for q in PERCENTILES)
+                + f" {row['max'] * 1000:>8.1f}",
+            )
+        for operation, count in sorted(self.skipped.items()):
+            lines.append(f'  {operation}: {count} skipped, no database to act on')
+
+        return '\n'.join(lines)
+
+
+class LoadTest:
+    """
+    Drives workloads against the DBaaS API through `client` and measures every request.
+
+    Requests carry the headers Connect sets for the extension, with `connect_url` as the API
+    gateway, so Connect API calls of the extension go to a `FakeConnectApi`. Every request is
+    made on behalf of one of `accounts`; `prepare` collects the existing databases of the
+    accounts, which are retrieved and reconfigured by the workloads.
+
+    A reconfiguration is followed by an admin activation, so the database can be reconfigured
+    again. Each database is reconfigured by one worker at a time.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        connect_url: str,
+        config: dict,
+        accounts: list[str],
+        seed: Optional[int] = None,
+    ):
+        self.client = client
+        self.connect_url = connect_url
+        self.accounts = accounts
+        self.random = random.Random(seed)
+
+        self.regions: list[str] = []
+        self.databases: dict[str, list[str]] = {account_id: [] for account_id in accounts}
+        self.active_databases: dict[str, list[str]] = {account_id: [] for account_id in accounts}
+        self._created = 0
+        self._config_header = json.dumps(config)
+
+    def headers(self, account_id: str, call_type: str = ContextCallTypes.USER) -> dict:
+        return get_connect_headers(self.connect_url, self._config_header, {
+            'account_id': account_id,
+            'user_id': self.get_user_id(account_id),
+            'call_type': call_type,
+        })
+
+    @staticmethod
+    def get_user_id(account_id: str) -> str:
+        return account_id.replace('VA-', 'UR-', 1)
+
+    async def prepare(self):
+        response = await self.client.get('/v1/regions', headers=self.headers(self.accounts[0]))
+        response.raise_for_status()
+        self.regions = [region['id'] for region in response.json()]
+        if not self.regions:
+            raise ValueError('No regions found, seed the database first.')
+
+        for account_id in self.accounts:
+            response = await self.client.get('/v1/databases', headers=self.headers(account_id))
+            response.raise_for_status()
+
+            for db_document in response.json():
+                self.databases[account_id].append(db_document['id'])
+                if db_document['status'] == DBStatus.ACTIVE:
+                    self.active_databases[account_id].append(db_document['id'])
+
+    async def run(self, workload: str, requests: int, concurrency: int) -> LoadReport:
+        weights = WORKLOADS[workload]
+        operations = iter(self.random.choices(list(weights), list(weights.values()), k=requests))
+        report = LoadReport(workload, concurrency)
+
+        async def worker():
+            for operation in operations:
+                await getattr(self, f'_{operation}')(report)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        report.elapsed = time.perf_counter() - started_at
+
+        return report
+
+    async def _request(
+        self,
+        report: LoadReport,
+        operation: str,
+        method: str,
+        url: str,
+        account_id: str,
+        call_type: str = ContextCallTypes.USER,
+        **kwargs,
+    ) -> httpx.Response:
+        started_at = time.perf_counter()
+        response = await self.client.request(
+            method, url, headers=self.headers(account_id, call_type), **kwargs,
+        )
+        report.record(operation, response.status_code, time.perf_counter() - started_at)
+
+        return response
+
+    async def _list(self, report: LoadReport):
+        account_id = self.random.choice(self.accounts)
+        await self._request(report, 'list', 'GET', '/v1/databases', account_id)
+
+    async def _retrieve(self, report: LoadReport):
+        account_id = self.random.choice(self.accounts)
+        if not self.databases[account_id]:
+            report.skipped['retrieve'] += 1
+            return
+
+        db_id = self.random.choice(self.databases[account_id])
+        await self._request(report, 'retrieve', 'GET', f'/v1/databases/{db_id}', account_id)
+
+    async def _create(self, report: LoadReport):
+        account_id = self.random.choice(self.accounts)
+        self._created += 1
+
+        response = await self._request(report, 'create', 'POST', '/v1/databases', account_id, json={
+            'name': f'Load test {self._created}',
+            'description': 'Created by the load test.',
+            'workload': self.random.choice(DBWorkload.all()),
+            'tech_contact': {'id': self.get_user_id(account_id)},
+            'region': {'id': self.random.choice(self.regions)},
+        })
+        if response.status_code == 201:
+            self.databases[account_id].append(response.json()['id'])
+
+    async def _reconfigure(self, report: LoadReport):
+        account_id = self.random.choice(self.accounts)
+        active_databases = self.active_databases[account_id]
+        if not active_databases:
+            report.skipped['reconfigure'] += 1
+            return
+
+        db_id = active_databases.pop(self.random.randrange(len(active_databases)))
+        reconfiguring = False
+        try:
+            response = await self._request(
+                report, 'reconfigure', 'POST', f'/v1/databases/{db_id}/reconfigure', account_id,
+                json={'action': DBAction.UPDATE, 'details': 'Reconfigured by the load test.'},
+            )
+            if response.status_code != 200:
+                return
+
+            reconfiguring = True
+            response = await self._request(
+                report, 'activate', 'POST', f'/v1/databases/{db_id}/activate', account_id,
+                call_type=ContextCallTypes.ADMIN, json={},
+            )
+            reconfiguring = response.status_code != 200
+
+        finally:
+            if not reconfiguring:
+                active_databases.append(db_id)
+
+
+def build_app() -> FastAPI:
+    """ Assembles the API like the Connect runtime does for `DBaaSWebApplication`. """
+    app = FastAPI(
+        exception_handlers=DBaaSWebApplication.get_exception_handlers(
+            {ClientError: client_error_exception_handler},
+        ),
+        root_path='/public/v1',
+    )
+
+    auth_router, _ = DBaaSWebApplication.get_routers()
+    app.include_router(auth_router, prefix='/api')
+
+    for middleware in DBaaSWebApplication.get_middlewares():
+        if inspect.isclass(middleware):
+            app.add_middleware(middleware)
+        else:
+            app.add_middleware(BaseHTTPMiddleware, dispatch=middleware)
+
+    return app
+
+
+async def start_app(logger: LoggerAdapter, config: dict) -> FastAPI:
+    # The extension client of the runtime authenticates with the `API_KEY` of the environment.
+    os.environ.setdefault('API_KEY', 'ApiKey SU-000-000:loadtest')
+    await DBaaSWebApplication.on_startup(logger, config)
+
+    return build_app()
+
+
+class AppServer:
+    """
+    Serves the API with uvicorn on a local port, so the load test drives it over a real socket
+    like the Connect runtime does. Like `FakeConnectApi`, the server runs its own event loop in a
+    background thread. Motor clients are bound to the loop they are first used on, so the shared
+    clients of the caller are closed on start and the API creates its own.
+    """
+
+    HOST = '127.0.0.1'
+
+    def __init__(self, logger: LoggerAdapter, config: dict):
+        self.logger = logger
+        self.config = config
+        self.port: Optional[int] = None
+
+        self._server: Optional[uvicorn.Server] = None
+        self._error: Optional[Exception] = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dbaas-app', daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.HOST}:{self.port}/api'
+
+    def start(self):
+        close_db_clients()
+        self._thread.start()
+        self._started.wait()
+        if self._error:
+            raise self._error
+
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._serve())
+
+        except Exception as e:
+            self._error = e
+
+        finally:
+            self._started.set()
+            loop.close()
+
+    async def _serve(self):
+        try:
+            app = await start_app(self.logger, self.config)
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.HOST, 0))
+            self.port = sock.getsockname()[1]
+
+            self._server = uvicorn.Server(
+                uvicorn.Config(app, log_level='warning', access_log=False, lifespan='off'),
+            )
+            serving = asyncio.ensure_future(self._server.serve(sockets=[sock]))
+            while not self._server.started and not serving.done():
+                await asyncio.sleep(0.01)
+
+            self._started.set()
+            await serving
+
+        finally:
+            close_db_clients()
+
+
+async def run_load_test(
+    config: dict,
+    logger: LoggerAdapter,
+    connect_api: FakeConnectApi,
+    workloads: list[str],
+    requests: int,
+    concurrency: int,
+    seeder: DatasetSeeder,
+    documents: int = 0,
+    clear: bool = False,
+    seed: Optional[int] = None,
+) -> list[LoadReport]:
+    if clear or documents:
+        db = get_db(config)
+        if clear:
+            await db[Collections.DB].delete_many({})
+            await db[Collections.REGION].delete_many({})
+
+        if documents:
+            await seeder.run(db, logger, documents=documents)
+
+    server = AppServer(logger, config)
+    server.start()
+    try:
+        async with httpx.AsyncClient(base_url=server.url, timeout=None) as client:
+            load_test = LoadTest(client, connect_api.url, config, seeder.accounts, seed=seed)
+            await load_test.prepare()
+
+            reports = []
+            for workload in workloads:
+                report = await load_test.run(workload, requests, concurrency)
+                logger.info('%s', report.render())
+                reports.append(report)
+
+    finally:
+        server.stop()
+
+    return reports
+
+
+def _parse_endpoint_values(values: list[str], scale: float = 1) -> dict[str, float]:
+    parsed = {}
+    for value in values:
+        endpoint, _, number = value.rpartition('=')
+        parsed[endpoint.strip('/')] = float(number) * scale
+
+    return parsed
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Load test the API against a fake Connect API and report latencies.',
+    )
+    parser.add_argument(
+        '--workload',
+        action='append',
+        choices=sorted(WORKLOADS),
+        help='Workload to run, can be repeated. All workloads run by default.',
+    )
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per workload.')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--accounts', type=int, default=DatasetSeeder.DEFAULT_ACCOUNTS)
+    parser.add_argument(
+        '--documents',
+        type=int,
+        default=0,
+        help='Seed that many documents before the run.',
+    )
+    parser.add_argument(
+        '--clear',
+        action='store_true',
+        help='Delete all documents of the seeded collections first.',
+    )
+    parser.add_argument('--connect-latency-ms', type=float, default=50)
+    parser.add_argument('--connect-jitter-ms', type=float, default=0)
+    parser.add_argument('--connect-error-rate', type=float, default=0)
+    parser.add_argument(
+        '--connect-endpoint-latency-ms',
+        action='append',
+        default=[],
+        metavar='ENDPOINT=MS',
+        help='Latency of one endpoint, e.g. helpdesk/cases=300. Can be repeated.',
+    )
+    parser.add_argument(
+        '--connect-endpoint-error-rate',
+        action='append',
+        default=[],
+        metavar='ENDPOINT=RATE',
+        help='Error rate of one endpoint, e.g. helpdesk/cases/{id}/resolve=0.5.',
+    )
+    parser.add_argument('--seed', type=int, help='Seed of the random generators.')
+    parser.add_argument('--json', action='store_true', help='Print the reports as JSON.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.LoggerAdapter(logging.getLogger('dbaas.loadtest'), {})
+
+    # Like the Connect runtime, only the variables of the extension are passed as its config.
+    config = {key: value for key, value in os.environ.items() if key.startswith('DB_')}
+    # Bursts of creates would hit the per account limit of the largest accounts otherwise.
+    config.setdefault('DB_MAX_ALLOWED_NUMBER_PER_ACCOUNT', str(10 ** 9))
+
+    connect_api = FakeConnectApi(
+        latency=args.connect_latency_ms / 1000,
+        jitter=args.connect_jitter_ms / 1000,
+        error_rate=args.connect_error_rate,
+        endpoint_latency=_parse_endpoint_values(args.connect_endpoint_latency_ms, 1 / 1000),
+        endpoint_error_rate=_parse_endpoint_values(args.connect_endpoint_error_rate),
+        seed=args.seed,
+    )
+    connect_api.start()
+    try:
+        reports = asyncio.run(run_load_test(
+            config,
+            logger,
+            connect_api,
+            workloads=args.workload or list(WORKLOADS),
+            requests=args.requests,
+            concurrency=args.concurrency,
+            seeder=DatasetSeeder(config, accounts=args.accounts, seed=args.seed),
+            documents=args.documents,
+            clear=args.clear,
+            seed=args.seed,
+        ))
+
+    finally:
+        connect_api.stop()
+
+    if args.json:
+        print(json.dumps({
+            'reports': [report.to_dict() for report in reports],
+            'connect_requests': dict(connect_api.requests),
+            'connect_errors': dict(connect_api.errors),
+        }, indent=2))
+        return
+
+    for report in reports:
+        print(report.render())
+        print()
+
+    print('Connect API requests:')
+    for endpoint, count in connect_api.requests.most_common():
+        print(f'  {endpoint}: {count} ({connect_api.errors[endpoint]} failed)')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
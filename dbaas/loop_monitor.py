@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from typing import Optional
+
+from dbaas.metrics import REGISTRY
+from dbaas.profiler import get_stack
+
+
+_logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    'dbaas_event_loop_lag_seconds',
+    'Delay of event loop callbacks behind their schedule.',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+EVENT_LOOP_BLOCKED = REGISTRY.counter(
+    'dbaas_event_loop_blocked_total',
+    'Number of times a single step blocked the event loop longer than the threshold.',
+)
+
+
+class EventLoopMonitor:
+    """
+    Measures the lag of the event loop with a heartbeat task that sleeps `interval` seconds and
+    records how late it wakes up.
+
+    A watchdog thread checks the heartbeat. When the loop has not run it for longer than
+    `threshold` seconds, a single step is blocking the loop: the stack of the loop thread is
+    logged once per blocking step, so the offending synchronous call can be found.
+    """
+
+    DEFAULT_INTERVAL = 0.05
+
+    def __init__(self, threshold: float, interval: float = DEFAULT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.thread_id: Optional[int] = None
+
+        self._heartbeat = time.perf_counter()
+        self._reported_heartbeat: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            name='dbaas-loop-monitor',
+            daemon=True,
+        )
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _beat(self):
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+            self._heartbeat = time.perf_counter()
+            EVENT_LOOP_LAG.observe(max(self._heartbeat - started_at - self.interval, 0))
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def check(self):
+        heartbeat = self._heartbeat
+        blocked_for = time.perf_counter() - heartbeat - self.interval
+        if blocked_for < self.threshold or heartbeat == self._reported_heartbeat:
+            return
+
+        frame = sys._current_frames().get(self.thread_id)
+        if not frame:
+            return
+
+        self._reported_heartbeat = heartbeat
+        stack = get_stack(frame)
+        EVENT_LOOP_BLOCKED.inc()
+        _logger.warning(
+            'Event loop blocked for more than %.1f ms in:\n%s',
+            blocked_for * 1000,
+            '\n'.join(f'  {line}' for line in stack),
+            extra={'blocked_ms': round(blocked_for * 1000, 1), 'stack': list(stack)},
+        )
+
+
+_monitor: Optional[EventLoopMonitor] = None
+
+
+def start_loop_monitor(config: dict) -> Optional[EventLoopMonitor]:
+    """
+    Starts monitoring the running event loop. `DB_LOOP_BLOCK_THRESHOLD_MS` (default 100) sets
+    how long a step can block the loop before its stack is logged, `0` disables the monitor.
+    """
+    global _monitor
+
+    threshold_ms = float(config.get('DB_LOOP_BLOCK_THRESHOLD_MS', 100))
+    if _monitor or threshold_ms <= 0:
+        return _monitor
+
+    _monitor = EventLoopMonitor(threshold_ms / 1000)
+    _monitor.start()
+
+    return _monitor
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from pymongo import MongoClient
+
+
+class MemorySnapshots:
+    """
+    Controls `tracemalloc` and keeps the last `max_size` snapshots, so that every new snapshot
+    can be compared with the previous one. Stopping the tracing drops the snapshots.
+    """
+
+    def __init__(self, max_size: int = 5):
+        self._snapshots = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_tracing() -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            self.stop()
+
+        tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    @staticmethod
+    def get_traced_memory() -> tuple[int, int]:
+        return tracemalloc.get_traced_memory()
+
+    def take(self) -> tuple[dict, Optional[dict]]:
+        if not tracemalloc.is_tracing():
+            raise ValueError('Memory tracing is not enabled.')
+
+        snapshot = {
+            'id': os.urandom(4).hex(),
+            'taken_at': time.time(),
+            'traced_bytes': tracemalloc.get_traced_memory()[0],
+            'snapshot': tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<unknown>'),
+            )),
+        }
+
+        with self._lock:
+            previous = self._snapshots[-1] if self._snapshots else None
+            self._snapshots.append(snapshot)
+
+        return snapshot, previous
+
+
+memory_snapshots = MemorySnapshots()
+
+
+def _format_location(traceback: tracemalloc.Traceback) -> str:
+    return ' < '.join(
+        f"{os.path.join(*frame.filename.split(os.sep)[-2:])}:{frame.lineno}"
+        for frame in traceback
+    )
+
+
+def get_top_allocations(snapshot: tracemalloc.Snapshot, limit: int = 20) -> list[dict]:
+    key_type = 'traceback' if tracemalloc.get_traceback_limit() > 1 else 'lineno'
+
+    return [
+        {
+            'location': _format_location(stat.traceback),
+            'size_bytes': stat.size,
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics(key_type)[:limit]
+    ]
+
+
+def get_allocation_diff(
+    snapshot: tracemalloc.Snapshot,
+    previous: tracemalloc.Snapshot,
+    limit: int = 20,
+) -> list[dict]:
+    key_type = 'traceback' if tracemalloc.get_traceback_limit() > 1 else 'lineno'
+
+    return [
+        {
+            'location': _format_location(stat.traceback),
+            'size_bytes': stat.size,
+            'size_diff_bytes': stat.size_diff,
+            'count': stat.count,
+            'count_diff': stat.count_diff,
+        }
+        for stat in snapshot.compare_to(previous, key_type)[:limit]
+        if stat.size_diff or stat.count_diff
+    ]
+
+
+def get_object_counts() -> dict[str, int]:
+    """
+    Counts live objects that usually hold most of the memory of the extension: MongoDB documents
+    (dictionaries with an `_id`), pydantic models and MongoDB clients.
+    """
+    counts = {
+        'documents': 0,
+        'pydantic_models': 0,
+        'motor_clients': 0,
+        'mongo_clients': 0,
+    }
+
+    # `type()` is used instead of `isinstance()`, which trips over lazy proxies overriding
+    # `__class__`.
+    for obj in gc.get_objects():
+        obj_type = type(obj)
+        if obj_type is dict:
+            if '_id' in obj:
+                counts['documents'] += 1
+
+        elif issubclass(obj_type, BaseModel):
+            counts['pydantic_models'] += 1
+
+        elif issubclass(obj_type, AsyncIOMotorClient):
+            counts['motor_clients'] += 1
+
+        elif issubclass(obj_type, MongoClient):
+            counts['mongo_clients'] += 1
+
+    return counts
+
+
+def get_snapshot_report(limit: int = 20) -> dict:
+    snapshot, previous = memory_snapshots.take()
+
+    return {
+        'id': snapshot['id'],
+        'taken_at': snapshot['taken_at'],
+        'traced_bytes': snapshot['traced_bytes'],
+        'top': get_top_allocations(snapshot['snapshot'], limit),
+        'previous_id': previous['id'] if previous else None,
+        'diff': get_allocation_diff(
+            snapshot['snapshot'],
+            previous['snapshot'],
+            limit,
+        ) if previous else None,
+        'objects': get_object_counts(),
+    }
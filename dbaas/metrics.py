@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Sequence
+
+from connect.client import ClientError
+from pymongo import monitoring
+
+from dbaas.timings import record_timing, TimingKind
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_CONNECT_ID_SEGMENT = re.compile(r'^[A-Z]{2,}(-\d+)+$')
+
+
+class _Metric:
+    TYPE = None
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.TYPE}',
+        ]
+        with self._lock:
+            values = list(self._values.items())
+
+        for key, value in values:
+            lines.extend(self._render_samples(key, value))
+
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _render_samples(self, key: tuple, value) -> list[str]:
+        return [f'{self.name}{_format_labels(zip(self.labels, key))} {_format_value(value)}']
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f'Metric {self.name} expects labels {self.labels}.')
+
+        return tuple(str(labels[label]) for label in self.labels)
+
+
+class Counter(_Metric):
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    TYPE = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    TYPE = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * len(self.buckets) + [0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+
+            counts[-2] += value
+            counts[-1] += 1
+
+    def _render_samples(self, key: tuple, value: list) -> list[str]:
+        labels = list(zip(self.labels, key))
+
+        lines = [
+            f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(bound))])} '
+            f'{count}'
+            for bound, count in zip(self.buckets, value)
+        ]
+        lines.extend((
+            f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {value[-1]}',
+            f'{self.name}_sum{_format_labels(labels)} {_format_value(value[-2])}',
+            f'{self.name}_count{_format_labels(labels)} {value[-1]}',
+        ))
+
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self._register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self._register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self._register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'dbaas_http_request_duration_seconds',
+    'Latency of HTTP requests by route.',
+    ('method', 'route'),
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    'dbaas_http_responses_total',
+    'Number of HTTP responses by route and status code.',
+    ('method', 'route', 'status'),
+)
+MONGO_COMMAND_DURATION = REGISTRY.histogram(
+    'dbaas_mongo_command_duration_seconds',
+    'Latency of MongoDB commands.',
+    ('command',),
+)
+MONGO_COMMAND_FAILURES = REGISTRY.counter(
+    'dbaas_mongo_command_failures_total',
+    'Number of failed MongoDB commands.',
+    ('command',),
+)
+MONGO_POOL_MAX_SIZE = REGISTRY.gauge(
+    'dbaas_mongo_pool_max_size',
+    'Max number of connections of MongoDB connection pools.',
+    ('address',),
+)
+MONGO_POOL_CONNECTIONS = REGISTRY.gauge(
+    'dbaas_mongo_pool_connections',
+    'Number of open connections of MongoDB connection pools.',
+    ('address',),
+)
+MONGO_POOL_CHECKED_OUT = REGISTRY.gauge(
+    'dbaas_mongo_pool_checked_out_connections',
+    'Number of MongoDB connections in use.',
+    ('address',),
+)
+CONNECT_REQUEST_DURATION = REGISTRY.histogram(
+    'dbaas_connect_request_duration_seconds',
+    'Latency of Connect API calls by endpoint.',
+    ('method', 'endpoint'),
+)
+CONNECT_REQUEST_ERRORS = REGISTRY.counter(
+    'dbaas_connect_request_errors_total',
+    'Number of failed Connect API calls by endpoint and status code.',
+    ('method', 'endpoint', 'status'),
+)
+CRYPTO_PENDING_JOBS = REGISTRY.gauge(
+    'dbaas_crypto_executor_pending_jobs',
+    'Number of credentials crypto jobs queued or running on the crypto executor.',
+)
+BACKGROUND_TASKS = REGISTRY.gauge(
+    'dbaas_background_tasks',
+    'Number of background tasks that are not finished yet.',
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing latency and status code of every HTTP request. Requests are
+    labelled with the route template (e.g. `/v1/databases/{db_id}`), so the cardinality
+    doesn't grow with the number of databases.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                method=scope['method'],
+                route=route,
+            )
+            HTTP_RESPONSES.inc(method=scope['method'], route=route, status=status_code)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._observe(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._observe(event)
+        MONGO_COMMAND_FAILURES.inc(command=event.command_name)
+
+    @staticmethod
+    def _observe(event):
+        duration = event.duration_micros / 1e6
+
+        MONGO_COMMAND_DURATION.observe(duration, command=event.command_name)
+        record_timing(TimingKind.MONGO, duration)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Tracks size and utilization of the connection pools of a single client, so every client
+    needs its own instance. Clients are shared by `dbaas.database.get_db`, so the gauges stay
+    flat as requests come and go.
+    """
+
+    DEFAULT_MAX_POOL_SIZE = 100
+
+    def __init__(self):
+        self._max_pool_sizes = {}
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent):
+        address = _format_address(event.address)
+        max_pool_size = event.options.get('maxPoolSize', self.DEFAULT_MAX_POOL_SIZE)
+
+        self._max_pool_sizes[address] = max_pool_size
+        MONGO_POOL_MAX_SIZE.inc(max_pool_size, address=address)
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent):
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent):
+        address = _format_address(event.address)
+        max_pool_size = self._max_pool_sizes.pop(address, 0)
+
+        MONGO_POOL_MAX_SIZE.dec(max_pool_size, address=address)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        MONGO_POOL_CONNECTIONS.inc(address=_format_address(event.address))
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent):
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        MONGO_POOL_CONNECTIONS.dec(address=_format_address(event.address))
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent):
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent):
+        pass
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        MONGO_POOL_CHECKED_OUT.inc(address=_format_address(event.address))
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        MONGO_POOL_CHECKED_OUT.dec(address=_format_address(event.address))
+
+
+def get_mongo_event_listeners() -> list:
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
+
+
+@contextmanager
+def observe_connect_call(method: str, path: str):
+    method = method.upper()
+    endpoint = get_connect_endpoint(path)
+    started_at = time.perf_counter()
+
+    try:
+        yield
+
+    except ClientError as e:
+        CONNECT_REQUEST_ERRORS.inc(method=method, endpoint=endpoint, status=e.status_code)
+        raise
+
+    finally:
+        duration = time.perf_counter() - started_at
+
+        CONNECT_REQUEST_DURATION.observe(duration, method=method, endpoint=endpoint)
+        record_timing(TimingKind.CONNECT, duration)
+
+
+def get_connect_endpoint(path: str) -> str:
+    path = path.split('?', 1)[0].strip('/')
+
+    return '/'.join(
+        '{id}' if _CONNECT_ID_SEGMENT.match(segment) else segment
+        for segment in path.split('/')
+    )
+
+
+def _format_address(address: tuple) -> str:
+    return ':'.join(str(part) for part in address)
+
+
+def _format_labels(labels) -> str:
+    labels = [
+        f'{name}="{_escape_label_value(value)}"'
+        for name, value in labels
+    ]
+
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
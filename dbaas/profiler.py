@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from connect.eaas.core.inject.models import Context
+
+from dbaas.utils import is_admin_context
+
+
+PROFILE_HEADER = b'x-dbaas-profile'
+PROFILE_QUERY_FLAG = b'profile=1'
+PROFILE_ID_HEADER = b'x-dbaas-profile-id'
+
+
+MAX_STACK_DEPTH = 64
+
+
+def get_stack(frame, max_depth: int = MAX_STACK_DEPTH) -> tuple:
+    """ Returns the innermost `max_depth` frames of a stack, outermost first. """
+    stack = []
+    while frame and len(stack) < max_depth:
+        code = frame.f_code
+        filename = os.path.join(*code.co_filename.split(os.sep)[-2:])
+        name = getattr(code, 'co_qualname', code.co_name)
+        stack.append(f'{name} ({filename}:{frame.f_lineno})')
+        frame = frame.f_back
+
+    return tuple(reversed(stack))
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread from a background thread every `interval` seconds and
+    aggregates the samples in the folded stack format (`frame;frame;frame count`), which can
+    be loaded into flame graph tools such as speedscope.
+    """
+
+    DEFAULT_INTERVAL = 0.002
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='dbaas-profiler',
+            daemon=True,
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame:
+            self.samples[get_stack(frame)] += 1
+
+    def folded(self) -> str:
+        return '\n'.join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in self.samples.most_common()
+        )
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+
+class ProfileStore:
+    """ Keeps the last `max_size` profiles in process memory. """
+
+    def __init__(self, max_size: int = 20):
+        self._profiles = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return next((p for p in self._profiles if p['id'] == profile_id), None)
+
+
+profiles = ProfileStore()
+_profiling_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under the sampling profiler when an admin asks for it with the
+    `X-DBaaS-Profile: 1` header or the `profile=1` query flag. The profile is stored and its id
+    is returned in the `X-DBaaS-Profile-Id` response header.
+
+    The profiler samples the event loop thread, so work of concurrent requests is included.
+    Only one request is profiled at a time, other flagged requests are served unprofiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._is_requested(scope):
+            return await self.app(scope, receive, send)
+
+        if not (self._is_admin(scope) and _profiling_lock.acquire(blocking=False)):
+            return await self.app(scope, receive, send)
+
+        try:
+            await self._profile(scope, receive, send)
+
+        finally:
+            _profiling_lock.release()
+
+    async def _profile(self, scope, receive, send):
+        profile_id = os.urandom(8).hex()
+        profiler = SamplingProfiler(threading.get_ident())
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (PROFILE_ID_HEADER, profile_id.encode()),
+                ]
+
+            await send(message)
+
+        started_at = time.time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            profiler.stop()
+            profiles.add({
+                'id': profile_id,
+                'method': scope['method'],
+                'path': scope['path'],
+                'started_at': started_at,
+                'duration': time.time() - started_at,
+                'samples': sum(profiler.samples.values()),
+                'folded': profiler.folded(),
+            })
+
+    @staticmethod
+    def _is_requested(scope) -> bool:
+        query_string = scope.get('query_string', b'')
+        if query_string and PROFILE_QUERY_FLAG in query_string.split(b'&'):
+            return True
+
+        return any(
+            key == PROFILE_HEADER and value == b'1'
+            for key, value in scope.get('headers', [])
+        )
+
+    @staticmethod
+    def _is_admin(scope) -> bool:
+        call_type = next(
+            (value for key, value in scope.get('headers', []) if key == b'x-connect-call-type'),
+            b'',
+        )
+
+        return is_admin_context(Context(call_type=call_type.decode('latin-1')))
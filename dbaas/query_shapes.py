@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import SON
+from connect.eaas.core.inject.models import Context
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from dbaas.constants import ContextCallTypes, DBStatus, DBWorkload
+from dbaas.database import get_db, validate_db_configuration
+from dbaas.services import DB, Region
+from dbaas.stats import DBStats, LeadTimes
+
+
+class QueryShape:
+    """
+    A query issued by the services, built with the same helpers the services use. Values of the
+    query are placeholders, only the fields and operators matter for the plan.
+    """
+
+    FIND = 'find'
+    COUNT = 'count'
+    UPDATE = 'update'
+
+    def __init__(
+        self,
+        name: str,
+        collection: str,
+        query: dict,
+        sort: Optional[list] = None,
+        projection: Optional[dict] = None,
+        command: str = FIND,
+    ):
+        self.name = name
+        self.collection = collection
+        self.query = query
+        self.sort = sort
+        self.projection = projection
+        self.command = command
+
+    def explain_command(self) -> SON:
+        if self.command == self.COUNT:
+            return SON([('count', self.collection), ('query', self.query)])
+
+        if self.command == self.UPDATE:
+            return SON([
+                ('update', self.collection),
+                ('updates', [{'q': self.query, 'u': {'$set': {'updated_at': _PLACEHOLDER_DT}}}]),
+            ])
+
+        command = SON([('find', self.collection), ('filter', self.query)])
+        if self.sort:
+            command['sort'] = SON(self.sort)
+        if self.projection:
+            command['projection'] = self.projection
+
+        return command
+
+
+_PLACEHOLDER_DT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_PLACEHOLDER_ID = 'DB-000-000'
+
+
+def get_query_shapes() -> list[QueryShape]:
+    admin = Context(call_type=ContextCallTypes.ADMIN)
+    user = Context(call_type=ContextCallTypes.USER, account_id='VA-000-000')
+    since = DB._encode_changes_token(_PLACEHOLDER_DT, _PLACEHOLDER_ID)
+
+    shapes = []
+    for suffix, context in ((' (admin)', admin), ('', user)):
+        shapes.extend((
+            QueryShape(f'DB.list{suffix}', DB.COLLECTION, DB._default_query(context), DB.LIST_SORT),
+            QueryShape(
+                f'DB.changes{suffix}',
+                DB.COLLECTION,
+                DB._changes_query(context, until=_PLACEHOLDER_DT),
+                DB.CHANGES_SORT,
+            ),
+            QueryShape(
+                f'DB.changes since{suffix}',
+                DB.COLLECTION,
+                DB._changes_query(context, since, _PLACEHOLDER_DT),
+                DB.CHANGES_SORT,
+            ),
+            QueryShape(
+                f'DB.bulk_action{suffix}',
+                DB.COLLECTION,
+                DB._ids_query(context, [_PLACEHOLDER_ID, 'DB-000-001']),
+            ),
+            QueryShape(
+                f'DB.search by name{suffix}',
+                DB.COLLECTION,
+                DB._name_search_query(context, 'db'),
+                DB.NAME_SEARCH_SORT,
+            ),
+            QueryShape(
+                f'DB.search by id{suffix}',
+                DB.COLLECTION,
+                DB._id_search_query(context, 'dbpg'),
+                DB.ID_SEARCH_SORT,
+            ),
+            QueryShape(
+                f'DB.retrieve{suffix}',
+                DB.COLLECTION,
+                DB._retrieve_query(context, _PLACEHOLDER_ID),
+            ),
+            QueryShape(
+                f'DB.retrieve_credentials{suffix}',
+                DB.COLLECTION,
+                DB._retrieve_query(context, _PLACEHOLDER_ID),
+                projection=DB.CREDENTIALS_PROJECTION,
+            ),
+        ))
+
+    shapes.extend((
+        # Text matches are always ranked by score in memory, in a top-k sort bounded by the page,
+        # so only the use of the text index is checked. Admins don't search by text.
+        QueryShape(
+            'DB.search by text',
+            DB.COLLECTION,
+            DB._text_search_query(user, 'db'),
+            projection=DB.TEXT_SEARCH_PROJECTION,
+        ),
+        QueryShape(
+            'DB._validate_allowed_db_number_per_account',
+            DB.COLLECTION,
+            DB._default_query(user),
+            command=QueryShape.COUNT,
+        ),
+        QueryShape(
+            'DB.update_one',
+            DB.COLLECTION,
+            {'id': _PLACEHOLDER_ID},
+            command=QueryShape.UPDATE,
+        ),
+        QueryShape(
+            'DBStats.record_change',
+            DBStats.COLLECTION,
+            DBStats._cell({
+                'status': DBStatus.ACTIVE,
+                'region': {'id': 'eu-west'},
+                'workload': DBWorkload.SMALL,
+                'account_id': 'VA-000-000',
+            }),
+            command=QueryShape.UPDATE,
+        ),
+        QueryShape(
+            'LeadTimes.record_activation',
+            LeadTimes.COLLECTION,
+            LeadTimes._histogram_key(LeadTimes.CREATE, {
+                'region': {'id': 'eu-west'},
+                'workload': DBWorkload.SMALL,
+            }),
+            command=QueryShape.UPDATE,
+        ),
+        # The backlog pipeline starts with a `$match` of this query, the rest runs in memory.
+        QueryShape(
+            'LeadTimes._get_backlog',
+            LeadTimes.SOURCE_COLLECTION,
+            LeadTimes._backlog_query({'region_id': 'eu-west', 'workload': DBWorkload.SMALL}),
+        ),
+        QueryShape('Region.list', Region.COLLECTION, {}, Region.LIST_SORT),
+        QueryShape('Region.retrieve', Region.COLLECTION, {'id': 'eu-west'}),
+        QueryShape(
+            'Region.retrieve_many',
+            Region.COLLECTION,
+            {'id': {'$in': ['eu-west', 'us-east']}},
+        ),
+    ))
+
+    return shapes
+
+
+def get_plan_stages(plan: dict) -> list[str]:
+    """ Names of all stages of a plan tree, including every branch of `OR` stages. """
+    stages = []
+    pending = [plan]
+    while pending:
+        stage = pending.pop()
+        if not stage:
+            continue
+
+        stages.append(stage.get('stage', '?'))
+        children = [stage.get('inputStage'), *(stage.get('inputStages') or ())]
+        pending.extend(reversed(children))
+
+    return stages
+
+
+def get_winning_plan(explain_result: dict) -> dict:
+    query_planner = explain_result.get('queryPlanner', {})
+    plan = query_planner.get('winningPlan', {})
+
+    return plan.get('queryPlan', plan)
+
+
+async def verify_query_shapes(
+    db: AsyncIOMotorDatabase,
+    shapes: Optional[list[QueryShape]] = None,
+) -> list[str]:
+    """
+    Explains every query shape and returns a problem per shape that scans the whole collection
+    (`COLLSCAN`) or sorts in memory (`SORT`). An empty list means all shapes are covered by
+    indexes.
+    """
+    problems = []
+    for shape in shapes or get_query_shapes():
+        result = await db.command('explain', shape.explain_command(), verbosity='queryPlanner')
+        stages = get_plan_stages(get_winning_plan(result))
+
+        bad_stages = sorted({stage for stage in stages if stage in ('COLLSCAN', 'SORT')})
+        if bad_stages:
+            problems.append(f"{shape.name}: {', '.join(bad_stages)} in {' > '.join(stages)}")
+
+    return problems
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Check that every query of the services is covered by an index.',
+    )
+    parser.parse_args(argv)
+
+    config = dict(os.environ)
+    validate_db_configuration(config)
+
+    problems = asyncio.run(verify_query_shapes(get_db(config)))
+    for problem in problems:
+        print(problem)
+
+    if problems:
+        sys.exit(1)
+
+    print('All query shapes are covered by indexes.')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
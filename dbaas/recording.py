@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import json
+import random
+import sys
+import time
+from typing import Any, IO, Optional
+from urllib.parse import parse_qsl
+
+from dbaas.json_lines import JsonLinesWriter
+
+
+RECORDED_CONTEXT_HEADERS = {
+    b'x-connect-call-type': 'call_type',
+    b'x-connect-account-id': 'account_id',
+    b'x-connect-user-id': 'user_id',
+}
+# Only whether the caller ids were sent is recorded.
+REDACTED_CONTEXT = frozenset(('account_id', 'user_id'))
+# Secrets, and free text or contact data users enter, in bodies and query parameters.
+SENSITIVE_KEYS = frozenset((
+    'credentials', 'password', 'name', 'description', 'details', 'email', 'search',
+))
+REDACTED = 'redacted'
+MAX_BODY_SIZE = 64 * 1024
+
+
+def sanitize(data: Any, redact: bool = False) -> Any:
+    """ Replaces every string and number under a sensitive key, keeping the structure. """
+    if isinstance(data, dict):
+        return {
+            key: sanitize(value, redact or key in SENSITIVE_KEYS)
+            for key, value in data.items()
+        }
+
+    if isinstance(data, list):
+        return [sanitize(value, redact) for value in data]
+
+    if redact and isinstance(data, (str, int, float)) and not isinstance(data, bool):
+        return REDACTED
+
+    return data
+
+
+class RequestRecorder:
+    """
+    Writes a sanitized trace of every sampled request as a line of JSON: the route and its
+    parameters, the JSON body with credentials and free text redacted, the call type without
+    the caller ids or any keys, the response status and the timing. Traces are queued and
+    written in batches from a background thread, see `JsonLinesWriter`.
+    """
+
+    def __init__(self, stream: IO[str], sample_rate: float = 1.0, close_stream: bool = False):
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self._writer = JsonLinesWriter(stream, close_stream, name='dbaas-request-recorder')
+
+    def is_sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(self, trace: dict):
+        self._writer.write(trace)
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
+
+
+_recorder: Optional[RequestRecorder] = None
+
+
+def configure_recording(config: dict):
+    """
+    `DB_REQUEST_RECORDING` selects where request traces are written: `stdout` or a path of
+    a JSON lines file. Recording is disabled when the variable is empty.
+    `DB_REQUEST_RECORDING_SAMPLE_RATE` (default 1) sets the share of recorded requests.
+    """
+    global _recorder
+
+    if _recorder:
+        _recorder.close()
+
+    target = config.get('DB_REQUEST_RECORDING')
+    sample_rate = float(config.get('DB_REQUEST_RECORDING_SAMPLE_RATE', 1))
+    if not target:
+        _recorder = None
+
+    elif target == 'stdout':
+        _recorder = RequestRecorder(sys.stdout, sample_rate)
+
+    else:
+        _recorder = RequestRecorder(
+            open(target, 'a', encoding='utf-8'), sample_rate, close_stream=True,
+        )
+
+
+class RecordingMiddleware:
+    """ ASGI middleware passing sampled requests and their responses to the recorder. """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        recorder = _recorder
+        if scope['type'] != 'http' or not recorder or not recorder.is_sampled():
+            return await self.app(scope, receive, send)
+
+        body = bytearray()
+        body_too_large = False
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal body_too_large
+            message = await receive()
+            if message['type'] == 'http.request' and not body_too_large:
+                body.extend(message.get('body', b''))
+                if len(body) > MAX_BODY_SIZE:
+                    body_too_large = True
+                    body.clear()
+
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+            await send(message)
+
+        started_at = time.time()
+        started_at_perf = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+
+        finally:
+            recorder.record({
+                'at': started_at,
+                'method': scope['method'],
+                'path': self._get_path(scope),
+                'route': getattr(scope.get('route'), 'path', None),
+                'path_params': scope.get('path_params', {}),
+                'query': self._get_query(scope),
+                'context': {
+                    name: REDACTED if name in REDACTED_CONTEXT else value.decode('latin-1')
+                    for key, value in scope.get('headers', [])
+                    if (name := RECORDED_CONTEXT_HEADERS.get(key))
+                },
+                'body': self._get_body(body, body_too_large),
+                'status': status_code,
+                'duration': time.perf_counter() - started_at_perf,
+            })
+
+    @staticmethod
+    def _get_path(scope) -> str:
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        return path
+
+    @staticmethod
+    def _get_query(scope) -> list[tuple[str, str]]:
+        return [
+            (key, REDACTED if key in SENSITIVE_KEYS else value)
+            for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1'))
+        ]
+
+    @staticmethod
+    def _get_body(body: bytearray, body_too_large: bool) -> Optional[Any]:
+        if body_too_large or not body:
+            return None
+
+        try:
+            return sanitize(json.loads(body))
+
+        except ValueError:
+            return None
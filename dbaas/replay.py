@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+import httpx
+
+from dbaas.fake_connect import FakeConnectApi
+from dbaas.loadtest import get_connect_headers, LoadReport, start_app
+from dbaas.recording import REDACTED, REDACTED_CONTEXT
+
+
+def load_traces(lines: Iterable[str]) -> list[dict]:
+    """ Parses request traces written by the recording middleware, ordered by start time. """
+    traces = [json.loads(line) for line in lines if line.strip()]
+
+    return sorted(traces, key=lambda trace: trace['at'])
+
+
+def get_operation(trace: dict) -> str:
+    return f"{trace['method']} {trace['route'] or trace['path']}"
+
+
+def get_recorded_report(traces: list[dict]) -> LoadReport:
+    """ The timing of the recorded requests, to be compared with their replay. """
+    report = LoadReport('recorded')
+    for trace in traces:
+        report.record(get_operation(trace), trace['status'], trace['duration'])
+
+    if traces:
+        report.elapsed = max(
+            trace['at'] + trace['duration'] for trace in traces
+        ) - traces[0]['at']
+
+    return report
+
+
+class TraceReplayer:
+    """
+    Re-issues recorded requests through `client` at their original pace divided by `speed`:
+    every request is sent at its recorded offset from the first request, regardless of how
+    long earlier requests take, so a slower build faces the same arrival rate as production.
+
+    Responses with another status than recorded are counted per operation, and the delay
+    of sending requests behind their schedule is tracked to spot an overloaded replayer.
+    The caller ids are not recorded, requests sent with them are replayed with `account_id`
+    and `user_id` instead.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        connect_url: str,
+        config: dict,
+        speed: float = 1.0,
+        account_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ):
+        if speed <= 0:
+            raise ValueError('Speed must be positive.')
+
+        self.client = client
+        self.connect_url = connect_url
+        self.speed = speed
+        self.caller_ids = {'account_id': account_id, 'user_id': user_id}
+        self.status_changes = Counter()
+        self.max_lag = 0.0
+
+        self._config_header = json.dumps(config)
+
+    async def run(self, traces: list[dict]) -> LoadReport:
+        report = LoadReport('replayed')
+        if not traces:
+            return report
+
+        first_at = traces[0]['at']
+        started_at = time.perf_counter()
+        tasks = []
+        for trace in traces:
+            delay = (trace['at'] - first_at) / self.speed - (time.perf_counter() - started_at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.max_lag = max(self.max_lag, -delay)
+
+            tasks.append(asyncio.create_task(self._replay(trace, report)))
+
+        await asyncio.gather(*tasks)
+        report.elapsed = time.perf_counter() - started_at
+
+        return report
+
+    async def _replay(self, trace: dict, report: LoadReport):
+        operation = get_operation(trace)
+        started_at = time.perf_counter()
+        response = await self.client.request(
+            trace['method'],
+            trace['path'],
+            params=trace.get('query') or None,
+            json=trace.get('body'),
+            headers=get_connect_headers(
+                self.connect_url, self._config_header, self._get_context(trace),
+            ),
+        )
+        report.record(operation, response.status_code, time.perf_counter() - started_at)
+
+        if response.status_code != trace['status']:
+            self.status_changes[f"{operation}: {trace['status']} -> {response.status_code}"] += 1
+
+    def _get_context(self, trace: dict) -> dict:
+        return {
+            name: self.caller_ids[name] if name in REDACTED_CONTEXT and value == REDACTED else value
+            for name, value in trace.get('context', {}).items()
+        }
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Replay recorded request traces and compare their latencies.',
+    )
+    parser.add_argument('path', help='JSON lines file written with DB_REQUEST_RECORDING.')
+    parser.add_argument(
+        '--speed',
+        type=float,
+        default=1.0,
+        help='Replay rate relative to the recording, e.g. 2 replays twice as fast.',
+    )
+    parser.add_argument(
+        '--url',
+        help='Base URL of a running API. By default the API is started in process against '
+             'the configured MongoDB.',
+    )
+    parser.add_argument(
+        '--account-id',
+        help='Account of the replayed requests, the recorded one is redacted.',
+    )
+    parser.add_argument(
+        '--user-id',
+        help='User of the replayed requests, the recorded one is redacted.',
+    )
+    parser.add_argument('--connect-latency-ms', type=float, default=50)
+    parser.add_argument('--connect-error-rate', type=float, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.LoggerAdapter(logging.getLogger('dbaas.replay'), {})
+
+    config = {key: value for key, value in os.environ.items() if key.startswith('DB_')}
+    config.setdefault('DB_MAX_ALLOWED_NUMBER_PER_ACCOUNT', str(10 ** 9))
+    # The replayed requests must not be recorded again.
+    config.pop('DB_REQUEST_RECORDING', None)
+
+    with open(args.path, encoding='utf-8') as f:
+        traces = load_traces(f)
+
+    connect_api = FakeConnectApi(
+        latency=args.connect_latency_ms / 1000,
+        error_rate=args.connect_error_rate,
+    )
+
+    async def replay():
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=None)
+        else:
+            app = await start_app(logger, config)
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url='http://dbaas',
+                timeout=None,
+            )
+
+        async with client:
+            replayer = TraceReplayer(
+                client,
+                connect_api.url,
+                config,
+                speed=args.speed,
+                account_id=args.account_id,
+                user_id=args.user_id,
+            )
+            return replayer, await replayer.run(traces)
+
+    connect_api.start()
+    try:
+        replayer, report = asyncio.run(replay())
+
+    finally:
+        connect_api.stop()
+
+    print(get_recorded_report(traces).render())
+    print()
+    print(report.render())
+    print()
+    print(f'Requests were sent up to {replayer.max_lag * 1000:.1f} ms behind schedule.')
+    if replayer.status_changes:
+        print('Responses with another status than recorded:')
+    for change, count in replayer.status_changes.most_common():
+        print(f'  {change}: {count}')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -4,9 +4,10 @@
 # All rights reserved.
 #
 
+from datetime import datetime
 from typing import Literal, Optional
 
-from pydantic import BaseModel, constr, Field
+from pydantic import BaseModel, conint, conlist, constr, Field
 
 from dbaas.constants import DBAction, DBWorkload
 
@@ -52,6 +53,12 @@ class DatabaseOutList(DatabaseInCreate):
     owner: RefIn
     case: Optional[RefIn]
     events: Optional[dict]
+    updated_at: Optional[datetime]
+
+
+class DatabaseChanges(BaseModel):
+    items: list[DatabaseOutList]
+    next: Optional[str]
 
 
 class _Credentials(BaseModel):
@@ -63,7 +70,10 @@ class _Credentials(BaseModel):
 
 class DatabaseOutDetail(DatabaseOutList):
     tech_contact: TechContactOut
-    credentials: Optional[_Credentials]
+    credentials_available: bool = False
+
+
+DatabaseCredentialsOut = _Credentials
 
 
 class DatabaseReconfigure(BaseModel):
@@ -76,8 +86,106 @@ class DatabaseActivate(BaseModel):
     credentials: Optional[_Credentials]
 
 
+class DatabaseBulkCreate(BaseModel):
+    items: conlist(DatabaseInCreate, min_items=1, max_items=100)
+
+
+class DatabaseBulkCreateResult(BaseModel):
+    status_code: int
+    message: Optional[str]
+    database: Optional[DatabaseOutList]
+
+
+class _DatabaseBulkActionItem(BaseModel):
+    id: constr(min_length=1, max_length=16, strict=True)
+
+
+class _DatabaseBulkActivationItem(_DatabaseBulkActionItem, DatabaseActivate):
+    pass
+
+
+class DatabaseBulkAction(BaseModel):
+    action: Literal[DBAction.ACTIVATE, DBAction.DELETE]
+    # Activation fields are parsed for every action, items of other actions setting them are
+    # rejected one by one.
+    items: conlist(_DatabaseBulkActivationItem, min_items=1, max_items=100)
+
+
+class DatabaseBulkResult(BaseModel):
+    id: str
+    status_code: int
+    message: Optional[str]
+    database: Optional[DatabaseOutDetail]
+
+
+class DatabaseStats(BaseModel):
+    total: int
+    status: dict[str, int]
+    region_id: dict[str, int]
+    workload: dict[str, int]
+    account_id: dict[str, int]
+
+
+class _LeadTimePercentiles(BaseModel):
+    count: int
+    percentiles_seconds: dict[str, float]
+
+
+class _LeadTimes(_LeadTimePercentiles):
+    mean_seconds: Optional[float]
+
+
+class _Backlog(_LeadTimePercentiles):
+    oldest_age_seconds: Optional[float]
+
+
+class DatabaseLeadTimes(BaseModel):
+    create: _LeadTimes
+    reconfigure: _LeadTimes
+    backlog: _Backlog
+
+
 RegionOut = RefOut
 
 
 class RegionIn(RefIn):
     name: constr(min_length=1, max_length=64, strict=True)
+
+
+class MemoryTracingIn(BaseModel):
+    enabled: bool
+    frames: conint(ge=1, le=32) = 1
+
+
+class MemoryTracingOut(BaseModel):
+    enabled: bool
+    current_bytes: int
+    peak_bytes: int
+
+
+class MemoryObjectCounts(BaseModel):
+    documents: int
+    pydantic_models: int
+    motor_clients: int
+    mongo_clients: int
+
+
+class _AllocationSite(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+
+
+class _AllocationDiff(_AllocationSite):
+    size_diff_bytes: int
+    count_diff: int
+
+
+class MemorySnapshotOut(BaseModel):
+    id: str
+    taken_at: datetime
+    traced_bytes: int
+    top: list[_AllocationSite]
+    previous_id: Optional[str]
+    diff: Optional[list[_AllocationDiff]]
+    objects: MemoryObjectCounts
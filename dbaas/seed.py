@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import string
+from datetime import datetime, timedelta, timezone
+from logging import LoggerAdapter
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+
+from dbaas.constants import DBStatus, DBWorkload
+from dbaas.crypto import get_crypto_executor
+from dbaas.database import Collections, prepare_db
+from dbaas.services import DB
+from dbaas.stats import DBStats, LeadTimes
+
+
+class DatasetSeeder:
+    """
+    Generates synthetic `db` and `region` collections for scale testing and writes them with bulk
+    inserts.
+
+    Documents are spread over `accounts` with Zipf-like sizes: the account of rank `r` owns
+    a share proportional to `1 / r ** skew`, so a few accounts hold most of the databases, like
+    the largest resellers. Every status is generated, including deleted databases, the number
+    of helpdesk cases per database has a long tail up to `max_cases`, and credentials are
+    encrypted with `DB._encrypt_dict`.
+
+    The next batch is generated in the crypto executor while the previous one is inserted.
+    """
+
+    DEFAULT_DOCUMENTS = 10000
+    DEFAULT_ACCOUNTS = 100
+    DEFAULT_REGIONS = 5
+    DEFAULT_SKEW = 1.1
+    DEFAULT_MAX_CASES = 50
+    DEFAULT_BATCH_SIZE = 1000
+    STATUS_WEIGHTS = {
+        DBStatus.ACTIVE: 60,
+        DBStatus.REVIEWING: 10,
+        DBStatus.RECONFIGURING: 10,
+        DBStatus.DELETED: 20,
+    }
+    HISTORY_DAYS = 730
+
+    def __init__(
+        self,
+        config: dict,
+        accounts: int = DEFAULT_ACCOUNTS,
+        regions: int = DEFAULT_REGIONS,
+        skew: float = DEFAULT_SKEW,
+        max_cases: int = DEFAULT_MAX_CASES,
+        seed: Optional[int] = None,
+    ):
+        self.config = config
+        self.accounts = [f'VA-{n // 1000:03}-{n % 1000:03}' for n in range(accounts)]
+        self.regions = [
+            {'id': f'region-{n:02}', 'name': f'Region {n:02}'}
+            for n in range(regions)
+        ]
+        self.max_cases = max_cases
+        self.random = random.Random(seed)
+        self.now = datetime.now(tz=timezone.utc)
+
+        self._account_cum_weights = list(itertools.accumulate(
+            1 / rank ** skew for rank in range(1, accounts + 1)
+        ))
+        self._statuses = list(self.STATUS_WEIGHTS)
+        self._status_cum_weights = list(itertools.accumulate(self.STATUS_WEIGHTS.values()))
+
+    async def run(
+        self,
+        db: AsyncIOMotorDatabase,
+        logger: LoggerAdapter,
+        documents: int = DEFAULT_DOCUMENTS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        start: int = 0,
+    ) -> int:
+        await db[Collections.REGION].bulk_write([
+            ReplaceOne({'id': region['id']}, region, upsert=True)
+            for region in self.regions
+        ])
+
+        crypto_executor = get_crypto_executor(self.config)
+        inserting = None
+        inserted = 0
+
+        for batch_start in range(start, start + documents, batch_size):
+            batch_end = min(batch_start + batch_size, start + documents)
+            db_documents = await crypto_executor.run(
+                self.generate_db_documents, batch_start, batch_end,
+            )
+
+            if inserting:
+                inserted += await inserting
+                logger.info('Inserted %d documents.', inserted)
+
+            inserting = asyncio.ensure_future(self._insert(db, db_documents))
+
+        if inserting:
+            inserted += await inserting
+
+        await DBStats.rebuild(db)
+        await LeadTimes.rebuild(db)
+        logger.info('Seeding is completed: %d documents.', inserted)
+        return inserted
+
+    @staticmethod
+    async def _insert(db: AsyncIOMotorDatabase, db_documents: list[dict]) -> int:
+        result = await db[Collections.DB].insert_many(db_documents, ordered=False)
+
+        return len(result.inserted_ids)
+
+    def generate_db_documents(self, start: int, end: int) -> list[dict]:
+        return [self.generate_db_document(number) for number in range(start, end)]
+
+    def generate_db_document(self, number: int) -> dict:
+        rnd = self.random
+        status = rnd.choices(self._statuses, cum_weights=self._status_cum_weights)[0]
+        region = rnd.choice(self.regions)
+        tech_contact = self._user(rnd.randrange(1000000))
+
+        name = f'Database {number}'
+        created_at = self.now - timedelta(seconds=rnd.uniform(0, self.HISTORY_DAYS * 86400))
+        events = {'created': {'at': created_at, 'by': self._actor(tech_contact)}}
+        if status in (DBStatus.ACTIVE, DBStatus.RECONFIGURING, DBStatus.DELETED):
+            events['activated'] = {'at': self._after(created_at)}
+        # Some active databases went through a reconfiguration and were activated again.
+        if status == DBStatus.RECONFIGURING or (status == DBStatus.ACTIVE and rnd.random() < 0.2):
+            reconfigured_at = self._after(events['activated']['at'])
+            events['reconfigured'] = {'at': reconfigured_at, 'by': self._actor(tech_contact)}
+            if status == DBStatus.ACTIVE:
+                events['activated'] = {'at': self._after(reconfigured_at)}
+        if rnd.random() < 0.3:
+            events['updated'] = {'at': self._after(created_at), 'by': self._actor(tech_contact)}
+        if status == DBStatus.DELETED:
+            events['deleted'] = {'at': self._after(created_at)}
+
+        db_document = {
+            'id': f'DBS-{number // 1000000:03}-{number // 1000 % 1000:03}-{number % 1000:03}',
+            'name': name,
+            'search_name': DB._search_name(name),
+            'description': self._text(rnd.randint(20, 500)),
+            'workload': rnd.choice(DBWorkload.all()),
+            'status': status,
+            'account_id': rnd.choices(self.accounts, cum_weights=self._account_cum_weights)[0],
+            'region': dict(region),
+            'tech_contact': tech_contact,
+            'events': events,
+            'updated_at': max(event['at'] for event in events.values()),
+            'cases': [
+                {'id': f'CS-{rnd.randrange(10 ** 8):08}'}
+                for _ in range(self._cases_number(status))
+            ],
+        }
+
+        if 'activated' in events:
+            db_document['credentials'] = DB._encrypt_dict({
+                'host': f"{db_document['id'].lower()}.{region['id']}.example.com",
+                'username': f'user{number}',
+                'password': self._text(24),
+                'name': f'db{number}',
+            }, self.config)
+
+        return db_document
+
+    def _cases_number(self, status: str) -> int:
+        # Every database has the creation case, the rest has a long tail of reconfigurations.
+        extra_cases = int(self.random.paretovariate(1.5)) - 1
+        if status == DBStatus.DELETED:
+            extra_cases += 1
+
+        return min(1 + extra_cases, self.max_cases)
+
+    def _after(self, moment: datetime) -> datetime:
+        return min(moment + timedelta(seconds=self.random.uniform(0, 30 * 86400)), self.now)
+
+    def _text(self, length: int) -> str:
+        return ''.join(self.random.choices(string.ascii_letters + ' ', k=length)).strip() or 'x'
+
+    @staticmethod
+    def _user(number: int) -> dict:
+        return {
+            'id': f'UR-{number // 1000:03}-{number % 1000:03}',
+            'name': f'User {number}',
+            'email': f'user{number}@example.com',
+        }
+
+    @staticmethod
+    def _actor(user: dict) -> dict:
+        return {'id': user['id'], 'name': user['name']}
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(description='Seed a synthetic dataset for scale testing.')
+    parser.add_argument('--documents', type=int, default=DatasetSeeder.DEFAULT_DOCUMENTS)
+    parser.add_argument('--accounts', type=int, default=DatasetSeeder.DEFAULT_ACCOUNTS)
+    parser.add_argument('--regions', type=int, default=DatasetSeeder.DEFAULT_REGIONS)
+    parser.add_argument(
+        '--skew',
+        type=float,
+        default=DatasetSeeder.DEFAULT_SKEW,
+        help='Skew of account sizes, 0 spreads documents evenly.',
+    )
+    parser.add_argument('--max-cases', type=int, default=DatasetSeeder.DEFAULT_MAX_CASES)
+    parser.add_argument('--batch-size', type=int, default=DatasetSeeder.DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        '--start',
+        type=int,
+        default=0,
+        help='Number of the first document, to add documents to an existing dataset.',
+    )
+    parser.add_argument('--seed', type=int, help='Seed of the random generator.')
+    parser.add_argument(
+        '--clear',
+        action='store_true',
+        help='Delete all documents of the seeded collections first.',
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.LoggerAdapter(logging.getLogger('dbaas.seed'), {})
+
+    config = dict(os.environ)
+
+    async def seed():
+        db = await prepare_db(logger, config)
+        if args.clear:
+            await db[Collections.DB].delete_many({})
+            await db[Collections.REGION].delete_many({})
+
+        seeder = DatasetSeeder(
+            config,
+            accounts=args.accounts,
+            regions=args.regions,
+            skew=args.skew,
+            max_cases=args.max_cases,
+            seed=args.seed,
+        )
+        await seeder.run(
+            db,
+            logger,
+            documents=args.documents,
+            batch_size=args.batch_size,
+            start=args.start,
+        )
+
+    asyncio.run(seed())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -5,21 +5,22 @@
 #
 
 import asyncio
+import base64
 import random
 import string
 from copy import copy
-from datetime import datetime, timezone
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 
 import bson
 import pymongo
 from connect.client import ClientError
 from connect.eaas.core.logging import RequestLogger
-from cryptography.fernet import Fernet
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 from connect.eaas.core.inject.asynchronous import AsyncConnectClient, get_installation
 from connect.eaas.core.inject.models import Context
-from pymongo.errors import DuplicateKeyError, OperationFailure
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
 from dbaas.constants import (
     DB_HELPDESK_CASE_DESCRIPTION_TPL,
@@ -27,21 +28,40 @@ from dbaas.constants import (
     DBAction,
     DBStatus,
 )
-from dbaas.database import Collections, DBEnvVar
-from dbaas.utils import is_admin_context
+from dbaas.crypto import get_crypto_executor, get_key_ring
+from dbaas.database import Collections, DBEnvVar, get_search_name
+from dbaas.stats import DBStats, LeadTimes
+from dbaas.tracing import start_span, traced
+from dbaas.utils import create_background_task, gather_bounded, is_admin_context
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 class DB:
     COLLECTION = Collections.DB
     MAX_ID_GENERATION_RETRIES = 3
     LIST_STEP_LENGTH = 20
+    LIST_SORT = [('events.created.at', pymongo.DESCENDING)]
+    CHANGES_STEP_LENGTH = 100
+    CHANGES_SORT = [('updated_at', pymongo.ASCENDING), ('id', pymongo.ASCENDING)]
+    # `updated_at` is stamped by the application (`_prepare_updated_at`) before the write is
+    # committed, and the clocks of app replicas may be skewed, so a change may become visible
+    # after a younger one. Changes younger than the lag are held back until such writes land.
+    CHANGES_SAFETY_LAG = timedelta(seconds=10)
+    CREDENTIALS_PROJECTION = {'status': 1, 'credentials': 1}
+    SEARCH_LIMIT = 20
+    ID_SEARCH_SORT = [('id', pymongo.ASCENDING)]
+    NAME_SEARCH_SORT = [('search_name', pymongo.ASCENDING)]
+    TEXT_SEARCH_PROJECTION = {'score': {'$meta': 'textScore'}}
+    TEXT_SEARCH_SORT = [('score', {'$meta': 'textScore'})]
+    BULK_ACTIVATION_FIELDS = ('credentials', 'workload')
 
     @classmethod
-    async def list(cls, db: AsyncIOMotorDatabase, context: Context) -> list[dict]:
+    @traced()
+    async def list(cls, db: AsyncIOMotorDatabase, context: Context) -> List[dict]:
         db_coll = db[cls.COLLECTION]
-        cursor = db_coll.find(
-            cls._default_query(context),
-        ).sort('events.created.at', pymongo.DESCENDING)
+        cursor = db_coll.find(cls._default_query(context)).sort(cls.LIST_SORT)
 
         results = []
 
@@ -56,23 +76,112 @@ class DB:
         return results
 
     @classmethod
+    @traced()
+    async def search(
+        cls,
+        db: AsyncIOMotorDatabase,
+        context: Context,
+        search: str,
+        limit: int = SEARCH_LIMIT,
+        offset: int = 0,
+    ) -> List[dict]:
+        """
+        Finds databases by a case-insensitive prefix of their name or ID, or by words of their
+        description. Exact matches of the name or ID come first, then prefix matches of the name
+        and the ID, then description matches by relevance. The text index of descriptions is
+        scoped by account, so admin searches don't match descriptions.
+        """
+        length = offset + limit
+        db_coll = db[cls.COLLECTION]
+
+        lookups = [
+            db_coll.find(cls._name_search_query(context, search)).sort(
+                cls.NAME_SEARCH_SORT,
+            ).to_list(length=length),
+            db_coll.find(cls._id_search_query(context, search)).sort(
+                cls.ID_SEARCH_SORT,
+            ).to_list(length=length),
+        ]
+        text_search_query = cls._text_search_query(context, search)
+        if text_search_query:
+            lookups.append(
+                db_coll.find(
+                    text_search_query,
+                    projection=cls.TEXT_SEARCH_PROJECTION,
+                ).sort(cls.TEXT_SEARCH_SORT).to_list(length=length),
+            )
+
+        matches = {}
+        for rank, docs in enumerate(await asyncio.gather(*lookups), start=1):
+            for db_document in docs:
+                if db_document['id'] not in matches:
+                    exact = cls._is_exact_search_match(db_document, search)
+                    matches[db_document['id']] = (0 if exact else rank, db_document)
+
+        ranked = sorted(matches.values(), key=lambda match: match[0])
+
+        return [cls._db_document_repr(db_document) for _, db_document in ranked[offset:length]]
+
+    @classmethod
+    @traced()
+    async def changes(
+        cls,
+        db: AsyncIOMotorDatabase,
+        context: Context,
+        since: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        until = cls._prepare_updated_at() - cls.CHANGES_SAFETY_LAG
+        query = cls._changes_query(context, since, until)
+
+        db_coll = db[cls.COLLECTION]
+        docs = await db_coll.find(query).sort(cls.CHANGES_SORT).to_list(
+            length=cls.CHANGES_STEP_LENGTH,
+        )
+
+        if not docs:
+            return [], since
+
+        last_doc = docs[-1]
+        next_token = cls._encode_changes_token(last_doc['updated_at'], last_doc['id'])
+
+        return [cls._db_document_repr(db_document) for db_document in docs], next_token
+
+    @classmethod
+    @traced()
     async def retrieve(
         cls,
         db_id: str,
         db: AsyncIOMotorDatabase,
         context: Context,
-        config: Optional[dict] = None,
     ) -> Optional[dict]:
         db_coll = db[cls.COLLECTION]
-
-        query = cls._default_query(context)
-        query['id'] = db_id
-        db_document = await db_coll.find_one(query)
+        db_document = await db_coll.find_one(cls._retrieve_query(context, db_id))
 
         if db_document:
-            return cls._db_document_repr(db_document, config=config)
+            return cls._db_document_repr(db_document)
 
     @classmethod
+    @traced()
+    async def retrieve_credentials(
+        cls,
+        db_id: str,
+        db: AsyncIOMotorDatabase,
+        context: Context,
+        config: dict,
+    ) -> Optional[dict]:
+        db_coll = db[cls.COLLECTION]
+        db_document = await db_coll.find_one(
+            cls._retrieve_query(context, db_id),
+            projection=cls.CREDENTIALS_PROJECTION,
+        )
+
+        if db_document and cls._credentials_available(db_document):
+            return await get_crypto_executor(config).run(
+                cls._decrypt_dict, db_document['credentials'], config,
+            )
+
+    @classmethod
+    @traced()
     async def create(
         cls,
         data: dict,
@@ -98,6 +207,129 @@ class DB:
         return cls._db_document_repr(inserted_db_doc)
 
     @classmethod
+    @traced()
+    async def bulk_create(
+        cls,
+        items: List[dict],
+        db: AsyncIOMotorDatabase,
+        context: Context,
+        client: AsyncConnectClient,
+        config: dict,
+    ) -> List[dict]:
+        """
+        Creates many databases. Regions, users and the installation are looked up once, the quota
+        is checked once for all valid items, the documents are written with one `insert_many` and
+        their helpdesk cases are created concurrently. Documents whose case could not be created
+        are removed again, all of them without a recorded case if an unexpected error is raised.
+        Returns a result per item, in item order, with the status code a single create would
+        respond with.
+        """
+        region_ids = list(dict.fromkeys(item['region']['id'] for item in items))
+        user_ids = list(dict.fromkeys(
+            [item['tech_contact']['id'] for item in items] + [context.user_id],
+        ))
+        region_docs, users, installation = await asyncio.gather(
+            Region.retrieve_many(region_ids, db),
+            ConnectAccountUser.retrieve_many(context.account_id, user_ids, client),
+            ConnectInstallation.retrieve(context.installation_id, client),
+        )
+
+        actor = users[context.user_id]
+        if isinstance(actor, BaseException):
+            raise actor
+
+        results = {}
+        db_documents = {}
+        for n, item in enumerate(items):
+            region_doc = region_docs.get(item['region']['id'])
+            tech_contact = users[item['tech_contact']['id']]
+            if not region_doc:
+                results[n] = cls._bulk_create_result(400, message='Region does not exist.')
+            elif isinstance(tech_contact, ClientError):
+                results[n] = cls._client_error_result(tech_contact)
+            elif isinstance(tech_contact, BaseException):
+                raise tech_contact
+            elif not tech_contact.get('active'):
+                results[n] = cls._bulk_create_result(
+                    400, message='Only active user can be a technical contact.',
+                )
+            else:
+                db_documents[n] = cls._prepare_db_document(
+                    item, context, region_doc, tech_contact, actor,
+                )
+
+        if db_documents:
+            try:
+                await cls._validate_allowed_db_number_per_account(
+                    db, context, config, number=len(db_documents),
+                )
+            except ValueError as e:
+                results.update({
+                    n: cls._bulk_create_result(400, message=str(e)) for n in db_documents
+                })
+                db_documents = {}
+
+        write_results = await cls._insert_db_documents(db_documents, db, config, client.logger)
+        results.update(write_results)
+        db_documents = {n: doc for n, doc in db_documents.items() if n not in write_results}
+
+        db_coll = db[cls.COLLECTION]
+        try:
+            helpdesk_cases = await gather_bounded(
+                (
+                    ConnectHelpdeskCase.create_from_db_document(
+                        db_document,
+                        action=DBAction.CREATE,
+                        description=db_document['description'],
+                        installation=installation,
+                        client=client,
+                    )
+                    for db_document in db_documents.values()
+                ),
+                ConnectHelpdeskCase.CREATE_CONCURRENCY,
+                return_exceptions=True,
+            )
+
+            writes = []
+            created_db_documents = []
+            failed_db_ids = []
+            for (n, db_document), helpdesk_case in zip(db_documents.items(), helpdesk_cases):
+                if isinstance(helpdesk_case, ClientError):
+                    results[n] = cls._client_error_result(helpdesk_case)
+                    failed_db_ids.append(db_document['id'])
+                elif isinstance(helpdesk_case, BaseException):
+                    raise helpdesk_case
+                else:
+                    db_document['cases'] = [cls._prepare_helpdesk_case(helpdesk_case)]
+                    db_document['updated_at'] = cls._prepare_updated_at()
+                    writes.append(UpdateOne(
+                        {'id': db_document['id']},
+                        {'$set': {
+                            'cases': db_document['cases'],
+                            'updated_at': db_document['updated_at'],
+                        }},
+                    ))
+                    created_db_documents.append(db_document)
+                    results[n] = cls._bulk_create_result(201, db_document=db_document)
+
+            if failed_db_ids:
+                await db_coll.delete_many({'id': {'$in': failed_db_ids}})
+            if writes:
+                await db_coll.bulk_write(writes, ordered=False)
+
+        except BaseException:
+            # Cases are recorded by the last write, so none of the inserted documents has one.
+            if db_documents:
+                db_ids = [db_document['id'] for db_document in db_documents.values()]
+                await db_coll.delete_many({'id': {'$in': db_ids}})
+            raise
+
+        await DBStats.record_changes(db, [(None, doc) for doc in created_db_documents])
+
+        return [results[n] for n in range(len(items))]
+
+    @classmethod
+    @traced()
     async def update(
         cls,
         db_document: dict,
@@ -112,6 +344,7 @@ class DB:
         return cls._db_document_repr(updated_db_document)
 
     @classmethod
+    @traced()
     async def delete(
         cls,
         db_document: dict,
@@ -120,11 +353,7 @@ class DB:
         **kwargs,
     ) -> dict:
         updated_db_document = copy(db_document)
-        updates = {'status': DBStatus.DELETED}
-
-        updated_events = updated_db_document.get('events', {})
-        updated_events['deleted'] = cls._prepare_event()
-        updates['events'] = updated_events
+        updates = cls._prepare_deletion(updated_db_document)
 
         db_coll = db[cls.COLLECTION]
         await db_coll.update_one(
@@ -132,12 +361,14 @@ class DB:
             {'$set': updates},
         )
         updated_db_document.update(updates)
+        await DBStats.record_change(db, db_document, updated_db_document)
 
         cls._resolve_last_db_document_case(db_document, client)
 
         return cls._db_document_repr(updated_db_document)
 
     @classmethod
+    @traced()
     async def reconfigure(
         cls,
         db_document: dict,
@@ -174,6 +405,7 @@ class DB:
         cases = updated_db_document.get('cases', [])
         cases.append(cls._prepare_helpdesk_case(helpdesk_case))
         updates['cases'] = cases
+        updates['updated_at'] = cls._prepare_updated_at()
 
         db_coll = db[cls.COLLECTION]
         await db_coll.update_one(
@@ -182,9 +414,12 @@ class DB:
         )
 
         updated_db_document.update(updates)
+        await DBStats.record_change(db, db_document, updated_db_document)
+
         return cls._db_document_repr(updated_db_document)
 
     @classmethod
+    @traced()
     async def activate(
         cls,
         db_document: dict,
@@ -196,7 +431,152 @@ class DB:
     ) -> dict:
         updated_db_document = await cls._activate(db_document, data, db, config, client)
 
-        return cls._db_document_repr(updated_db_document, config=config)
+        return cls._db_document_repr(updated_db_document)
+
+    @classmethod
+    @traced()
+    async def bulk_action(
+        cls,
+        action: str,
+        items: List[dict],
+        db: AsyncIOMotorDatabase,
+        context: Context,
+        config: dict,
+        client: AsyncConnectClient,
+    ) -> List[dict]:
+        """
+        Activates or deletes many databases. The documents are read with one query and written
+        with one `bulk_write`, and the last cases of all changed databases are resolved in one
+        background task. Returns a result per distinct ID, with the status code the single
+        action would respond with.
+        """
+        unique_items = {}
+        for item in items:
+            unique_items.setdefault(item['id'], item)
+        items = list(unique_items.values())
+
+        db_coll = db[cls.COLLECTION]
+
+        query = cls._ids_query(context, [item['id'] for item in items])
+        db_documents = {
+            db_document['id']: db_document
+            for db_document in await db_coll.find(query).to_list(length=None)
+        }
+
+        async def prepare(item: dict) -> Optional[dict]:
+            db_document = db_documents[item['id']]
+            if action == DBAction.ACTIVATE:
+                return await cls._prepare_activation(db_document, item, config)
+
+            if any(item.get(key) is not None for key in cls.BULK_ACTIVATION_FIELDS):
+                raise ValueError('Credentials and workload can only be set on activation.')
+
+            return cls._prepare_deletion(db_document)
+
+        found_items = [item for item in items if item['id'] in db_documents]
+        prepared = await asyncio.gather(
+            *(prepare(item) for item in found_items),
+            return_exceptions=True,
+        )
+
+        results = {
+            item['id']: cls._bulk_result(item['id'], 404, message='Database not found.')
+            for item in items
+            if item['id'] not in db_documents
+        }
+        writes = []
+        for item, updates in zip(found_items, prepared):
+            db_document = db_documents[item['id']]
+            if isinstance(updates, ValueError):
+                results[item['id']] = cls._bulk_result(item['id'], 400, message=str(updates))
+            elif isinstance(updates, BaseException):
+                raise updates
+            elif not updates:
+                results[item['id']] = cls._bulk_result(item['id'], 200, db_document=db_document)
+            else:
+                writes.append((db_document, updates))
+
+        failed_ids = set()
+        if writes:
+            try:
+                await db_coll.bulk_write(
+                    [
+                        UpdateOne({'id': db_document['id']}, {'$set': updates})
+                        for db_document, updates in writes
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                client.logger.logger.error('DB bulk writing error: %s', e.details['writeErrors'])
+                failed_ids = {writes[error['index']][0]['id'] for error in e.details['writeErrors']}
+
+        changes = []
+        for db_document, updates in writes:
+            if db_document['id'] in failed_ids:
+                results[db_document['id']] = cls._bulk_result(
+                    db_document['id'], 503, message='DB writing error.',
+                )
+                continue
+
+            updated_db_document = {**db_document, **updates}
+            changes.append((db_document, updated_db_document))
+            results[db_document['id']] = cls._bulk_result(
+                db_document['id'], 200, db_document=updated_db_document,
+            )
+
+        await DBStats.record_changes(db, changes)
+        if action == DBAction.ACTIVATE:
+            await LeadTimes.record_activations(db, [
+                (db_document, updated_db_document['events']['activated']['at'])
+                for db_document, updated_db_document in changes
+            ])
+
+        cls._resolve_last_db_documents_cases(
+            [db_document for db_document, _ in changes],
+            client,
+        )
+
+        return [results[item['id']] for item in items]
+
+    @classmethod
+    def _bulk_result(
+        cls,
+        db_id: str,
+        status_code: int,
+        message: Optional[str] = None,
+        db_document: Optional[dict] = None,
+    ) -> dict:
+        result = {'id': db_id, 'status_code': status_code}
+        if message:
+            result['message'] = message
+        if db_document:
+            result['database'] = cls._db_document_repr(db_document)
+
+        return result
+
+    @classmethod
+    def _bulk_create_result(
+        cls,
+        status_code: int,
+        message: Optional[str] = None,
+        db_document: Optional[dict] = None,
+    ) -> dict:
+        result = {'status_code': status_code}
+        if message:
+            result['message'] = message
+        if db_document:
+            result['database'] = cls._db_document_repr(db_document)
+
+        return result
+
+    @classmethod
+    def _client_error_result(cls, error: ClientError) -> dict:
+        """ The result of an item failed by the Connect API, as the exception handler maps it. """
+        if (not error.status_code) or error.status_code >= 500:
+            return cls._bulk_create_result(503, message='Service Unavailable.')
+
+        message = error.errors[0] if error.errors else error.message
+        return cls._bulk_create_result(400, message=message)
 
     @classmethod
     async def _activate(
@@ -207,6 +587,35 @@ class DB:
         config: dict,
         client: AsyncConnectClient,
     ):
+        updated_db_document = copy(db_document)
+        updates = await cls._prepare_activation(updated_db_document, data, config)
+        if not updates:
+            return db_document
+
+        db_coll = db[cls.COLLECTION]
+        await db_coll.update_one(
+            {'id': db_document['id']},
+            {'$set': updates},
+        )
+        updated_db_document.update(updates)
+        await DBStats.record_change(db, db_document, updated_db_document)
+        await LeadTimes.record_activation(db, db_document, updates['events']['activated']['at'])
+
+        cls._resolve_last_db_document_case(db_document, client)
+
+        return updated_db_document
+
+    @classmethod
+    async def _prepare_activation(
+        cls,
+        db_document: dict,
+        data: dict,
+        config: dict,
+    ) -> Optional[dict]:
+        """
+        Updates activating `db_document`, `None` if it is active already. The document is left
+        unchanged, the updates apply once they are written.
+        """
         status = db_document.get('status')
         credentials = data.get('credentials')
 
@@ -220,29 +629,28 @@ class DB:
                 raise ValueError('Credentials are required for DB activation.')
 
             if (not workload_is_updated) and status == DBStatus.ACTIVE:
-                return db_document
+                return None
 
         else:
-            updates['credentials'] = cls._encrypt_dict(credentials, config)
+            updates['credentials'] = await get_crypto_executor(config).run(
+                cls._encrypt_dict, credentials, config,
+            )
 
         if workload_is_updated:
             updates['workload'] = workload
 
-        updated_db_document = copy(db_document)
-        updated_events = updated_db_document.get('events', {})
-        updated_events['activated'] = cls._prepare_event()
-        updates['events'] = updated_events
+        updates['events'] = {**db_document.get('events', {}), 'activated': cls._prepare_event()}
+        updates['updated_at'] = cls._prepare_updated_at()
 
-        db_coll = db[cls.COLLECTION]
-        await db_coll.update_one(
-            {'id': db_document['id']},
-            {'$set': updates},
-        )
-        updated_db_document.update(updates)
+        return updates
 
-        cls._resolve_last_db_document_case(db_document, client)
+    @classmethod
+    def _prepare_deletion(cls, db_document: dict) -> dict:
+        updates = {'status': DBStatus.DELETED, 'updated_at': cls._prepare_updated_at()}
 
-        return updated_db_document
+        updates['events'] = {**db_document.get('events', {}), 'deleted': cls._prepare_event()}
+
+        return updates
 
     @classmethod
     async def _update(
@@ -272,10 +680,14 @@ class DB:
 
         actor = await cls._get_actor(context, client)
 
+        if 'name' in updates:
+            updates['search_name'] = cls._search_name(updates['name'])
+
         updated_db_document = copy(db_document)
         updated_events = updated_db_document.get('events', {})
         updated_events['updated'] = cls._prepare_event(actor)
         updates['events'] = updated_events
+        updates['updated_at'] = cls._prepare_updated_at()
 
         db_coll = db[cls.COLLECTION]
         await db_coll.update_one(
@@ -290,7 +702,18 @@ class DB:
     def _resolve_last_db_document_case(cls, db_document: dict, client: AsyncConnectClient):
         case = cls._get_last_db_document_case(db_document)
         if case:
-            asyncio.create_task(ConnectHelpdeskCase.resolve(case['id'], client))
+            create_background_task(ConnectHelpdeskCase.resolve(case['id'], client))
+
+    @classmethod
+    def _resolve_last_db_documents_cases(
+        cls,
+        db_documents: List[dict],
+        client: AsyncConnectClient,
+    ):
+        cases = (cls._get_last_db_document_case(db_document) for db_document in db_documents)
+        case_ids = [case['id'] for case in cases if case]
+        if case_ids:
+            create_background_task(ConnectHelpdeskCase.resolve_many(case_ids, client))
 
     @classmethod
     def _default_query(cls, context: Context) -> dict:
@@ -302,7 +725,88 @@ class DB:
         return q
 
     @classmethod
-    def _db_document_repr(cls, db_document: dict, config: dict = None) -> dict:
+    def _retrieve_query(cls, context: Context, db_id: str) -> dict:
+        query = cls._default_query(context)
+        query['id'] = db_id
+
+        return query
+
+    @classmethod
+    def _ids_query(cls, context: Context, db_ids: List[str]) -> dict:
+        query = cls._default_query(context)
+        query['id'] = {'$in': db_ids}
+
+        return query
+
+    @classmethod
+    def _name_search_query(cls, context: Context, search: str) -> dict:
+        query = cls._default_query(context)
+        query['search_name'] = cls._prefix_range(cls._search_name(search))
+
+        return query
+
+    @classmethod
+    def _id_search_query(cls, context: Context, search: str) -> dict:
+        query = cls._default_query(context)
+        query['id'] = cls._prefix_range(search.upper())
+
+        return query
+
+    @classmethod
+    def _text_search_query(cls, context: Context, search: str) -> Optional[dict]:
+        # The text index is prefixed by `account_id`, so it only serves queries of an account.
+        if is_admin_context(context):
+            return None
+
+        # Quotes and leading dashes would turn words into phrases and negations.
+        words = (word.replace('"', '').lstrip('-') for word in search.split())
+        terms = ' '.join(word for word in words if word)
+        if not terms:
+            return None
+
+        query = cls._default_query(context)
+        query['$text'] = {'$search': terms}
+
+        return query
+
+    @staticmethod
+    def _prefix_range(prefix: str) -> dict:
+        return {'$gte': prefix, '$lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+    @classmethod
+    def _is_exact_search_match(cls, db_document: dict, search: str) -> bool:
+        return (
+            db_document['id'] == search.upper()
+            or db_document.get('search_name') == cls._search_name(search)
+        )
+
+    @staticmethod
+    def _search_name(name: str) -> str:
+        return get_search_name(name)
+
+    @classmethod
+    def _changes_query(
+        cls,
+        context: Context,
+        since: Optional[str] = None,
+        until: Optional[datetime] = None,
+    ) -> dict:
+        query = {} if is_admin_context(context) else {'account_id': context.account_id}
+
+        if until:
+            query['updated_at'] = {'$lte': until}
+
+        if since:
+            updated_at, db_id = cls._decode_changes_token(since)
+            query['$or'] = [
+                {'updated_at': {'$gt': updated_at}},
+                {'updated_at': updated_at, 'id': {'$gt': db_id}},
+            ]
+
+        return query
+
+    @classmethod
+    def _db_document_repr(cls, db_document: dict) -> dict:
         document = copy(db_document)
         document['owner'] = {'id': document.get('account_id')}
 
@@ -310,23 +814,27 @@ class DB:
         if case:
             document['case'] = case
 
-        status = document.get('status')
-        credentials = db_document.get('credentials')
-        if credentials:
-            if (not config) or (status not in (DBStatus.ACTIVE, DBStatus.RECONFIGURING)):
-                del document['credentials']
-
-            else:
-                document['credentials'] = cls._decrypt_dict(document['credentials'], config)
+        document['credentials_available'] = cls._credentials_available(db_document)
+        document.pop('credentials', None)
+        document.pop('search_name', None)
+        document.pop('score', None)
 
         return document
 
+    @classmethod
+    def _credentials_available(cls, db_document: dict) -> bool:
+        return bool(db_document.get('credentials')) and db_document.get('status') in (
+            DBStatus.ACTIVE,
+            DBStatus.RECONFIGURING,
+        )
+
     @classmethod
     def _get_last_db_document_case(cls, db_document: dict) -> Optional[dict]:
         cases = db_document.get('cases')
         return cases[-1] if cases else None
 
     @classmethod
+    @traced()
     async def _get_validated_region_document(
         cls,
         data: dict,
@@ -340,6 +848,7 @@ class DB:
         return region_doc
 
     @classmethod
+    @traced()
     async def _get_validated_tech_contact(
         cls,
         data: dict,
@@ -356,11 +865,13 @@ class DB:
         return tech_contact
 
     @classmethod
+    @traced()
     async def _validate_allowed_db_number_per_account(
         cls,
         db: AsyncIOMotorDatabase,
         context: Context,
         config: dict,
+        number: int = 1,
     ):
         if is_admin_context(context):
             return
@@ -369,12 +880,13 @@ class DB:
 
         db_coll = db[cls.COLLECTION]
         current_number_of_db = await db_coll.count_documents(cls._default_query(context))
-        if current_number_of_db + 1 > max_allowed_number_of_db:
+        if current_number_of_db + number > max_allowed_number_of_db:
             raise ValueError(
                 f'Max allowed number of databases is reached: {max_allowed_number_of_db}.',
             )
 
     @classmethod
+    @traced()
     async def _get_actor(cls, context: Context, client: AsyncConnectClient) -> dict:
         actor = await ConnectAccountUser.retrieve(context.account_id, context.user_id, client)
 
@@ -390,9 +902,11 @@ class DB:
         actor: dict,
     ) -> dict:
         db_document = copy(data)
+        db_document['search_name'] = cls._search_name(data['name'])
         db_document['account_id'] = context.account_id
         db_document['status'] = DBStatus.REVIEWING
         db_document['events'] = {'created': cls._prepare_event(actor)}
+        db_document['updated_at'] = cls._prepare_updated_at()
         db_document['region'] = {
             'id': region_doc['id'],
             'name': region_doc['name'],
@@ -402,6 +916,7 @@ class DB:
         return db_document
 
     @classmethod
+    @traced()
     async def _create_db_document(
         cls,
         db_document: dict,
@@ -413,31 +928,38 @@ class DB:
         installation = await ConnectInstallation.retrieve(context.installation_id, client)
 
         async with await db.client.start_session() as db_session:
-            async with db_session.start_transaction():
-                db_document = await cls._create_db_document_in_db(
-                    db_document, db_session, config, client.logger,
-                )
-
-                helpdesk_case = await ConnectHelpdeskCase.create_from_db_document(
-                    db_document,
-                    action=DBAction.CREATE,
-                    description=db_document['description'],
-                    installation=installation,
-                    client=client,
-                )
-
-                db_document['cases'] = [cls._prepare_helpdesk_case(helpdesk_case)]
-
-                db_coll = cls._db_collection_from_db_session(db_session, config)
-                await db_coll.update_one(
-                    {'id': db_document['id']},
-                    {'$set': {'cases': db_document['cases']}},
-                    session=db_session,
-                )
-
-                return db_document
+            with start_span('DB.transaction'):
+                async with db_session.start_transaction():
+                    db_document = await cls._create_db_document_in_db(
+                        db_document, db_session, config, client.logger,
+                    )
+
+                    helpdesk_case = await ConnectHelpdeskCase.create_from_db_document(
+                        db_document,
+                        action=DBAction.CREATE,
+                        description=db_document['description'],
+                        installation=installation,
+                        client=client,
+                    )
+
+                    db_document['cases'] = [cls._prepare_helpdesk_case(helpdesk_case)]
+                    db_document['updated_at'] = cls._prepare_updated_at()
+
+                    db_coll = cls._db_collection_from_db_session(db_session, config)
+                    await db_coll.update_one(
+                        {'id': db_document['id']},
+                        {'$set': {
+                            'cases': db_document['cases'],
+                            'updated_at': db_document['updated_at'],
+                        }},
+                        session=db_session,
+                    )
+                    await DBStats.record_change(db, None, db_document, session=db_session)
+
+                    return db_document
 
     @classmethod
+    @traced()
     async def _create_db_document_in_db(
         cls,
         db_document: dict,
@@ -468,6 +990,63 @@ class DB:
 
         return db_document
 
+    @classmethod
+    @traced()
+    async def _insert_db_documents(
+        cls,
+        db_documents: dict,
+        db: AsyncIOMotorDatabase,
+        config: dict,
+        logger: RequestLogger,
+    ) -> dict:
+        """
+        Inserts `db_documents` (item number to document) with `insert_many`, regenerating the IDs
+        that collide. Returns the results of the items that could not be inserted.
+        """
+        results = {}
+        db_coll = db[cls.COLLECTION]
+        pending = dict(db_documents)
+        db_ids = set()
+
+        for iteration in range(cls.MAX_ID_GENERATION_RETRIES):
+            if not pending:
+                break
+
+            if iteration:
+                logger.logger.warning('ID regeneration attempt %d...', iteration)
+
+            for db_document in pending.values():
+                db_document['id'] = cls._generate_id(config)
+                while db_document['id'] in db_ids:
+                    db_document['id'] = cls._generate_id(config)
+                db_ids.add(db_document['id'])
+
+            numbers = list(pending)
+            try:
+                await db_coll.insert_many(list(pending.values()), ordered=False)
+                pending = {}
+
+            except BulkWriteError as e:
+                failed = {}
+                for error in e.details['writeErrors']:
+                    n = numbers[error['index']]
+                    if error['code'] == 11000:
+                        failed[n] = pending[n]
+                    else:
+                        logger.logger.error('DB writing error: %s', error)
+                        results[n] = cls._bulk_create_result(503, message='DB writing error.')
+                pending = failed
+
+            except OperationFailure:
+                logger.logger.exception('DB writing error.')
+                raise ClientError(status_code=503)
+
+        results.update({
+            n: cls._bulk_create_result(400, message='ID generation error.') for n in pending
+        })
+
+        return results
+
     @classmethod
     def _db_collection_from_db_session(cls, db_session, config):
         return db_session.client[config[DBEnvVar.DB]][cls.COLLECTION]
@@ -506,35 +1085,59 @@ class DB:
 
         return result
 
+    @staticmethod
+    def _prepare_updated_at() -> datetime:
+        return datetime.now(tz=timezone.utc)
+
+    @staticmethod
+    def _encode_changes_token(updated_at: datetime, db_id: str) -> str:
+        if not updated_at.tzinfo:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+
+        updated_at_ms = (updated_at - _EPOCH) // timedelta(milliseconds=1)
+        token = f'{updated_at_ms}:{db_id}'.encode()
+
+        return base64.urlsafe_b64encode(token).decode()
+
+    @staticmethod
+    def _decode_changes_token(token: str) -> Tuple[datetime, str]:
+        try:
+            updated_at_ms, db_id = base64.urlsafe_b64decode(token.encode()).decode().split(':', 1)
+            updated_at = _EPOCH + timedelta(milliseconds=int(updated_at_ms))
+
+        except ValueError:
+            raise ValueError('Invalid changes token.')
+
+        return updated_at, db_id
+
     @classmethod
     def _decrypt_dict(cls, value: bytes, config: dict):
-        decrypted_byte_value = Fernet(cls._crypto_key(config)).decrypt(value)
+        decrypted_byte_value = get_key_ring(config).decrypt(value)
 
         return bson.decode(decrypted_byte_value)
 
     @classmethod
     def _encrypt_dict(cls, value, config: dict):
         byte_value = bson.encode(value)
-        encrypted_byte_value = Fernet(cls._crypto_key(config)).encrypt(byte_value)
+        encrypted_byte_value = get_key_ring(config).encrypt(byte_value)
 
         return encrypted_byte_value
 
-    @staticmethod
-    def _crypto_key(config: dict):
-        return bytes.fromhex(config[DBEnvVar.ENCRYPTION_KEY])
-
 
 class Region:
     COLLECTION = Collections.REGION
+    LIST_SORT = [('name', pymongo.ASCENDING)]
 
     @classmethod
-    async def list(cls, db: AsyncIOMotorDatabase) -> list[dict]:
+    @traced()
+    async def list(cls, db: AsyncIOMotorDatabase) -> List[dict]:
         region_coll = db[cls.COLLECTION]
-        results = await region_coll.find().sort('name').to_list(length=20)
+        results = await region_coll.find().sort(cls.LIST_SORT).to_list(length=20)
 
         return results
 
     @classmethod
+    @traced()
     async def retrieve(cls, region_id: str, db: AsyncIOMotorDatabase) -> Optional[dict]:
         region_coll = db[cls.COLLECTION]
         region_document = await region_coll.find_one({'id': region_id})
@@ -542,6 +1145,18 @@ class Region:
         return region_document
 
     @classmethod
+    @traced()
+    async def retrieve_many(cls, region_ids: List[str], db: AsyncIOMotorDatabase) -> dict:
+        """ Maps the existing of `region_ids` to their documents. """
+        region_coll = db[cls.COLLECTION]
+        region_documents = await region_coll.find({'id': {'$in': region_ids}}).to_list(
+            length=None,
+        )
+
+        return {region_document['id']: region_document for region_document in region_documents}
+
+    @classmethod
+    @traced()
     async def create(cls, data: dict, db: AsyncIOMotorDatabase) -> dict:
         region_coll = db[cls.COLLECTION]
         try:
@@ -553,7 +1168,10 @@ class Region:
 
 
 class ConnectAccountUser:
+    RETRIEVE_CONCURRENCY = 5
+
     @classmethod
+    @traced()
     async def retrieve(
         cls,
         account_id: str,
@@ -564,9 +1182,29 @@ class ConnectAccountUser:
 
         return user
 
+    @classmethod
+    async def retrieve_many(
+        cls,
+        account_id: str,
+        user_ids: List[str],
+        client: AsyncConnectClient,
+    ) -> dict:
+        """
+        Maps `user_ids` to the users or to the errors of their retrieval, with at most
+        `RETRIEVE_CONCURRENCY` requests at a time.
+        """
+        users = await gather_bounded(
+            (cls.retrieve(account_id, user_id, client) for user_id in user_ids),
+            cls.RETRIEVE_CONCURRENCY,
+            return_exceptions=True,
+        )
+
+        return dict(zip(user_ids, users))
+
 
 class ConnectInstallation:
     @classmethod
+    @traced()
     async def retrieve(cls, installation_id: str, client: AsyncConnectClient) -> dict:
         installation = await get_installation(
             client, x_connect_installation_id=installation_id,
@@ -587,6 +1225,8 @@ class ConnectInstallation:
 class ConnectHelpdeskCase:
     HIGH_PRIORITY = 2
     TECHNICAL_TYPE = 'technical'
+    CREATE_CONCURRENCY = 5
+    RESOLVE_CONCURRENCY = 5
 
     @classmethod
     async def create_from_db_document(
@@ -636,6 +1276,7 @@ class ConnectHelpdeskCase:
         return helpdesk_case
 
     @classmethod
+    @traced()
     async def create(
         cls,
         data: dict,
@@ -646,6 +1287,15 @@ class ConnectHelpdeskCase:
         return helpdesk_case
 
     @classmethod
+    async def resolve_many(cls, case_ids: List[str], client: AsyncConnectClient):
+        """ Resolves cases with at most `RESOLVE_CONCURRENCY` requests at a time. """
+        await gather_bounded(
+            (cls.resolve(case_id, client) for case_id in case_ids),
+            cls.RESOLVE_CONCURRENCY,
+        )
+
+    @classmethod
+    @traced()
     async def resolve(cls, case_id: str, client: AsyncConnectClient):
         try:
             await client('helpdesk').cases[case_id]('resolve').post()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+
+from pymongo import MongoClient, monitoring
+
+from dbaas.metrics import REGISTRY
+
+
+_logger = logging.getLogger(__name__)
+
+MONGO_SLOW_COMMANDS = REGISTRY.counter(
+    'dbaas_mongo_slow_commands_total',
+    'Number of MongoDB commands slower than the slow query threshold.',
+    ('command', 'collection'),
+)
+
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dbaas-explain')
+
+# Shared by all listeners, so shapes are explained at most once per interval in the process
+# however many clients are created.
+_explained_at = {}
+_explained_at_lock = threading.Lock()
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Logs commands on the given collections that take longer than `threshold` seconds,
+    together with the shape of their filter, sort and pipeline. Values are replaced by `?`,
+    so the log never contains tenant data.
+
+    With `explain` enabled the winning plan of a slow command is fetched in the background
+    (at most once per `EXPLAIN_INTERVAL` seconds for the same shape in the process) and logged
+    as a chain of plan stages, e.g. `FETCH > IXSCAN(id_1)` or `SORT > COLLSCAN`.
+    """
+
+    COMMANDS = ('find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify')
+    EXPLAINABLE_COMMANDS = ('find', 'aggregate', 'count', 'distinct', 'findAndModify')
+    IGNORED_FIELDS = (
+        'lsid', '$db', '$clusterTime', '$readPreference', 'txnNumber', 'autocommit',
+        'startTransaction', 'readConcern', 'writeConcern',
+    )
+    EXPLAIN_INTERVAL = 600
+    MAX_PENDING_COMMANDS = 1000
+
+    def __init__(self, collections: Sequence[str], threshold: float, explain: bool = False):
+        self.collections = tuple(collections)
+        self.threshold = threshold
+        self.explain = explain
+        self.client: Optional[MongoClient] = None
+
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def bind(self, client: MongoClient):
+        self.client = client
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name not in self.COMMANDS:
+            return
+
+        collection = event.command.get(event.command_name)
+        if collection not in self.collections:
+            return
+
+        with self._lock:
+            if len(self._pending) < self.MAX_PENDING_COMMANDS:
+                self._pending[(event.connection_id, event.request_id)] = (
+                    event.database_name,
+                    collection,
+                    event.command,
+                )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event)
+
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+
+        if not pending:
+            return
+
+        duration = event.duration_micros / 1e6
+        if duration < self.threshold:
+            return
+
+        database_name, collection, command = pending
+        shape = get_command_shape(event.command_name, command)
+
+        MONGO_SLOW_COMMANDS.inc(command=event.command_name, collection=collection)
+        _logger.warning(
+            'Slow MongoDB command %s on %s took %.1f ms: %s',
+            event.command_name,
+            collection,
+            duration * 1000,
+            shape,
+            extra={
+                'command': event.command_name,
+                'collection': collection,
+                'duration_ms': round(duration * 1000, 1),
+                'shape': shape,
+            },
+        )
+
+        if self._should_explain(event.command_name, collection, shape):
+            _explain_executor.submit(self._explain, database_name, collection, command)
+
+    def _should_explain(self, command_name: str, collection: str, shape: dict) -> bool:
+        if not (self.explain and self.client and command_name in self.EXPLAINABLE_COMMANDS):
+            return False
+
+        key = (command_name, collection, repr(shape))
+        now = time.monotonic()
+        with _explained_at_lock:
+            if now - _explained_at.get(key, -self.EXPLAIN_INTERVAL) < self.EXPLAIN_INTERVAL:
+                return False
+
+            _explained_at[key] = now
+            return True
+
+    def _explain(self, database_name: str, collection: str, command: dict):
+        explained_command = {
+            key: value for key, value in command.items()
+            if key not in self.IGNORED_FIELDS
+        }
+
+        try:
+            result = self.client[database_name].command(
+                'explain',
+                explained_command,
+                verbosity='queryPlanner',
+            )
+
+        except Exception as e:
+            _logger.warning('Failed to explain slow MongoDB command on %s: %s', collection, e)
+            return
+
+        plan = get_winning_plan_summary(result)
+        _logger.warning(
+            'Winning plan of slow MongoDB command on %s: %s',
+            collection,
+            plan,
+            extra={'collection': collection, 'plan': plan},
+        )
+
+
+def get_command_shape(command_name: str, command: dict) -> dict:
+    if command_name == 'find':
+        shape = {'filter': redact(command.get('filter', {}))}
+
+    elif command_name == 'aggregate':
+        shape = {'pipeline': [_redact_stage(stage) for stage in command.get('pipeline', [])]}
+
+    elif command_name in ('count', 'distinct', 'findAndModify'):
+        shape = {'filter': redact(command.get('query', {}))}
+
+    elif command_name == 'update':
+        shape = {'filter': [redact(update.get('q', {})) for update in command.get('updates', [])]}
+
+    else:
+        shape = {'filter': [redact(delete.get('q', {})) for delete in command.get('deletes', [])]}
+
+    if command.get('sort'):
+        shape['sort'] = dict(command['sort'])
+
+    return shape
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [redact(item) for item in value]
+
+        return ['?']
+
+    return '?'
+
+
+def _redact_stage(stage: dict) -> dict:
+    # Sort keys and directions are needed to pick an index and contain no data.
+    return {
+        key: dict(value) if key == '$sort' else redact(value)
+        for key, value in stage.items()
+    }
+
+
+def get_winning_plan_summary(explain_result: dict) -> str:
+    query_planner = explain_result.get('queryPlanner')
+    if not query_planner:
+        # Aggregations explain every stage, the first one holds the cursor of the query.
+        stages = explain_result.get('stages') or [{}]
+        query_planner = stages[0].get('$cursor', {}).get('queryPlanner', {})
+
+    stage = query_planner.get('winningPlan', {})
+    stage = stage.get('queryPlan', stage)
+
+    stages = []
+    while stage:
+        name = stage.get('stage', '?')
+        if stage.get('indexName'):
+            name += f"({stage['indexName']})"
+
+        stages.append(name)
+        stage = stage.get('inputStage') or (stage.get('inputStages') or [None])[0]
+
+    return ' > '.join(stages)
+
+
+def get_slow_query_listener(
+    config: dict,
+    collections: Sequence[str],
+) -> Optional[SlowQueryListener]:
+    threshold_ms = float(config.get('DB_SLOW_QUERY_THRESHOLD_MS', 100))
+    if threshold_ms <= 0:
+        return None
+
+    explain = str(config.get('DB_SLOW_QUERY_EXPLAIN', '')).lower() in ('1', 'true', 'yes')
+
+    return SlowQueryListener(collections, threshold_ms / 1000, explain=explain)
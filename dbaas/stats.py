@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from logging import LoggerAdapter
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import CollectionInvalid
+
+from dbaas.constants import DBStatus
+from dbaas.database import Collections, prepare_db, validate_db_configuration
+from dbaas.tracing import traced
+
+
+class DBStats:
+    """
+    Counts of databases per status, region, workload and account.
+
+    Every cell of the rollup counts the databases sharing all four dimensions, so the size of
+    the rollup doesn't depend on the number of databases. `DB` mutations move a database from
+    its old cell to the new one, and `rebuild` recounts all cells from the `db` collection.
+    """
+
+    COLLECTION = Collections.DB_STATS
+    SOURCE_COLLECTION = Collections.DB
+    DIMENSIONS = {
+        'status': '$status',
+        'region_id': '$region.id',
+        'workload': '$workload',
+        'account_id': '$account_id',
+    }
+
+    @classmethod
+    async def prepare(
+        cls,
+        db: AsyncIOMotorDatabase,
+        logger: LoggerAdapter,
+    ) -> AsyncIOMotorCollection:
+        try:
+            collection = await db.create_collection(cls.COLLECTION)
+            created = True
+
+        except CollectionInvalid:
+            logger.info('Collection %s already exists.', cls.COLLECTION)
+            collection = db[cls.COLLECTION]
+            created = False
+
+        await collection.create_index(
+            [(dimension, ASCENDING) for dimension in cls.DIMENSIONS],
+            unique=True,
+        )
+
+        if created:
+            await cls.rebuild(db)
+            logger.info('Collection %s is built.', cls.COLLECTION)
+
+        return collection
+
+    @classmethod
+    async def record_change(
+        cls,
+        db: AsyncIOMotorDatabase,
+        before: Optional[dict],
+        after: Optional[dict],
+        session=None,
+    ):
+        """
+        Moves a database from the cell of its `before` document to the cell of its `after`
+        document. `None` stands for a database that didn't exist before or doesn't exist after.
+        """
+        await cls.record_changes(db, [(before, after)], session=session)
+
+    @classmethod
+    async def record_changes(
+        cls,
+        db: AsyncIOMotorDatabase,
+        changes: list[tuple[Optional[dict], Optional[dict]]],
+        session=None,
+    ):
+        """ Records many `(before, after)` changes with a single write. """
+        deltas = {}
+        for before, after in changes:
+            for db_document, delta in ((before, -1), (after, 1)):
+                if db_document:
+                    cell = tuple(cls._cell(db_document).items())
+                    deltas[cell] = deltas.get(cell, 0) + delta
+
+        requests = [
+            UpdateOne(dict(cell), {'$inc': {'count': delta}}, upsert=delta > 0)
+            for cell, delta in deltas.items()
+            if delta
+        ]
+        if requests:
+            await db[cls.COLLECTION].bulk_write(requests, ordered=False, session=session)
+
+    @classmethod
+    @traced()
+    async def get(cls, db: AsyncIOMotorDatabase, filters: Optional[dict] = None) -> dict:
+        """
+        Sums the cells matching `filters` (dimension to value, `None` values are ignored) in
+        total and per value of every dimension.
+        """
+        query = {key: value for key, value in (filters or {}).items() if value is not None}
+        pipeline = [
+            {'$match': query},
+            {'$facet': {
+                'total': [{'$group': {'_id': None, 'count': {'$sum': '$count'}}}],
+                **{
+                    dimension: [{'$group': {'_id': f'${dimension}', 'count': {'$sum': '$count'}}}]
+                    for dimension in cls.DIMENSIONS
+                },
+            }},
+        ]
+
+        results = await db[cls.COLLECTION].aggregate(pipeline).to_list(length=1)
+        facets = results[0] if results else {}
+
+        total = facets.get('total')
+        stats = {'total': total[0]['count'] if total else 0}
+        for dimension in cls.DIMENSIONS:
+            stats[dimension] = {
+                group['_id']: group['count']
+                for group in sorted(facets.get(dimension, ()), key=lambda g: str(g['_id']))
+                if group['count'] and group['_id'] is not None
+            }
+
+        return stats
+
+    @classmethod
+    @traced()
+    async def rebuild(cls, db: AsyncIOMotorDatabase):
+        """
+        Recounts all cells from the `db` collection. The result replaces the rollup at once, but
+        mutations made while the aggregation runs may be counted twice or not at all, so rebuild
+        at a quiet time.
+        """
+        await db[cls.SOURCE_COLLECTION].aggregate(cls._rebuild_pipeline()).to_list(length=None)
+
+    @classmethod
+    def _rebuild_pipeline(cls) -> list[dict]:
+        return [
+            {'$group': {'_id': cls.DIMENSIONS, 'count': {'$sum': 1}}},
+            {'$project': {
+                '_id': 0,
+                'count': 1,
+                **{dimension: f'$_id.{dimension}' for dimension in cls.DIMENSIONS},
+            }},
+            {'$out': cls.COLLECTION},
+        ]
+
+    @staticmethod
+    def _cell(db_document: dict) -> dict:
+        return {
+            'status': db_document.get('status'),
+            'region_id': db_document.get('region', {}).get('id'),
+            'workload': db_document.get('workload'),
+            'account_id': db_document.get('account_id'),
+        }
+
+
+class LeadTimes:
+    """
+    Histograms of provisioning lead times per kind, region and workload.
+
+    A `create` lead time runs from `events.created.at` to the activation of a reviewing
+    database, a `reconfigure` lead time from `events.reconfigured.at` to the activation of a
+    reconfiguring one. Every activation increments one bucket of one histogram, so percentiles
+    are estimated from a fixed number of buckets instead of the databases themselves.
+    """
+
+    COLLECTION = Collections.LEAD_TIMES
+    SOURCE_COLLECTION = Collections.DB
+    CREATE = 'create'
+    RECONFIGURE = 'reconfigure'
+    KINDS = (CREATE, RECONFIGURE)
+    # Upper bounds of the buckets in seconds, from 5 minutes to 30 days; the last bucket is open.
+    BUCKETS = tuple(minutes * 60 for minutes in (
+        5, 15, 30, 60, 120, 240, 480, 720, 1440, 2880, 4320, 10080, 20160, 43200,
+    ))
+    PERCENTILES = (50, 90, 99)
+
+    @classmethod
+    async def prepare(
+        cls,
+        db: AsyncIOMotorDatabase,
+        logger: LoggerAdapter,
+    ) -> AsyncIOMotorCollection:
+        try:
+            collection = await db.create_collection(cls.COLLECTION)
+            created = True
+
+        except CollectionInvalid:
+            logger.info('Collection %s already exists.', cls.COLLECTION)
+            collection = db[cls.COLLECTION]
+            created = False
+
+        await collection.create_index(
+            [('kind', ASCENDING), ('region_id', ASCENDING), ('workload', ASCENDING)],
+            unique=True,
+        )
+
+        if created:
+            await cls.rebuild(db)
+            logger.info('Collection %s is built.', cls.COLLECTION)
+
+        return collection
+
+    @classmethod
+    async def record_activation(
+        cls,
+        db: AsyncIOMotorDatabase,
+        db_document: dict,
+        activated_at: datetime,
+    ):
+        """ Records the lead time of the activation of `db_document`, as it was before it. """
+        await cls.record_activations(db, [(db_document, activated_at)])
+
+    @classmethod
+    async def record_activations(
+        cls,
+        db: AsyncIOMotorDatabase,
+        activations: list[tuple[dict, datetime]],
+    ):
+        """ Records many `(db_document, activated_at)` activations with a single write. """
+        lead_times = {}
+        for db_document, activated_at in activations:
+            kind, started_at = cls._get_start(db_document)
+            if not started_at:
+                continue
+
+            key = tuple(cls._histogram_key(kind, db_document).items())
+            lead_time = (_as_utc(activated_at) - _as_utc(started_at)).total_seconds()
+            lead_times.setdefault(key, []).append(lead_time)
+
+        if lead_times:
+            await db[cls.COLLECTION].bulk_write(
+                [
+                    UpdateOne(dict(key), {'$inc': cls._histogram_increments(values)}, upsert=True)
+                    for key, values in lead_times.items()
+                ],
+                ordered=False,
+            )
+
+    @classmethod
+    @traced()
+    async def get(cls, db: AsyncIOMotorDatabase, filters: Optional[dict] = None) -> dict:
+        """
+        Percentiles of the lead times of every kind and the age of the reviewing backlog,
+        optionally filtered by `region_id` and `workload`.
+        """
+        query = {key: value for key, value in (filters or {}).items() if value is not None}
+        histograms = await db[cls.COLLECTION].find(query).to_list(length=None)
+
+        stats = {}
+        for kind in cls.KINDS:
+            counts = [0] * (len(cls.BUCKETS) + 1)
+            count = 0
+            sum_seconds = 0.0
+            for histogram in histograms:
+                if histogram['kind'] != kind:
+                    continue
+
+                count += histogram.get('count', 0)
+                sum_seconds += histogram.get('sum_seconds', 0.0)
+                for index, bucket_count in enumerate(cls._bucket_counts(histogram)):
+                    counts[index] += bucket_count
+
+            stats[kind] = {
+                'count': count,
+                'mean_seconds': sum_seconds / count if count else None,
+                'percentiles_seconds': {
+                    f'p{q}': cls._estimate_percentile(counts, q)
+                    for q in cls.PERCENTILES
+                } if count else {},
+            }
+
+        stats['backlog'] = await cls._get_backlog(db, query)
+
+        return stats
+
+    @classmethod
+    @traced()
+    async def rebuild(cls, db: AsyncIOMotorDatabase):
+        """
+        Recounts the histograms from the latest events of all databases. Only the last
+        activation of a database is known, so earlier lead times are lost.
+        """
+        cursor = db[cls.SOURCE_COLLECTION].find(
+            {'events.activated': {'$exists': True}},
+            projection={'_id': 0, 'region': 1, 'workload': 1, 'events': 1},
+        )
+
+        lead_times = {}
+        async for db_document in cursor:
+            events = db_document['events']
+            reconfigured = events.get('reconfigured')
+            if reconfigured:
+                if _as_utc(reconfigured['at']) > _as_utc(events['activated']['at']):
+                    continue
+
+                db_document = {**db_document, 'status': DBStatus.RECONFIGURING}
+
+            else:
+                db_document = {**db_document, 'status': DBStatus.REVIEWING}
+
+            kind, started_at = cls._get_start(db_document)
+            if not started_at:
+                continue
+
+            key = tuple(cls._histogram_key(kind, db_document).items())
+            lead_time = (
+                _as_utc(events['activated']['at']) - _as_utc(started_at)
+            ).total_seconds()
+            lead_times.setdefault(key, []).append(lead_time)
+
+        collection = db[cls.COLLECTION]
+        await collection.delete_many({})
+        if lead_times:
+            await collection.insert_many([
+                {**dict(key), **cls._histogram_increments(values)}
+                for key, values in lead_times.items()
+            ])
+
+    @classmethod
+    async def _get_backlog(cls, db: AsyncIOMotorDatabase, filters: dict) -> dict:
+        """
+        Ages of the reviewing databases are counted in the lead time buckets by the server, so
+        only a document per bucket is read however large the backlog is.
+        """
+        now = datetime.now(tz=timezone.utc)
+        buckets = await db[cls.SOURCE_COLLECTION].aggregate(
+            cls._backlog_pipeline(filters, now),
+        ).to_list(length=None)
+
+        # Buckets are identified by their lower bound, the open one by its default ID.
+        indexes = {bound: index for index, bound in enumerate((0, *cls.BUCKETS[:-1], 'inf'))}
+        counts = [0] * (len(cls.BUCKETS) + 1)
+        for bucket in buckets:
+            counts[indexes[bucket['_id']]] = bucket['count']
+
+        count = sum(counts)
+
+        return {
+            'count': count,
+            'oldest_age_seconds': max(
+                bucket['oldest_age_seconds'] for bucket in buckets
+            ) if count else None,
+            'percentiles_seconds': {
+                f'p{q}': cls._estimate_percentile(counts, q)
+                for q in cls.PERCENTILES
+            } if count else {},
+        }
+
+    @classmethod
+    def _backlog_pipeline(cls, filters: dict, now: datetime) -> list[dict]:
+        age_seconds = {'$divide': [{'$subtract': [now, '$events.created.at']}, 1000]}
+
+        return [
+            {'$match': cls._backlog_query(filters)},
+            {'$project': {'_id': 0, 'age_seconds': {'$max': [age_seconds, 0]}}},
+            {'$bucket': {
+                'groupBy': '$age_seconds',
+                'boundaries': [0, *cls.BUCKETS],
+                'default': 'inf',
+                'output': {
+                    'count': {'$sum': 1},
+                    'oldest_age_seconds': {'$max': '$age_seconds'},
+                },
+            }},
+        ]
+
+    @staticmethod
+    def _backlog_query(filters: dict) -> dict:
+        query = {'status': DBStatus.REVIEWING}
+        if filters.get('region_id'):
+            query['region.id'] = filters['region_id']
+        if filters.get('workload'):
+            query['workload'] = filters['workload']
+
+        return query
+
+    @classmethod
+    def _get_start(cls, db_document: dict) -> tuple[Optional[str], Optional[datetime]]:
+        events = db_document.get('events') or {}
+        status = db_document.get('status')
+
+        if status == DBStatus.REVIEWING:
+            kind, event = cls.CREATE, events.get('created')
+        elif status == DBStatus.RECONFIGURING:
+            kind, event = cls.RECONFIGURE, events.get('reconfigured')
+        else:
+            return None, None
+
+        return kind, (event or {}).get('at')
+
+    @staticmethod
+    def _histogram_key(kind: str, db_document: dict) -> dict:
+        return {
+            'kind': kind,
+            'region_id': db_document.get('region', {}).get('id'),
+            'workload': db_document.get('workload'),
+        }
+
+    @classmethod
+    def _histogram_increments(cls, lead_times: list[float]) -> dict:
+        increments = {'count': len(lead_times), 'sum_seconds': sum(lead_times)}
+        for lead_time in lead_times:
+            field = f'buckets.{cls._bucket_label(lead_time)}'
+            increments[field] = increments.get(field, 0) + 1
+
+        return increments
+
+    @classmethod
+    def _bucket_label(cls, lead_time: float) -> str:
+        for bound in cls.BUCKETS:
+            if lead_time <= bound:
+                return str(bound)
+
+        return 'inf'
+
+    @classmethod
+    def _bucket_counts(cls, histogram: dict) -> list[int]:
+        buckets = histogram.get('buckets') or {}
+
+        return [buckets.get(str(bound), 0) for bound in cls.BUCKETS] + [buckets.get('inf', 0)]
+
+    @classmethod
+    def _estimate_percentile(cls, counts: list[int], q: float) -> float:
+        """
+        Interpolates linearly within the bucket of the percentile. Lead times in the open
+        bucket are reported as its lower bound.
+        """
+        rank = q / 100 * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if index == len(cls.BUCKETS):
+                    break
+
+                lower = cls.BUCKETS[index - 1] if index else 0
+                upper = cls.BUCKETS[index]
+                return lower + (upper - lower) * (rank - seen) / count
+
+            seen += count
+
+        return float(cls.BUCKETS[-1])
+
+
+def _as_utc(value: datetime) -> datetime:
+    # MongoDB returns naive datetimes in UTC.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Rebuild the database statistics and lead times from the db collection.',
+    )
+    parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.LoggerAdapter(logging.getLogger('dbaas.stats'), {})
+
+    config = dict(os.environ)
+    validate_db_configuration(config)
+
+    async def rebuild():
+        db = await prepare_db(logger, config)
+        await DBStats.prepare(db, logger)
+        await DBStats.rebuild(db)
+        await LeadTimes.prepare(db, logger)
+        await LeadTimes.rebuild(db)
+        logger.info('Statistics are rebuilt.')
+
+    asyncio.run(rebuild())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
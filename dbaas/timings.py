@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+
+
+_logger = logging.getLogger(__name__)
+
+
+class TimingKind:
+    MONGO = 'mongo'
+    CONNECT = 'connect'
+    CRYPTO = 'crypto'
+    SERIALIZATION = 'serialization'
+
+    @classmethod
+    def all(cls):
+        return cls.MONGO, cls.CONNECT, cls.CRYPTO, cls.SERIALIZATION
+
+
+class RequestTimings:
+    """
+    Time spent and number of calls made per kind of work while serving a single request.
+    MongoDB commands are reported from driver threads, hence the lock.
+    """
+
+    COUNTED_UNITS = {
+        TimingKind.MONGO: 'commands',
+        TimingKind.CONNECT: 'calls',
+    }
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations = dict.fromkeys(TimingKind.all(), 0.0)
+        self.counts = dict.fromkeys(TimingKind.all(), 0)
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, duration: float):
+        with self._lock:
+            self.durations[kind] += duration
+            self.counts[kind] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self, total: float) -> str:
+        metrics = []
+        for kind in TimingKind.all():
+            metric = f'{kind};dur={self.durations[kind] * 1000:.1f}'
+            if kind in self.COUNTED_UNITS:
+                metric += f';desc="{self.counts[kind]} {self.COUNTED_UNITS[kind]}"'
+
+            metrics.append(metric)
+
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def summary(self, total: float) -> dict:
+        summary = {'total_ms': round(total * 1000, 1)}
+        for kind in TimingKind.all():
+            summary[f'{kind}_ms'] = round(self.durations[kind] * 1000, 1)
+            if kind in self.COUNTED_UNITS:
+                summary[f'{kind}_{self.COUNTED_UNITS[kind]}'] = self.counts[kind]
+
+        return summary
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    'request_timings',
+    default=None,
+)
+
+
+def get_request_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def record_timing(kind: str, duration: float):
+    timings = _request_timings.get()
+    if timings:
+        timings.add(kind, duration)
+
+
+@contextmanager
+def timed(kind: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+
+    finally:
+        record_timing(kind, time.perf_counter() - started_at)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with timed(TimingKind.SERIALIZATION):
+            return super().render(content)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware adding a `Server-Timing` header with the time spent in MongoDB, Connect API
+    calls, crypto and serialization to every response, and logging the same breakdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (b'server-timing', timings.server_timing(timings.elapsed()).encode('latin-1')),
+                ]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            _request_timings.reset(token)
+            self._log(scope, status_code, timings)
+
+    @staticmethod
+    def _log(scope, status_code: int, timings: RequestTimings):
+        summary = timings.summary(timings.elapsed())
+        route = getattr(scope.get('route'), 'path', scope['path'])
+
+        _logger.info(
+            '%s %s %s %s',
+            scope['method'],
+            route,
+            status_code,
+            ' '.join(f'{key}={value}' for key, value in summary.items()),
+            extra={
+                'method': scope['method'],
+                'route': route,
+                'status_code': status_code,
+                'timings': summary,
+            },
+        )
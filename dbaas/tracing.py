@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Optional
+
+from pymongo import monitoring
+
+from dbaas.json_lines import JsonLinesWriter
+
+
+class Span:
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'error',
+        'started_at', '_started_at_perf', 'duration',
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[dict] = None,
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.error = None
+        self.started_at = time.time()
+        self._started_at_perf = time.perf_counter()
+        self.duration = None
+
+    def finish(self, duration: Optional[float] = None):
+        if duration is None:
+            duration = time.perf_counter() - self._started_at_perf
+
+        self.duration = duration
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class JsonSpanExporter:
+    """
+    Writes every finished span as a line of JSON. Spans are queued and written in batches from
+    a background thread, see `JsonLinesWriter`.
+    """
+
+    def __init__(self, stream: IO[str], close_stream: bool = False):
+        self.stream = stream
+        self._writer = JsonLinesWriter(stream, close_stream, name='dbaas-span-exporter')
+
+    def export(self, span: Span):
+        self._writer.write(span.to_dict())
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+_exporter: Optional[JsonSpanExporter] = None
+
+
+def configure_tracing(config: dict):
+    """
+    `DB_TRACING_EXPORT` selects where spans are written: `stdout` or a path of a JSON lines
+    file. Tracing is disabled when the variable is empty.
+    """
+    global _exporter
+
+    if _exporter:
+        _exporter.close()
+
+    target = config.get('DB_TRACING_EXPORT')
+    if not target:
+        _exporter = None
+
+    elif target == 'stdout':
+        _exporter = JsonSpanExporter(sys.stdout)
+
+    else:
+        _exporter = JsonSpanExporter(open(target, 'a', encoding='utf-8'), close_stream=True)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _new_span(name: str, attributes: dict, trace_id: Optional[str] = None) -> Span:
+    parent = _current_span.get()
+    if parent:
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+
+    return Span(name, trace_id or os.urandom(16).hex(), attributes=attributes)
+
+
+def _export(span: Span):
+    exporter = _exporter
+    if exporter:
+        exporter.export(span)
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    """
+    Runs the block in a child span of the current one. Tasks created inside the block inherit
+    the span, as `asyncio.create_task` copies the current context.
+    """
+    if not _exporter:
+        yield None
+        return
+
+    span = _new_span(name, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+
+    except BaseException as e:
+        span.error = repr(e)
+        raise
+
+    finally:
+        _current_span.reset(token)
+        span.finish()
+        _export(span)
+
+
+def traced(name: Optional[str] = None):
+    """ Decorator running a coroutine function in its own span, named after the function. """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware running every HTTP request in a root span named after its route. A valid
+    W3C `traceparent` header continues the caller's trace.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not _exporter:
+            return await self.app(scope, receive, send)
+
+        span = _new_span(
+            f"{scope['method']} {scope['path']}",
+            {'http.method': scope['method'], 'http.path': scope['path']},
+            trace_id=self._parse_traceparent(scope),
+        )
+        token = _current_span.set(span)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                span.attributes['http.status_code'] = message['status']
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+
+        finally:
+            _current_span.reset(token)
+
+            route = getattr(scope.get('route'), 'path', None)
+            if route:
+                span.name = f"{scope['method']} {route}"
+                span.attributes['http.route'] = route
+
+            span.finish()
+            _export(span)
+
+    @staticmethod
+    def _parse_traceparent(scope) -> Optional[str]:
+        for key, value in scope.get('headers', []):
+            if key == b'traceparent':
+                parts = value.decode('latin-1').split('-')
+                if len(parts) == 4 and len(parts[1]) == 32:
+                    return parts[1]
+
+        return None
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Records every MongoDB command as a span. Motor runs the commands on its executor threads
+    with a copy of the caller's context, so the spans are attached to the caller's span.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if not _exporter:
+            return
+
+        collection = event.command.get(event.command_name)
+        span = _new_span(f'mongo.{event.command_name}', {
+            'db.name': event.database_name,
+            'db.collection': collection if isinstance(collection, str) else None,
+        })
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, error=event.failure)
+
+    def _finish(self, event, error=None):
+        with self._lock:
+            span = self._pending.pop((event.connection_id, event.request_id), None)
+
+        if span:
+            span.error = repr(error) if error else None
+            span.finish(event.duration_micros / 1e6)
+            _export(span)
+
+
+def render_waterfall(spans: list[dict], width: int = 40) -> str:
+    """ Renders spans of one trace as an indented waterfall, ordered by start time. """
+    spans = sorted(spans, key=lambda s: s['start'])
+    span_ids = {span['span_id'] for span in spans}
+    children = defaultdict(list)
+    for span in spans:
+        parent_id = span['parent_id'] if span['parent_id'] in span_ids else None
+        children[parent_id].append(span)
+
+    trace_start = spans[0]['start']
+    trace_end = max(span['start'] + span['duration_ms'] / 1000 for span in spans)
+    scale = width / max(trace_end - trace_start, 1e-6)
+
+    lines = []
+
+    def render(span: dict, depth: int):
+        offset = int((span['start'] - trace_start) * scale)
+        length = max(1, int(span['duration_ms'] / 1000 * scale))
+        bar = (' ' * offset + '#' * length).ljust(width)[:width]
+        error = ' !' if span.get('error') else ''
+        lines.append(f"|{bar}| {span['duration_ms']:9.1f} ms {'  ' * depth}{span['name']}{error}")
+
+        for child in children[span['span_id']]:
+            render(child, depth + 1)
+
+    for root in children[None]:
+        render(root, 0)
+
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[list] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(description='Render exported spans as waterfalls.')
+    parser.add_argument('path', help='JSON lines file written with DB_TRACING_EXPORT.')
+    parser.add_argument('--trace-id', help='Only render the given trace.')
+    args = parser.parse_args(argv)
+
+    traces = defaultdict(list)
+    with open(args.path, encoding='utf-8') as f:
+        for line in f:
+            span = json.loads(line)
+            if (not args.trace_id) or span['trace_id'] == args.trace_id:
+                traces[span['trace_id']].append(span)
+
+    for trace_id, spans in traces.items():
+        print(f'Trace {trace_id}')
+        print(render_waterfall(spans))
+        print()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
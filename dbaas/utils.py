@@ -3,6 +3,10 @@
 # Copyright (c) 2025, CloudBlue
 # All rights reserved.
 #
+import asyncio
+import time
+from collections import deque
+from typing import Any, Coroutine, Iterable
 
 from connect.eaas.core.inject.asynchronous import AsyncConnectClient, get_extension_client
 from connect.eaas.core.inject.common import get_call_context
@@ -10,22 +14,37 @@ from connect.eaas.core.inject.models import Context
 from fastapi import Depends
 
 from dbaas.constants import ContextCallTypes
+from dbaas.metrics import BACKGROUND_TASKS, get_connect_endpoint, observe_connect_call
+from dbaas.tracing import start_span
+
+
+_background_tasks = set()
+
+
+class ObservedAsyncConnectClient(AsyncConnectClient):
+    """ Connect client reporting every call to the metrics and as a tracing span. """
+
+    async def execute(self, method: str, path: str, **kwargs) -> Any:
+        with start_span(f'connect.{method.upper()} {get_connect_endpoint(path)}'):
+            with observe_connect_call(method, path):
+                return await super().execute(method, path, **kwargs)
 
 
 async def get_installation_client(
     context: Context = Depends(get_call_context),
     client: AsyncConnectClient = Depends(get_extension_client),
 ) -> AsyncConnectClient:
-    data = (
-        await client('devops')
+    impersonate = (
+        client('devops')
         .services[context.extension_id]
         # diff between this and connect.eaas.core.inject.asynchronous.get_installation_admin_client
         .installations[context.installation_id]
         .action('impersonate')
-        .post()
     )
+    with observe_connect_call('post', impersonate.path):
+        data = await impersonate.post()
 
-    return AsyncConnectClient(
+    return ObservedAsyncConnectClient(
         data['installation_api_key'],
         endpoint=client.endpoint,
         default_headers=client.default_headers,
@@ -33,5 +52,78 @@ async def get_installation_client(
     )
 
 
+def create_background_task(coro: Coroutine) -> asyncio.Task:
+    """
+    Schedules a fire-and-forget task. A reference is kept until the task is done, so it is not
+    garbage collected mid-flight, and the number of running tasks is exposed as a metric.
+    """
+    task = asyncio.create_task(coro)
+
+    _background_tasks.add(task)
+    BACKGROUND_TASKS.inc()
+    task.add_done_callback(_on_background_task_done)
+
+    return task
+
+
+def _on_background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    BACKGROUND_TASKS.dec()
+
+
+async def gather_bounded(
+    coros: Iterable[Coroutine],
+    limit: int,
+    return_exceptions: bool = False,
+) -> list:
+    """ Like `asyncio.gather`, with at most `limit` of `coros` running at a time. """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro: Coroutine) -> Any:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(
+        *(run(coro) for coro in coros),
+        return_exceptions=return_exceptions,
+    )
+
+
 def is_admin_context(context: Context) -> bool:
     return context.call_type == ContextCallTypes.ADMIN
+
+
+class RateLimiter:
+    """
+    Sliding window limiter of calls per key. The state is kept in process memory, so every
+    replica of the extension enforces the limit on its own.
+    """
+
+    MAX_TRACKED_KEYS = 10000
+
+    def __init__(self, period: float = 60):
+        self.period = period
+        self._calls: dict[str, deque] = {}
+
+    def allow(self, key: str, limit: int) -> bool:
+        if not limit:
+            return True
+
+        now = time.monotonic()
+        if len(self._calls) >= self.MAX_TRACKED_KEYS:
+            self._forget_expired(now)
+
+        calls = self._calls.setdefault(key, deque())
+        while calls and calls[0] <= now - self.period:
+            calls.popleft()
+
+        if len(calls) >= limit:
+            return False
+
+        calls.append(now)
+        return True
+
+    def _forget_expired(self, now: float):
+        for key, calls in list(self._calls.items()):
+            if (not calls) or calls[-1] <= now - self.period:
+                del self._calls[key]
@@ -4,6 +4,8 @@
 # All rights reserved.
 #
 
+import asyncio
+import hmac
 from logging import LoggerAdapter
 from typing import Optional
 
@@ -12,32 +14,55 @@ from connect.eaas.core.decorators import (
     devops_pages,
     proxied_connect_api,
     router,
+    unauthorized,
     web_app,
 )
 from connect.eaas.core.extension import WebApplicationBase
 from connect.eaas.core.inject.asynchronous import AsyncConnectClient
-from connect.eaas.core.inject.common import get_call_context, get_config
+from connect.eaas.core.inject.common import get_call_context, get_config, get_logger
 from connect.eaas.core.inject.models import Context
-from fastapi import Depends, Request, responses
+from fastapi import Depends, Header, Query, Request, responses
 from pydantic import BaseModel, constr
 
+from dbaas.crypto import get_key_ring
 from dbaas.database import DBException, get_db, prepare_db
+from dbaas.loop_monitor import start_loop_monitor
+from dbaas.memory import get_object_counts, get_snapshot_report, memory_snapshots
+from dbaas.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, REGISTRY
+from dbaas.profiler import profiles, ProfilingMiddleware
+from dbaas.recording import configure_recording, RecordingMiddleware
 from dbaas.schemas import (
     DatabaseActivate,
+    DatabaseBulkAction,
+    DatabaseBulkCreate,
+    DatabaseBulkCreateResult,
+    DatabaseBulkResult,
+    DatabaseChanges,
+    DatabaseCredentialsOut,
     DatabaseInCreate,
     DatabaseInUpdate,
+    DatabaseLeadTimes,
     DatabaseOutDetail,
     DatabaseOutList,
     DatabaseReconfigure,
+    DatabaseStats,
     JsonError,
+    MemoryObjectCounts,
+    MemorySnapshotOut,
+    MemoryTracingIn,
+    MemoryTracingOut,
     RegionIn,
     RegionOut,
 )
 from dbaas.services import DB, Region
-from dbaas.utils import get_installation_client, is_admin_context
+from dbaas.stats import DBStats, LeadTimes
+from dbaas.timings import TimedJSONResponse, TimingMiddleware
+from dbaas.tracing import configure_tracing, TracingMiddleware
+from dbaas.utils import get_installation_client, is_admin_context, RateLimiter
 
 
 _db_id_type = constr(strict=True, max_length=16)
+_credentials_rate_limiter = RateLimiter()
 
 
 async def na_exception_handler(request: Request, exc: Exception) -> responses.JSONResponse:
@@ -69,6 +94,24 @@ class DBaaSWebApplication(WebApplicationBase):
             DBException: na_exception_handler,
         }
 
+    @classmethod
+    def get_middlewares(cls):
+        return [
+            RecordingMiddleware,
+            MetricsMiddleware,
+            TimingMiddleware,
+            TracingMiddleware,
+            ProfilingMiddleware,
+        ]
+
+    @classmethod
+    def get_routers(cls):
+        routers = super().get_routers()
+        for api_router in routers:
+            api_router.default_response_class = TimedJSONResponse
+
+        return routers
+
     @router.get(
         '/v1/databases',
         summary='List all databases',
@@ -76,10 +119,17 @@ class DBaaSWebApplication(WebApplicationBase):
     )
     async def list_databases(
         self,
+        search: Optional[str] = Query(None, max_length=128),
+        limit: int = Query(DB.SEARCH_LIMIT, ge=1, le=100),
+        offset: int = Query(0, ge=0, le=1000),
         context: Context = Depends(get_call_context),
         db=Depends(get_db),
     ):
-        db_documents = await DB.list(db, context)
+        search = search.strip() if search else None
+        if search:
+            db_documents = await DB.search(db, context, search, limit=limit, offset=offset)
+        else:
+            db_documents = await DB.list(db, context)
 
         return [DatabaseOutList(**db_doc) for db_doc in db_documents]
 
@@ -107,6 +157,51 @@ class DBaaSWebApplication(WebApplicationBase):
 
         return DatabaseOutList(**db_document)
 
+    @router.post(
+        '/v1/databases/bulk-create',
+        summary='Create many databases',
+        response_model=list[DatabaseBulkCreateResult],
+    )
+    async def bulk_create_databases(
+        self,
+        data: DatabaseBulkCreate,
+        context: Context = Depends(get_call_context),
+        client: AsyncConnectClient = Depends(get_installation_client),
+        config: dict = Depends(get_config),
+        db=Depends(get_db),
+    ):
+        results = await DB.bulk_create(
+            [item.dict() for item in data.items],
+            db=db,
+            context=context,
+            client=client,
+            config=config,
+        )
+
+        return [DatabaseBulkCreateResult(**result) for result in results]
+
+    @router.get(
+        '/v1/databases/changes',
+        summary='List databases changed since the given token',
+        response_model=DatabaseChanges,
+        responses={400: {'model': JsonError}},
+    )
+    async def list_database_changes(
+        self,
+        since: Optional[str] = None,
+        context: Context = Depends(get_call_context),
+        db=Depends(get_db),
+    ):
+        try:
+            db_documents, next_token = await DB.changes(db, context, since=since)
+        except ValueError as e:
+            return self._service_logic_error_response(e)
+
+        return DatabaseChanges(
+            items=[DatabaseOutList(**db_doc) for db_doc in db_documents],
+            next=next_token,
+        )
+
     @router.get(
         '/v1/databases/{db_id}',
         summary='Retrieve database',
@@ -118,14 +213,47 @@ class DBaaSWebApplication(WebApplicationBase):
         db_id: _db_id_type,
         context: Context = Depends(get_call_context),
         db=Depends(get_db),
-        config: dict = Depends(get_config),
     ):
-        db_document = await DB.retrieve(db_id, db, context, config=config)
+        db_document = await DB.retrieve(db_id, db, context)
         if not db_document:
             return self._db_not_found_response()
 
         return DatabaseOutDetail(**db_document)
 
+    @router.get(
+        '/v1/databases/{db_id}/credentials',
+        summary='Retrieve database credentials',
+        response_model=DatabaseCredentialsOut,
+        responses={
+            404: {'model': JsonError},
+            429: {'model': JsonError},
+        },
+    )
+    async def retrieve_database_credentials(
+        self,
+        db_id: _db_id_type,
+        context: Context = Depends(get_call_context),
+        db=Depends(get_db),
+        config: dict = Depends(get_config),
+        logger: LoggerAdapter = Depends(get_logger),
+    ):
+        rate_limit = int(config.get('DB_CREDENTIALS_RATE_LIMIT', 30))
+        if not _credentials_rate_limiter.allow(context.user_id or context.account_id, rate_limit):
+            return self._too_many_requests_response()
+
+        credentials = await DB.retrieve_credentials(db_id, db, context, config)
+        if not credentials:
+            return self._credentials_not_found_response()
+
+        logger.info(
+            'Credentials of database %s are retrieved by user %s of account %s.',
+            db_id,
+            context.user_id,
+            context.account_id,
+        )
+
+        return DatabaseCredentialsOut(**credentials)
+
     @router.put(
         '/v1/databases/{db_id}',
         summary='Update database',
@@ -226,6 +354,34 @@ class DBaaSWebApplication(WebApplicationBase):
 
         return result
 
+    @router.post(
+        '/v1/databases/bulk-actions',
+        summary='Activate or delete many databases',
+        response_model=list[DatabaseBulkResult],
+        responses={403: {'model': JsonError}},
+    )
+    async def bulk_action_databases(
+        self,
+        data: DatabaseBulkAction,
+        context: Context = Depends(get_call_context),
+        config: dict = Depends(get_config),
+        client: AsyncConnectClient = Depends(get_installation_client),
+        db=Depends(get_db),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        results = await DB.bulk_action(
+            data.action,
+            [item.dict() for item in data.items],
+            db=db,
+            context=context,
+            config=config,
+            client=client,
+        )
+
+        return [DatabaseBulkResult(**result) for result in results]
+
     async def _action(
         self,
         db_id: _db_id_type,
@@ -259,6 +415,53 @@ class DBaaSWebApplication(WebApplicationBase):
 
         return DatabaseOutDetail(**updated_db_document)
 
+    @router.get(
+        '/v1/stats',
+        summary='Count databases by status, region, workload and account',
+        response_model=DatabaseStats,
+        responses={403: {'model': JsonError}},
+    )
+    async def get_stats(
+        self,
+        status: Optional[str] = None,
+        region_id: Optional[str] = None,
+        workload: Optional[str] = None,
+        account_id: Optional[str] = None,
+        context: Context = Depends(get_call_context),
+        db=Depends(get_db),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        stats = await DBStats.get(db, {
+            'status': status,
+            'region_id': region_id,
+            'workload': workload,
+            'account_id': account_id,
+        })
+
+        return DatabaseStats(**stats)
+
+    @router.get(
+        '/v1/stats/lead-times',
+        summary='Provisioning lead time percentiles and the age of the review backlog',
+        response_model=DatabaseLeadTimes,
+        responses={403: {'model': JsonError}},
+    )
+    async def get_lead_times(
+        self,
+        region_id: Optional[str] = None,
+        workload: Optional[str] = None,
+        context: Context = Depends(get_call_context),
+        db=Depends(get_db),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        lead_times = await LeadTimes.get(db, {'region_id': region_id, 'workload': workload})
+
+        return DatabaseLeadTimes(**lead_times)
+
     @router.get(
         '/v1/regions',
         summary='List all regions',
@@ -294,10 +497,149 @@ class DBaaSWebApplication(WebApplicationBase):
 
         return RegionOut(**region_document)
 
+    @router.get(
+        '/v1/metrics',
+        summary='Prometheus metrics',
+        response_class=responses.PlainTextResponse,
+        responses={403: {'model': JsonError}},
+    )
+    async def get_metrics(
+        self,
+        context: Context = Depends(get_call_context),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        return responses.PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @unauthorized()
+    @router.get(
+        '/v1/metrics/scrape',
+        summary='Prometheus metrics for scrapers',
+        response_class=responses.PlainTextResponse,
+        responses={403: {'model': JsonError}},
+    )
+    async def scrape_metrics(
+        self,
+        config: dict = Depends(get_config),
+        authorization: Optional[str] = Header(None),
+    ):
+        """
+        Same as `get_metrics` for Prometheus scrapers, which have no admin context: the request
+        is not authenticated by Connect, instead it must carry `DB_METRICS_TOKEN` as a bearer
+        token. Scraping is disabled while the variable is not set.
+        """
+        token = config.get('DB_METRICS_TOKEN')
+        if not token or not hmac.compare_digest(
+            (authorization or '').encode(),
+            f'Bearer {token}'.encode(),
+        ):
+            return self._permission_denied_response()
+
+        return responses.PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @router.get(
+        '/v1/profiles/{profile_id}',
+        summary='Retrieve request profile in the folded stacks format',
+        response_class=responses.PlainTextResponse,
+        responses={
+            403: {'model': JsonError},
+            404: {'model': JsonError},
+        },
+    )
+    async def retrieve_profile(
+        self,
+        profile_id: str,
+        context: Context = Depends(get_call_context),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        profile = profiles.get(profile_id)
+        if not profile:
+            return responses.JSONResponse({'message': 'Profile not found.'}, status_code=404)
+
+        return responses.PlainTextResponse(profile['folded'])
+
+    @router.put(
+        '/v1/memory/tracing',
+        summary='Start or stop tracing of memory allocations',
+        response_model=MemoryTracingOut,
+        responses={403: {'model': JsonError}},
+    )
+    async def update_memory_tracing(
+        self,
+        data: MemoryTracingIn,
+        context: Context = Depends(get_call_context),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        if data.enabled:
+            memory_snapshots.start(data.frames)
+        else:
+            memory_snapshots.stop()
+
+        current, peak = memory_snapshots.get_traced_memory()
+        return MemoryTracingOut(
+            enabled=memory_snapshots.is_tracing(),
+            current_bytes=current,
+            peak_bytes=peak,
+        )
+
+    @router.post(
+        '/v1/memory/snapshots',
+        summary='Take a snapshot of memory allocations and compare it with the previous one',
+        response_model=MemorySnapshotOut,
+        responses={
+            400: {'model': JsonError},
+            403: {'model': JsonError},
+        },
+        status_code=201,
+    )
+    async def create_memory_snapshot(
+        self,
+        limit: int = Query(20, ge=1, le=100),
+        context: Context = Depends(get_call_context),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        try:
+            # Snapshots of a big heap take a while, keep the event loop responsive meanwhile.
+            report = await asyncio.to_thread(get_snapshot_report, limit)
+        except ValueError as e:
+            return self._service_logic_error_response(e)
+
+        return MemorySnapshotOut(**report)
+
+    @router.get(
+        '/v1/memory/objects',
+        summary='Count live documents, pydantic models and MongoDB clients',
+        response_model=MemoryObjectCounts,
+        responses={403: {'model': JsonError}},
+    )
+    async def get_memory_objects(
+        self,
+        context: Context = Depends(get_call_context),
+    ):
+        if not is_admin_context(context):
+            return self._permission_denied_response()
+
+        return MemoryObjectCounts(**await asyncio.to_thread(get_object_counts))
+
     @staticmethod
     def _db_not_found_response():
         return responses.JSONResponse({'message': 'Database not found.'}, status_code=404)
 
+    @staticmethod
+    def _credentials_not_found_response():
+        return responses.JSONResponse({'message': 'Credentials not found.'}, status_code=404)
+
+    @staticmethod
+    def _too_many_requests_response():
+        return responses.JSONResponse({'message': 'Too many requests.'}, status_code=429)
+
     @staticmethod
     def _service_logic_error_response(e: ValueError):
         return responses.JSONResponse({'message': str(e)}, status_code=400)
@@ -308,4 +650,10 @@ class DBaaSWebApplication(WebApplicationBase):
 
     @classmethod
     async def on_startup(cls, logger: LoggerAdapter, config: dict):
-        await prepare_db(logger, config)
+        configure_tracing(config)
+        configure_recording(config)
+        start_loop_monitor(config)
+        get_key_ring(config)
+        db = await prepare_db(logger, config)
+        await DBStats.prepare(db, logger)
+        await LeadTimes.prepare(db, logger)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+from tests.benchmarks.harness import (
+    BenchmarkRunner,
+    compare,
+    load_baselines,
+    render_report,
+    save_baselines,
+)
+from tests.benchmarks.soak import render_samples, ResourceMonitor
+
+
+_runner = BenchmarkRunner()
+_monitors: dict[str, ResourceMonitor] = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    skips = {
+        marker: pytest.mark.skip(reason=f'{reason} run only with --{marker}.')
+        for marker, reason in (('benchmark', 'Benchmarks'), ('soak', 'Soak tests'))
+        if not config.getoption(f'--{marker}')
+    }
+
+    for item in items:
+        for marker, skip in skips.items():
+            if item.get_closest_marker(marker):
+                item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    for name, monitor in _monitors.items():
+        terminalreporter.section(f'soak {name}')
+        terminalreporter.write_line(render_samples(monitor.samples))
+
+    if not _runner.results:
+        return
+
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(render_report(compare(_runner.results, load_baselines())))
+
+    if config.getoption('--benchmark-save'):
+        save_baselines(_runner.results)
+        terminalreporter.write_line('Baselines are saved.')
+
+
+@pytest.fixture()
+def benchmark():
+    return _runner
+
+
+@pytest.fixture()
+def resource_monitor(request):
+    monitor = ResourceMonitor(request.config.getoption('--soak-interval'))
+    _monitors[request.node.name] = monitor
+
+    return monitor
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import gc
+import json
+import statistics
+import time
+from typing import Optional
+
+
+BASELINES_PATH = __file__.replace('harness.py', 'baselines.json')
+TOLERANCE = 0.25
+
+
+class BenchmarkResult:
+    def __init__(self, name: str, durations: list[float]):
+        self.name = name
+        self.rounds = len(durations)
+        self.min = min(durations)
+        self.median = statistics.median(durations)
+        self.mean = statistics.mean(durations)
+        self.stdev = statistics.stdev(durations) if len(durations) > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'rounds': self.rounds,
+            'min': self.min,
+            'median': self.median,
+            'mean': self.mean,
+            'stdev': self.stdev,
+        }
+
+
+class BenchmarkRunner:
+    """
+    Times a callable over `rounds` runs after `warmup` runs and collects the results of a test
+    session. The garbage collector is disabled while timing, so its pauses don't add noise.
+    """
+
+    DEFAULT_ROUNDS = 20
+    DEFAULT_WARMUP = 2
+
+    def __init__(self):
+        self.results: dict[str, BenchmarkResult] = {}
+
+    def __call__(
+        self,
+        name: str,
+        func,
+        *args,
+        rounds: int = DEFAULT_ROUNDS,
+        warmup: int = DEFAULT_WARMUP,
+        **kwargs,
+    ):
+        for _ in range(warmup):
+            func(*args, **kwargs)
+
+        durations = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                started_at = time.perf_counter()
+                result = func(*args, **kwargs)
+                durations.append(time.perf_counter() - started_at)
+
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self.results[name] = BenchmarkResult(name, durations)
+        return result
+
+    async def run_async(
+        self,
+        name: str,
+        func,
+        *args,
+        rounds: int = DEFAULT_ROUNDS,
+        warmup: int = DEFAULT_WARMUP,
+        **kwargs,
+    ):
+        for _ in range(warmup):
+            await func(*args, **kwargs)
+
+        durations = []
+        for _ in range(rounds):
+            started_at = time.perf_counter()
+            result = await func(*args, **kwargs)
+            durations.append(time.perf_counter() - started_at)
+
+        self.results[name] = BenchmarkResult(name, durations)
+        return result
+
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: dict[str, BenchmarkResult], path: str = BASELINES_PATH):
+    baselines = load_baselines(path)
+    baselines.update({name: result.to_dict() for name, result in results.items()})
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=2)
+        f.write('\n')
+
+
+def compare(
+    results: dict[str, BenchmarkResult],
+    baselines: dict,
+    tolerance: float = TOLERANCE,
+) -> list[dict]:
+    """ Compares medians of the results with the baselines. """
+    rows = []
+    for name, result in sorted(results.items()):
+        baseline: Optional[dict] = baselines.get(name)
+        row = {
+            'name': name,
+            'median': result.median,
+            'baseline': baseline['median'] if baseline else None,
+            'change': None,
+            'status': 'new',
+        }
+
+        if baseline:
+            row['change'] = result.median / baseline['median'] - 1
+            if row['change'] > tolerance:
+                row['status'] = 'REGRESSION'
+            elif row['change'] < -tolerance:
+                row['status'] = 'faster'
+            else:
+                row['status'] = 'ok'
+
+        rows.append(row)
+
+    return rows
+
+
+def render_report(rows: list[dict]) -> str:
+    width = max([len(row['name']) for row in rows] + [len('benchmark')])
+    lines = [
+        f"{'benchmark'.ljust(width)}  {'median ms':>10}  {'baseline ms':>11}  {'change':>8}  "
+        'status',
+    ]
+
+    for row in rows:
+        baseline = f"{row['baseline'] * 1000:11.3f}" if row['baseline'] else f"{'-':>11}"
+        change = f"{row['change']:+8.1%}" if row['change'] is not None else f"{'-':>8}"
+        lines.append(
+            f"{row['name'].ljust(width)}  {row['median'] * 1000:10.3f}  {baseline}  {change}  "
+            f"{row['status']}",
+        )
+
+    return '\n'.join(lines)
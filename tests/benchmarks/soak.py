@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import gc
+import os
+import time
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+
+PROC_SELF = '/proc/self'
+
+# Allowed growth of every resource after the warm-up: relative to the baseline, plus an
+# absolute slack for noise.
+GROWTH_LIMITS = {
+    'rss_bytes': (0.1, 16 * 1024 * 1024),
+    'fds': (0.0, 8),
+    'sockets': (0.0, 8),
+    'motor_clients': (0.0, 2),
+    'tasks': (0.0, 10),
+}
+
+
+def _count_fds() -> tuple[Optional[int], Optional[int]]:
+    fd_dir = os.path.join(PROC_SELF, 'fd')
+    if not os.path.isdir(fd_dir):
+        return None, None
+
+    fds = sockets = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            target = os.readlink(os.path.join(fd_dir, fd))
+        except OSError:
+            continue
+
+        fds += 1
+        if target.startswith('socket:'):
+            sockets += 1
+
+    return fds, sockets
+
+
+def _get_rss_bytes() -> Optional[int]:
+    try:
+        with open(os.path.join(PROC_SELF, 'statm'), encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    except OSError:
+        return None
+
+
+def _count_motor_clients() -> int:
+    # `type()` is used instead of `isinstance()`, which trips over lazy proxies overriding
+    # `__class__`.
+    return sum(1 for obj in gc.get_objects() if issubclass(type(obj), AsyncIOMotorClient))
+
+
+def sample_resources() -> dict:
+    """
+    Samples the resources of the process. Garbage is collected first, so only clients that
+    are still referenced are counted. Resources read from `/proc` are `None` on other systems.
+    """
+    gc.collect()
+    fds, sockets = _count_fds()
+
+    return {
+        'at': time.monotonic(),
+        'rss_bytes': _get_rss_bytes(),
+        'fds': fds,
+        'sockets': sockets,
+        'motor_clients': _count_motor_clients(),
+        'tasks': len(asyncio.all_tasks()),
+    }
+
+
+def find_leaks(
+    samples: list[dict],
+    warmup: float = 0.25,
+    limits: Optional[dict] = None,
+) -> list[str]:
+    """
+    Finds resources growing without bound. The first `warmup` share of the samples is skipped,
+    while caches and pools fill up. A resource leaks when its lowest value in the last quarter
+    of the samples exceeds its highest value in the first half of the rest by more than its
+    limit, so a sawtooth of garbage collections is not taken for a leak.
+    """
+    limits = limits or GROWTH_LIMITS
+    samples = samples[int(len(samples) * warmup):]
+    if len(samples) < 4:
+        return []
+
+    leaks = []
+    for resource, (relative, absolute) in limits.items():
+        values = [sample[resource] for sample in samples if sample.get(resource) is not None]
+        if len(values) < 4:
+            continue
+
+        baseline = max(values[:len(values) // 2])
+        final = min(values[-(len(values) // 4):])
+        allowed = baseline * (1 + relative) + absolute
+        if final > allowed:
+            leaks.append(f'{resource} grew from {baseline} to {final} (allowed {allowed:.0f})')
+
+    return leaks
+
+
+def render_samples(samples: list[dict], rows: int = 10) -> str:
+    """ A table of at most `rows` samples spread evenly over the run. """
+    if not samples:
+        return 'No samples.'
+
+    step = max(len(samples) // rows, 1)
+    shown = samples[::step]
+    if shown[-1] is not samples[-1]:
+        shown.append(samples[-1])
+
+    started_at = samples[0]['at']
+    lines = [
+        f"{'elapsed s':>10}  {'rss MiB':>9}  {'fds':>6}  {'sockets':>7}  {'motor':>6}  "
+        f"{'tasks':>6}",
+    ]
+    for sample in shown:
+        rss = sample['rss_bytes']
+        lines.append(
+            f"{sample['at'] - started_at:10.0f}  "
+            f"{rss / 1024 / 1024 if rss is not None else float('nan'):9.1f}  "
+            f"{_format_count(sample['fds']):>6}  {_format_count(sample['sockets']):>7}  "
+            f"{sample['motor_clients']:>6}  {sample['tasks']:>6}",
+        )
+
+    return '\n'.join(lines)
+
+
+def _format_count(value: Optional[int]) -> str:
+    return '-' if value is None else str(value)
+
+
+class ResourceMonitor:
+    """ Samples the resources of the process every `interval` seconds in the running loop. """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self.samples.append(sample_resources())
+
+    async def _run(self):
+        while True:
+            self.samples.append(sample_resources())
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+from bson import ObjectId
+
+from dbaas.constants import DBStatus
+from dbaas.database import Collections
+from dbaas.schemas import DatabaseOutDetail, DatabaseOutList
+from dbaas.services import DB
+
+from tests.factories import CaseFactory, DBFactory
+
+
+pytestmark = pytest.mark.benchmark
+
+DB_API = '/api/v1/databases'
+DOCUMENTS_NUMBER = 1000
+
+
+def _db_documents(number: int, **kwargs) -> list[dict]:
+    return [
+        {'_id': ObjectId(), **document}
+        for document in DBFactory.create_batch(
+            number,
+            status=DBStatus.ACTIVE,
+            cases=CaseFactory.create_batch(2),
+            **kwargs,
+        )
+    ]
+
+
+@pytest.fixture(scope='module')
+def db_documents():
+    return _db_documents(DOCUMENTS_NUMBER)
+
+
+@pytest.fixture(scope='module')
+def db_reprs(db_documents):
+    return [DB._db_document_repr(document) for document in db_documents]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('number', (100, DOCUMENTS_NUMBER))
+async def test_db_list(benchmark, db, admin_context, number):
+    await db[Collections.DB].insert_many(_db_documents(number, account_id='VA-000'))
+
+    results = await benchmark.run_async(
+        f'DB.list[{number}]',
+        DB.list,
+        db,
+        admin_context,
+        rounds=10,
+    )
+
+    assert len(results) == number
+
+
+def test_db_document_repr(benchmark, db_documents):
+    results = benchmark(
+        f'DB._db_document_repr[{DOCUMENTS_NUMBER}]',
+        lambda: [DB._db_document_repr(document) for document in db_documents],
+    )
+
+    assert all(result['credentials_available'] for result in results)
+    assert not any('credentials' in result for result in results)
+
+
+@pytest.mark.asyncio
+async def test_retrieve_credentials(benchmark, db, admin_context, config):
+    [document] = _db_documents(1, account_id='VA-000')
+    credentials = document['credentials']
+    document['credentials'] = DB._encrypt_dict(credentials, config)
+    await db[Collections.DB].insert_one(document)
+
+    result = await benchmark.run_async(
+        'DB.retrieve_credentials',
+        DB.retrieve_credentials,
+        document['id'],
+        db,
+        admin_context,
+        config,
+    )
+
+    assert result == credentials
+
+
+def test_encrypt_dict(benchmark, config, db_documents):
+    credentials = [document['credentials'] for document in db_documents[:100]]
+
+    results = benchmark(
+        'DB._encrypt_dict[100]',
+        lambda: [DB._encrypt_dict(value, config) for value in credentials],
+    )
+
+    assert len(results) == 100
+
+
+def test_decrypt_dict(benchmark, config, db_documents):
+    credentials = [document['credentials'] for document in db_documents[:100]]
+    encrypted = [DB._encrypt_dict(value, config) for value in credentials]
+
+    results = benchmark(
+        'DB._decrypt_dict[100]',
+        lambda: [DB._decrypt_dict(value, config) for value in encrypted],
+    )
+
+    assert results == credentials
+
+
+def test_database_out_list(benchmark, db_reprs):
+    results = benchmark(
+        f'DatabaseOutList[{DOCUMENTS_NUMBER}]',
+        lambda: [DatabaseOutList(**document) for document in db_reprs],
+    )
+
+    assert len(results) == DOCUMENTS_NUMBER
+
+
+def test_database_out_detail(benchmark, db_reprs):
+    results = benchmark(
+        f'DatabaseOutDetail[{DOCUMENTS_NUMBER}]',
+        lambda: [DatabaseOutDetail(**document) for document in db_reprs],
+    )
+
+    assert len(results) == DOCUMENTS_NUMBER
+
+
+def test_list_databases_route(benchmark, api_client, mocker, db_reprs):
+    mocker.patch('dbaas.webapp.DB.list', return_value=db_reprs)
+
+    response = benchmark(f'GET {DB_API}[{DOCUMENTS_NUMBER}]', api_client.get, DB_API, rounds=10)
+
+    assert response.status_code == 200
+    assert len(response.json()) == DOCUMENTS_NUMBER
+
+
+def test_retrieve_database_route(benchmark, api_client, mocker, db_reprs):
+    mocker.patch('dbaas.webapp.DB.retrieve', return_value=db_reprs[0])
+
+    response = benchmark(f'GET {DB_API}/{{db_id}}', api_client.get, f"{DB_API}/{db_reprs[0]['id']}")
+
+    assert response.status_code == 200
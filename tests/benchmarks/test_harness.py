@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+from tests.benchmarks.harness import (
+    BenchmarkResult,
+    BenchmarkRunner,
+    compare,
+    load_baselines,
+    render_report,
+    save_baselines,
+)
+
+
+def test_benchmark_runner():
+    runner = BenchmarkRunner()
+    calls = []
+
+    result = runner('bench', calls.append, 1, rounds=3, warmup=1)
+
+    assert result is None
+    assert len(calls) == 4
+    assert runner.results['bench'].rounds == 3
+
+
+@pytest.mark.asyncio
+async def test_benchmark_runner_async():
+    runner = BenchmarkRunner()
+
+    async def func(value):
+        return value
+
+    assert await runner.run_async('bench', func, 1, rounds=2) == 1
+    assert runner.results['bench'].rounds == 2
+
+
+def test_compare_and_render_report():
+    results = {
+        name: BenchmarkResult(name, [duration])
+        for name, duration in (('a', 0.002), ('b', 0.001), ('c', 0.0005), ('d', 0.001))
+    }
+    baselines = {'a': {'median': 0.001}, 'b': {'median': 0.001}, 'c': {'median': 0.001}}
+
+    rows = compare(results, baselines)
+
+    assert [(row['name'], row['status']) for row in rows] == [
+        ('a', 'REGRESSION'), ('b', 'ok'), ('c', 'faster'), ('d', 'new'),
+    ]
+    assert render_report(rows).splitlines()[1:] == [
+        'a               2.000        1.000   +100.0%  REGRESSION',
+        'b               1.000        1.000     +0.0%  ok',
+        'c               0.500        1.000    -50.0%  faster',
+        'd               1.000            -         -  new',
+    ]
+
+
+def test_save_baselines(tmp_path):
+    path = str(tmp_path / 'baselines.json')
+    assert load_baselines(path) == {}
+
+    save_baselines({'a': BenchmarkResult('a', [0.1, 0.3])}, path)
+    save_baselines({'b': BenchmarkResult('b', [0.2])}, path)
+
+    baselines = load_baselines(path)
+    assert set(baselines) == {'a', 'b'}
+    assert baselines['a']['median'] == pytest.approx(0.2)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import time
+
+import httpx
+import pytest
+from tests.benchmarks.soak import find_leaks
+
+from dbaas.fake_connect import FakeConnectApi
+from dbaas.loadtest import LoadTest, start_app
+from dbaas.seed import DatasetSeeder
+
+
+pytestmark = pytest.mark.soak
+
+# Creates run in transactions, which the standalone MongoDB of the tests doesn't support.
+# Reconfigurations cover Connect API calls and background case resolutions as well, and keep
+# the dataset size constant over the run.
+SOAK_WORKLOADS = ('list-heavy', 'reconfigure-storm')
+
+
+@pytest.mark.asyncio
+async def test_soak(request, config, logger, db, resource_monitor):
+    duration = request.config.getoption('--soak-duration')
+
+    seeder = DatasetSeeder(config, accounts=10, regions=3, seed=1)
+    await seeder.run(db, logger, documents=1000)
+
+    connect_api = FakeConnectApi(latency=0.01)
+    connect_api.start()
+    try:
+        app = await start_app(logger, config)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url='http://dbaas/api',
+        ) as client:
+            load_test = LoadTest(client, connect_api.url, config, seeder.accounts, seed=1)
+            await load_test.prepare()
+
+            resource_monitor.start()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                for workload in SOAK_WORKLOADS:
+                    await load_test.run(workload, requests=500, concurrency=20)
+
+            await resource_monitor.stop()
+
+    finally:
+        connect_api.stop()
+
+    leaks = find_leaks(resource_monitor.samples)
+    assert not leaks, 'Resources grow without bound:\n' + '\n'.join(leaks)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import os
+import socket
+
+import pytest
+from tests.benchmarks.soak import (
+    find_leaks,
+    render_samples,
+    ResourceMonitor,
+    sample_resources,
+)
+
+from dbaas.database import get_db
+
+
+def _samples(resource: str, values: list) -> list[dict]:
+    return [{'at': float(n), resource: value} for n, value in enumerate(values)]
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='Requires /proc.')
+@pytest.mark.asyncio
+async def test_sample_resources(config, patch_connection_string):
+    before = sample_resources()
+    sock = socket.socket()
+    db = get_db(config)
+
+    after = sample_resources()
+
+    assert after['rss_bytes'] > 0
+    assert after['fds'] == before['fds'] + 1
+    assert after['sockets'] == before['sockets'] + 1
+    assert after['motor_clients'] == before['motor_clients'] + 1
+    assert after['tasks'] >= 1
+
+    sock.close()
+    db.client.close()
+
+
+def test_sample_resources_without_proc(mocker):
+    mocker.patch('tests.benchmarks.soak.PROC_SELF', '/nonexistent')
+    mocker.patch('tests.benchmarks.soak.asyncio.all_tasks', return_value=set())
+
+    sample = sample_resources()
+
+    assert sample['rss_bytes'] is None
+    assert sample['fds'] is None
+    assert sample['sockets'] is None
+    assert sample['tasks'] == 0
+
+
+@pytest.mark.parametrize('values, leaking', (
+    ([10] * 20, False),
+    ([10, 12, 11, 13, 10, 12, 11, 13, 10, 12, 11, 13, 10, 12, 11, 13], False),
+    ([100, 200] + [10] * 18, False),
+    (list(range(10, 30)), True),
+    ([10] * 12 + [30] * 8, True),
+    ([10] * 3, False),
+))
+def test_find_leaks(values, leaking):
+    leaks = find_leaks(_samples('fds', values), limits={'fds': (0.0, 4)})
+
+    assert bool(leaks) is leaking
+    if leaking:
+        assert leaks[0].startswith('fds grew from ')
+
+
+@pytest.mark.parametrize('final_mib, leaking', ((120, False), (150, True)))
+def test_find_leaks_relative_limit(final_mib, leaking):
+    mib = 1024 * 1024
+    rss = [100 * mib] * 12 + [final_mib * mib] * 8
+
+    assert bool(find_leaks(_samples('rss_bytes', rss))) is leaking
+
+
+def test_find_leaks_skips_missing_resources():
+    assert find_leaks(_samples('fds', [None] * 20), limits={'fds': (0.0, 0)}) == []
+
+
+def test_render_samples():
+    samples = [
+        {
+            'at': 100.0 + n,
+            'rss_bytes': 1024 * 1024 * (n + 1),
+            'fds': n,
+            'sockets': None,
+            'motor_clients': 1,
+            'tasks': 2,
+        }
+        for n in range(25)
+    ]
+
+    lines = render_samples(samples, rows=5).splitlines()
+
+    assert lines[0].split() == ['elapsed', 's', 'rss', 'MiB', 'fds', 'sockets', 'motor', 'tasks']
+    assert [line.split()[0] for line in lines[1:]] == ['0', '5', '10', '15', '20', '24']
+    assert lines[1].split() == ['0', '1.0', '0', '-', '1', '2']
+
+
+def test_render_samples_empty():
+    assert render_samples([]) == 'No samples.'
+
+
+@pytest.mark.asyncio
+async def test_resource_monitor(mocker):
+    sample = mocker.patch('tests.benchmarks.soak.sample_resources', side_effect=range(100))
+    monitor = ResourceMonitor(interval=0.01)
+
+    monitor.start()
+    await asyncio.sleep(0.035)
+    await monitor.stop()
+
+    assert monitor.samples == list(range(sample.call_count))
+    assert 3 <= len(monitor.samples) <= 6
@@ -11,11 +11,36 @@ from connect.eaas.core.inject.common import get_call_context, get_config
 from connect.eaas.core.inject.models import Context
 
 from dbaas.constants import ContextCallTypes
-from dbaas.database import Collections, DBEnvVar, get_db, prepare_db
+from dbaas.database import close_db_clients, Collections, DBEnvVar, get_db, prepare_db
+from dbaas.metrics import REGISTRY
+from dbaas.stats import DBStats, LeadTimes
 from dbaas.utils import get_installation_client
 from dbaas.webapp import DBaaSWebApplication
 
 from tests.constants import DB_DEP_MOCK, INSTALLATION_CLIENT_DEP_MOCK
+from tests.round_trips import RoundTrips
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark', action='store_true', help='Run benchmarks.')
+    parser.addoption(
+        '--benchmark-save',
+        action='store_true',
+        help='Store benchmark results as the new baselines.',
+    )
+    parser.addoption('--soak', action='store_true', help='Run soak tests.')
+    parser.addoption(
+        '--soak-duration',
+        type=float,
+        default=3600,
+        help='Duration of soak tests in seconds.',
+    )
+    parser.addoption(
+        '--soak-interval',
+        type=float,
+        default=30,
+        help='Interval of resource sampling in soak tests in seconds.',
+    )
 
 
 @pytest.fixture
@@ -54,6 +79,14 @@ def config():
     }
 
 
+@pytest.fixture(autouse=True)
+def db_clients():
+    # Motor clients are bound to the event loop of the test that created them.
+    close_db_clients()
+    yield
+    close_db_clients()
+
+
 @pytest.fixture()
 def patch_connection_string(mocker):
     mocker.patch(
@@ -63,12 +96,30 @@ def patch_connection_string(mocker):
 
 
 @pytest.fixture()
-async def db(logger, config, patch_connection_string):
-    db = await prepare_db(logger, config)
+def round_trips(mocker):
+    round_trips = RoundTrips()
+    round_trips.patch(mocker)
+
+    return round_trips
+
 
-    for collection in (Collections.DB, Collections.REGION):
+@pytest.fixture()
+async def db(logger, config, patch_connection_string, round_trips):
+    db = await prepare_db(logger, config)
+    await DBStats.prepare(db, logger)
+    await LeadTimes.prepare(db, logger)
+
+    for collection in (
+        Collections.DB,
+        Collections.REGION,
+        Collections.JOB,
+        Collections.DB_STATS,
+        Collections.LEAD_TIMES,
+    ):
         await db[collection].delete_many({})
 
+    round_trips.reset()
+
     return db
 
 
@@ -101,3 +152,20 @@ def admin_api_client(api_client, admin_context):
     api_client.app.dependency_overrides[get_call_context] = lambda: admin_context
 
     yield api_client
+
+
+@pytest.fixture()
+def metrics():
+    REGISTRY.clear()
+    yield REGISTRY
+    REGISTRY.clear()
+
+
+@pytest.fixture()
+def spans(mocker):
+    exporter = mocker.MagicMock()
+    exported = []
+    exporter.export.side_effect = lambda span: exported.append(span)
+    mocker.patch('dbaas.tracing._exporter', exporter)
+
+    return exported
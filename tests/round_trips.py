@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from connect.client import AsyncConnectClient
+from pymongo import monitoring
+
+from dbaas import database
+from dbaas.metrics import get_connect_endpoint
+
+
+class RoundTrips:
+    """
+    Counts MongoDB commands by name and Connect API requests by endpoint, so tests can assert
+    how many round trips an operation makes:
+
+        with round_trips.budget(mongo={'find': 1}, connect=0):
+            await DB.list(db, context)
+    """
+
+    def __init__(self):
+        self.mongo = Counter()
+        self.connect = []
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.mongo.clear()
+            self.connect.clear()
+
+    def add_mongo_command(self, command_name: str):
+        with self._lock:
+            self.mongo[command_name] += 1
+
+    def add_connect_request(self, method: str, path: str):
+        with self._lock:
+            self.connect.append(f'{method.upper()} {get_connect_endpoint(path)}')
+
+    @contextmanager
+    def budget(self, mongo: Optional[dict] = None, connect: Optional[int] = None):
+        self.reset()
+        yield self
+        self.assert_budget(mongo=mongo, connect=connect)
+
+    def assert_budget(self, mongo: Optional[dict] = None, connect: Optional[int] = None):
+        """
+        `mongo` maps command names to the max number of commands, commands missing in it are not
+        allowed at all. `connect` is the max number of Connect API requests.
+        """
+        if mongo is not None:
+            over_budget = {
+                command_name: count
+                for command_name, count in self.mongo.items()
+                if count > mongo.get(command_name, 0)
+            }
+            assert not over_budget, (
+                f'MongoDB commands over budget {mongo}: {dict(self.mongo)}'
+            )
+
+        if connect is not None:
+            assert len(self.connect) <= connect, (
+                f'Connect API requests over budget of {connect}: {self.connect}'
+            )
+
+    def patch(self, mocker):
+        """
+        Counts commands of MongoDB clients created by `dbaas.database.get_db` and requests of
+        every `AsyncConnectClient`, including the ones answered by `async_client_mocker`.
+        """
+        get_mongo_event_listeners = database.get_mongo_event_listeners
+        mocker.patch(
+            'dbaas.database.get_mongo_event_listeners',
+            side_effect=lambda: [*get_mongo_event_listeners(), MongoCommandCounter(self)],
+        )
+
+        execute = AsyncConnectClient.execute
+
+        async def counted_execute(client, method, path, **kwargs):
+            self.add_connect_request(method, path)
+            return await execute(client, method, path, **kwargs)
+
+        mocker.patch.object(AsyncConnectClient, 'execute', counted_execute)
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    def __init__(self, round_trips: RoundTrips):
+        self.round_trips = round_trips
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self.round_trips.add_mongo_command(event.command_name)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        pass
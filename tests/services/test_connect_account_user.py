@@ -32,3 +32,18 @@ async def test_retrieve_ok(async_client_mocker, async_connect_client):
     result = await ConnectAccountUser.retrieve('PA-123', user['id'], async_connect_client)
 
     assert result == user
+
+
+@pytest.mark.asyncio
+async def test_retrieve_many(async_client_mocker, async_connect_client):
+    user = UserFactory()
+
+    async_client_mocker.accounts['PA-123'].users[user['id']].get(return_value=user)
+    async_client_mocker.accounts['PA-123'].users['UR-404'].get(status_code=404)
+
+    result = await ConnectAccountUser.retrieve_many(
+        'PA-123', [user['id'], 'UR-404'], async_connect_client,
+    )
+
+    assert result[user['id']] == user
+    assert isinstance(result['UR-404'], ClientError)
@@ -4,6 +4,7 @@
 # All rights reserved.
 #
 
+import asyncio
 from unittest.mock import AsyncMock
 
 import pytest
@@ -160,3 +161,25 @@ async def test_resolve_ok(async_client_mocker, async_connect_client):
     assert await ConnectHelpdeskCase.resolve('CS-456', async_connect_client) is None
 
     async_connect_client.logger.logger.warning.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_is_bounded(mocker):
+    running = []
+    peak = []
+
+    async def resolve(case_id, client):
+        running.append(case_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(case_id)
+
+    resolve_p = mocker.patch(
+        'dbaas.services.ConnectHelpdeskCase.resolve', AsyncMock(side_effect=resolve),
+    )
+    case_ids = [f'CS-{n}' for n in range(12)]
+
+    await ConnectHelpdeskCase.resolve_many(case_ids, 'client')
+
+    assert resolve_p.await_count == 12
+    assert max(peak) == ConnectHelpdeskCase.RESOLVE_CONCURRENCY
@@ -5,18 +5,19 @@
 #
 
 import re
-from datetime import datetime
-from unittest.mock import AsyncMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from connect.client import ClientError
 from connect.eaas.core.inject.models import Context
-from pymongo.errors import WriteError
+from pymongo.errors import BulkWriteError, OperationFailure, WriteError
 
-from dbaas.constants import DBAction, DBStatus, DBWorkload
+from dbaas.constants import ContextCallTypes, DBAction, DBStatus, DBWorkload
 from dbaas.database import Collections
 from dbaas.schemas import DatabaseInUpdate
 from dbaas.services import DB
+from dbaas.stats import DBStats, LeadTimes
 
 from tests.factories import CaseFactory, DBFactory, InstallationFactory, RegionFactory, UserFactory
 
@@ -41,53 +42,43 @@ async def test_list_no_account_dbs(db, admin_context):
     assert len(results) == 2
 
 
-@pytest.mark.parametrize('in_doc, out_doc', (
-    ({}, {}),
-    ({1: True, 'a': 'key'}, {1: True, 'a': 'key'}),
+@pytest.mark.parametrize('in_doc, out_doc, credentials_available', (
+    ({}, {}, False),
+    ({1: True, 'a': 'key'}, {1: True, 'a': 'key'}, False),
     (
         {'id': 'DB-1', 'cases': [], 'status': DBStatus.RECONFIGURING},
         {'id': 'DB-1', 'cases': [], 'status': DBStatus.RECONFIGURING},
+        False,
     ),
     (
         {'cases': [1], 'status': DBStatus.REVIEWING},
         {'cases': [1], 'case': 1, 'status': DBStatus.REVIEWING},
+        False,
     ),
-    ({'cases': [1, 2]}, {'cases': [1, 2], 'case': 2}),
-    ({'status': DBStatus.REVIEWING, 'credentials': 1}, {'status': DBStatus.REVIEWING}),
-    ({'status': DBStatus.REVIEWING, 'x': 2}, {'status': DBStatus.REVIEWING, 'x': 2}),
-    ({'status': DBStatus.ACTIVE, 'credentials': 2}, {'status': DBStatus.ACTIVE}),
+    ({'cases': [1, 2]}, {'cases': [1, 2], 'case': 2}, False),
+    ({'status': DBStatus.REVIEWING, 'credentials': 1}, {'status': DBStatus.REVIEWING}, False),
+    ({'status': DBStatus.REVIEWING, 'x': 2}, {'status': DBStatus.REVIEWING, 'x': 2}, False),
+    ({'status': DBStatus.ACTIVE, 'credentials': 2}, {'status': DBStatus.ACTIVE}, True),
     (
         {'status': DBStatus.RECONFIGURING, 'credentials': {1: True}},
         {'status': DBStatus.RECONFIGURING},
+        True,
     ),
+    ({'status': DBStatus.DELETED, 'credentials': 3}, {'status': DBStatus.DELETED}, False),
+    ({'name': 'DB', 'search_name': 'db', 'score': 1.5}, {'name': 'DB'}, False),
 ))
-def test__db_document_repr(in_doc, out_doc):
+def test__db_document_repr(in_doc, out_doc, credentials_available):
     result = DB._db_document_repr(in_doc)
     del result['owner']
 
+    assert result.pop('credentials_available') is credentials_available
     assert result == out_doc
 
 
-@pytest.mark.parametrize('in_doc, out_doc', (
-    ({}, {'owner': {'id': None}}),
-    ({1: True, 'a': 'key'}, {1: True, 'a': 'key', 'owner': {'id': None}}),
-    (
-        {
-            'status': DBStatus.ACTIVE,
-            'credentials': b'gAAAAABkEdPYFZffrdrEU5_jwzsBO-GstLDA2IYs8uAN7jGyQ4KRKw_'
-                           b'CoxytmSLMdTi_NQ49Oe15RWgVtkbEFM2PAZ4wQI9sLQ==',
-            'account_id': 'VA-123',
-        },
-        {
-            'status': DBStatus.ACTIVE,
-            'credentials': {'1': 1},
-            'account_id': 'VA-123',
-            'owner': {'id': 'VA-123'},
-        },
-    ),
-))
-def test__db_document_repr_with_config(in_doc, out_doc, config):
-    assert DB._db_document_repr(in_doc, config) == out_doc
+def test__db_document_repr_owner():
+    result = DB._db_document_repr({'account_id': 'VA-123'})
+
+    assert result['owner'] == {'id': 'VA-123'}
 
 
 @pytest.mark.asyncio
@@ -122,6 +113,275 @@ async def test_list_number_of_dbs_gt_than_cursor_length(db):
     assert len({r['id'] for r in results}) == 25
 
 
+@pytest.mark.asyncio
+async def test_list_round_trips(db, admin_context, round_trips):
+    await db[Collections.DB].insert_many(DBFactory.create_batch(size=25))
+
+    with round_trips.budget(mongo={'find': 1}, connect=0):
+        await DB.list(db, admin_context)
+
+
+def test__name_search_query(common_context):
+    assert DB._name_search_query(common_context, 'My DB') == {
+        'status': {'$ne': DBStatus.DELETED},
+        'account_id': common_context.account_id,
+        'search_name': {'$gte': 'my db', '$lt': 'my dc'},
+    }
+
+
+def test__id_search_query(admin_context):
+    assert DB._id_search_query(admin_context, 'dbpg-1') == {
+        'status': {'$ne': DBStatus.DELETED},
+        'id': {'$gte': 'DBPG-1', '$lt': 'DBPG-2'},
+    }
+
+
+@pytest.mark.parametrize('search, terms', (
+    ('backup storage', 'backup storage'),
+    ('-staging "eu west"', 'staging eu west'),
+    ('- " --', None),
+))
+def test__text_search_query(common_context, search, terms):
+    query = DB._text_search_query(common_context, search)
+
+    if terms:
+        assert query == {
+            'status': {'$ne': DBStatus.DELETED},
+            'account_id': common_context.account_id,
+            '$text': {'$search': terms},
+        }
+    else:
+        assert query is None
+
+
+def test__text_search_query_admin(admin_context):
+    assert DB._text_search_query(admin_context, 'backup') is None
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_matches(db, admin_context):
+    account_id = 'VA-001'
+    db_documents = [
+        DBFactory(id='DBPG-00001', name='Orders', description='Orders of the shop'),
+        DBFactory(id='DBPG-00002', name='Orders archive', description='Old orders'),
+        DBFactory(id='DBPG-00003', name='Shop', description='Products and orders'),
+        DBFactory(id='DBPG-00004', name='Users', description='Customers'),
+        DBFactory(id='DBPG-00005', name='Orders', status=DBStatus.DELETED),
+    ]
+    for db_document in db_documents:
+        db_document['account_id'] = account_id
+        db_document['search_name'] = db_document['name'].lower()
+    await db[Collections.DB].insert_many(db_documents)
+
+    context = Context(call_type=ContextCallTypes.USER, account_id=account_id)
+
+    results = await DB.search(db, context, 'ORDERS')
+
+    assert [result['id'] for result in results] == ['DBPG-00001', 'DBPG-00002', 'DBPG-00003']
+    assert 'search_name' not in results[0]
+    assert 'score' not in results[-1]
+
+    results = await DB.search(db, context, 'orders', limit=1, offset=1)
+
+    assert [result['id'] for result in results] == ['DBPG-00002']
+
+    results = await DB.search(db, context, 'dbpg-00004')
+
+    assert [result['id'] for result in results] == ['DBPG-00004']
+
+    results = await DB.search(db, admin_context, 'ORDERS')
+
+    assert [result['id'] for result in results] == ['DBPG-00001', 'DBPG-00002']
+
+
+@pytest.mark.asyncio
+async def test_search_is_account_scoped(db):
+    db_documents = [
+        DBFactory(name='Orders', account_id='VA-000'),
+        DBFactory(name='Orders', account_id='VA-001'),
+    ]
+    for db_document in db_documents:
+        db_document['search_name'] = db_document['name'].lower()
+    await db[Collections.DB].insert_many(db_documents)
+
+    context = Context(call_type=ContextCallTypes.USER, account_id='VA-001')
+
+    results = await DB.search(db, context, 'ord')
+
+    assert [result['id'] for result in results] == [db_documents[1]['id']]
+
+
+@pytest.mark.asyncio
+async def test_changes_collection_is_empty(db, admin_context):
+    results, next_token = await DB.changes(db, admin_context)
+
+    assert results == []
+    assert next_token is None
+
+
+@pytest.mark.asyncio
+async def test_changes_include_deleted_and_are_account_scoped(db, admin_context):
+    account_id = 'VA-321'
+    now = datetime(2025, 1, 1, 10)
+
+    db1 = DBFactory(id='DB-1', account_id=account_id, updated_at=now + timedelta(seconds=2))
+    deleted_db = DBFactory(
+        id='DB-2', account_id=account_id, status=DBStatus.DELETED, updated_at=now,
+    )
+    other_account_db = DBFactory(id='DB-3', updated_at=now + timedelta(seconds=1))
+    await db[Collections.DB].insert_many([db1, deleted_db, other_account_db])
+
+    results, _ = await DB.changes(db, Context(account_id=account_id))
+    assert [r['id'] for r in results] == ['DB-2', 'DB-1']
+
+    results, _ = await DB.changes(db, admin_context)
+    assert [r['id'] for r in results] == ['DB-2', 'DB-3', 'DB-1']
+
+
+@pytest.mark.asyncio
+async def test_changes_resume_from_token(db, admin_context, mocker):
+    mocker.patch('dbaas.services.DB.CHANGES_STEP_LENGTH', 2)
+    now = datetime(2025, 1, 1, 10)
+
+    dbs = [
+        DBFactory(id='DB-1', updated_at=now),
+        DBFactory(id='DB-2', updated_at=now),
+        DBFactory(id='DB-3', updated_at=now + timedelta(seconds=1)),
+    ]
+    await db[Collections.DB].insert_many(dbs)
+
+    results, next_token = await DB.changes(db, admin_context)
+    assert [r['id'] for r in results] == ['DB-1', 'DB-2']
+
+    results, next_token = await DB.changes(db, admin_context, since=next_token)
+    assert [r['id'] for r in results] == ['DB-3']
+
+    results, last_token = await DB.changes(db, admin_context, since=next_token)
+    assert results == []
+    assert last_token == next_token
+
+    await db[Collections.DB].update_one(
+        {'id': 'DB-1'},
+        {'$set': {'status': DBStatus.DELETED, 'updated_at': now + timedelta(seconds=5)}},
+    )
+
+    results, _ = await DB.changes(db, admin_context, since=next_token)
+    assert [(r['id'], r['status']) for r in results] == [('DB-1', DBStatus.DELETED)]
+
+
+@pytest.mark.asyncio
+async def test_changes_hold_back_recent_changes(db, admin_context):
+    now = datetime.now(tz=timezone.utc)
+    await db[Collections.DB].insert_many([
+        DBFactory(id='DB-1', updated_at=now - DB.CHANGES_SAFETY_LAG - timedelta(seconds=1)),
+        DBFactory(id='DB-2', updated_at=now),
+    ])
+
+    results, next_token = await DB.changes(db, admin_context)
+    assert [r['id'] for r in results] == ['DB-1']
+
+    results, last_token = await DB.changes(db, admin_context, since=next_token)
+    assert results == []
+    assert last_token == next_token
+
+
+def test__changes_query_until(common_context):
+    until = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    since = DB._encode_changes_token(until - timedelta(hours=1), 'DB-1')
+
+    query = DB._changes_query(common_context, since, until)
+
+    assert query['updated_at'] == {'$lte': until}
+    assert query['account_id'] == common_context.account_id
+    assert len(query['$or']) == 2
+
+
+@pytest.mark.parametrize('updated_at', (
+    datetime(2025, 3, 4, 5, 6, 7, 123000),
+    datetime(2025, 3, 4, 5, 6, 7, 123000, tzinfo=timezone.utc),
+))
+def test__changes_token_round_trip(updated_at):
+    token = DB._encode_changes_token(updated_at, 'DBPG-12345')
+
+    assert DB._decode_changes_token(token) == (
+        datetime(2025, 3, 4, 5, 6, 7, 123000, tzinfo=timezone.utc),
+        'DBPG-12345',
+    )
+
+
+@pytest.mark.parametrize('token', ('!', 'YWJj', 'YWJjOkRCLTE='))
+def test__decode_changes_token_invalid(token):
+    with pytest.raises(ValueError) as e:
+        DB._decode_changes_token(token)
+
+    assert str(e.value) == 'Invalid changes token.'
+
+
+@pytest.mark.asyncio
+async def test_changes_invalid_token(admin_context):
+    with pytest.raises(ValueError):
+        await DB.changes('db', admin_context, since='invalid')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('status', (DBStatus.ACTIVE, DBStatus.RECONFIGURING))
+async def test_retrieve_credentials_ok(db, config, status):
+    credentials = {'host': 'h', 'username': 'u', 'password': 'p'}
+    db1 = DBFactory(status=status, credentials=DB._encrypt_dict(credentials, config))
+    await db[Collections.DB].insert_one(db1)
+
+    result = await DB.retrieve_credentials(
+        db1['id'], db, Context(account_id=db1['account_id']), config,
+    )
+
+    assert result == credentials
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('status', (DBStatus.REVIEWING, DBStatus.DELETED))
+async def test_retrieve_credentials_not_available(db, config, status):
+    db1 = DBFactory(status=status, credentials=DB._encrypt_dict({'a': 1}, config))
+    await db[Collections.DB].insert_one(db1)
+
+    result = await DB.retrieve_credentials(
+        db1['id'], db, Context(account_id=db1['account_id']), config,
+    )
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_retrieve_credentials_is_from_other_account(db, config):
+    db1 = DBFactory(status=DBStatus.ACTIVE, credentials=DB._encrypt_dict({'a': 1}, config))
+    await db[Collections.DB].insert_one(db1)
+
+    result = await DB.retrieve_credentials(db1['id'], db, Context(account_id='PA-000'), config)
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_retrieve_credentials_decrypts_in_executor(config, mocker):
+    executor = mocker.MagicMock(run=AsyncMock(return_value={'username': 'u'}))
+    executor_p = mocker.patch('dbaas.services.get_crypto_executor', return_value=executor)
+    db_coll = mocker.MagicMock(find_one=AsyncMock(return_value={
+        'status': DBStatus.ACTIVE,
+        'credentials': b'x',
+    }))
+
+    result = await DB.retrieve_credentials(
+        'DB-1', {Collections.DB: db_coll}, Context(account_id='VA-1'), config,
+    )
+
+    assert result == {'username': 'u'}
+    executor_p.assert_called_once_with(config)
+    executor.run.assert_called_once_with(DB._decrypt_dict, b'x', config)
+    db_coll.find_one.assert_called_once_with(
+        {'status': {'$ne': DBStatus.DELETED}, 'account_id': 'VA-1', 'id': 'DB-1'},
+        projection={'status': 1, 'credentials': 1},
+    )
+
+
 @pytest.mark.asyncio
 async def test_retrieve_is_empty(db):
     result = await DB.retrieve('any', db, Context(account_id='VA-123-456'))
@@ -157,6 +417,15 @@ async def test_retrieve_is_found(db, status):
     assert result['id'] == db1['id']
 
 
+@pytest.mark.asyncio
+async def test_retrieve_round_trips(db, round_trips):
+    db1 = DBFactory()
+    await db[Collections.DB].insert_one(db1)
+
+    with round_trips.budget(mongo={'find': 1}, connect=0):
+        await DB.retrieve(db1['id'], db, Context(account_id=db1['account_id']))
+
+
 @pytest.mark.asyncio
 async def test__get_validated_region_document_valid_region(mocker):
     region = RegionFactory()
@@ -310,6 +579,7 @@ def test__prepare_db_document(mocker):
 
     assert DB._prepare_db_document(data, context, region, tech_contact, actor) == {
         'name': 'DB-1',
+        'search_name': 'db-1',
         'account_id': 'VA-123',
         'status': 'reviewing',
         'events': {
@@ -321,6 +591,7 @@ def test__prepare_db_document(mocker):
                 },
             },
         },
+        'updated_at': 'DT',
         'region': {
             'id': 'eu',
             'name': 'Fr',
@@ -455,6 +726,8 @@ async def test__create_db_document_common_document_created(db, config, mocker):
         'dbaas.services.DB._db_collection_from_db_session',
         return_value=mocker.MagicMock(update_one=db_s_p),
     )
+    dt = mocker.patch('dbaas.services.datetime', wraps=datetime)
+    dt.now.return_value = 'DT'
     client = mocker.MagicMock()
 
     result = await DB._create_db_document(
@@ -469,6 +742,7 @@ async def test__create_db_document_common_document_created(db, config, mocker):
         'id': 'DB1',
         'description': 'desc',
         'cases': [{'id': helpdesk_case['id']}],
+        'updated_at': 'DT',
     }
 
     installation_p.assert_called_once_with(installation['id'], client)
@@ -488,7 +762,10 @@ async def test__create_db_document_common_document_created(db, config, mocker):
 
     db_s_p_call = db_s_p.call_args[0]
     assert db_s_p_call[0] == {'id': 'DB1'}
-    assert db_s_p_call[1] == {'$set': {'cases': [{'id': helpdesk_case['id']}]}}
+    assert db_s_p_call[1] == {'$set': {
+        'cases': [{'id': helpdesk_case['id']}],
+        'updated_at': 'DT',
+    }}
 
 
 @pytest.mark.asyncio
@@ -570,6 +847,313 @@ async def test_create_ok(mocker, context_uid, am_call_count, actor):
     ddr_p.assert_called_once_with('inserted_db_doc')
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user_id, connect_budget', (('UR-000', 3), ('UR-001', 4)))
+async def test_create_connect_round_trips(
+    async_client_mocker, async_connect_client, mocker, round_trips, config, user_id,
+    connect_budget,
+):
+    installation = InstallationFactory()
+    tech_contact = UserFactory(id='UR-000')
+    context = Context(
+        account_id='VA-000',
+        user_id=user_id,
+        installation_id=installation['id'],
+    )
+    data = {
+        'name': 'name',
+        'description': 'description',
+        'workload': DBWorkload.SMALL,
+        'tech_contact': {'id': tech_contact['id']},
+        'region': {'id': 'eu-west'},
+    }
+
+    async_client_mocker.accounts['VA-000'].users['UR-000'].get(return_value=tech_contact)
+    async_client_mocker.accounts['VA-000'].users['UR-001'].get(return_value=UserFactory())
+    async_client_mocker('devops').installations[installation['id']].get(
+        return_value=installation,
+    )
+    async_client_mocker('helpdesk').cases.create(return_value=CaseFactory())
+
+    mocker.patch(
+        'dbaas.services.DB._get_validated_region_document',
+        AsyncMock(return_value=RegionFactory()),
+    )
+    mocker.patch('dbaas.services.DB._validate_allowed_db_number_per_account', AsyncMock())
+    mocker.patch(
+        'dbaas.services.DB._create_db_document_in_db',
+        AsyncMock(side_effect=lambda db_document, *a: {**db_document, 'id': 'DB-1'}),
+    )
+    mocker.patch(
+        'dbaas.services.DB._db_collection_from_db_session',
+        return_value=mocker.MagicMock(update_one=AsyncMock()),
+    )
+    mocker.patch('dbaas.services.DBStats.record_change', AsyncMock())
+    db_session = mocker.MagicMock()
+    db_session.__aenter__.return_value = db_session
+    db = mocker.MagicMock()
+    db.client.start_session = AsyncMock(return_value=db_session)
+
+    with round_trips.budget(connect=connect_budget):
+        await DB.create(data, db, context, async_connect_client, config)
+
+    assert round_trips.connect[-1] == 'POST helpdesk/cases'
+
+
+def _bulk_create_item(tech_contact_id='UR-000', region_id='eu-west', **kwargs):
+    return {
+        'name': 'name',
+        'description': 'description',
+        'workload': DBWorkload.SMALL,
+        'tech_contact': {'id': tech_contact_id},
+        'region': {'id': region_id},
+        **kwargs,
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_create(async_client_mocker, async_connect_client, db, round_trips, config):
+    installation = InstallationFactory()
+    context = Context(
+        account_id='VA-000',
+        user_id='UR-000',
+        installation_id=installation['id'],
+        call_type=ContextCallTypes.USER,
+    )
+    await db[Collections.REGION].insert_one(RegionFactory(id='eu-west'))
+
+    users = async_client_mocker.accounts['VA-000'].users
+    users['UR-000'].get(return_value=UserFactory(id='UR-000'))
+    users['UR-001'].get(return_value=UserFactory(id='UR-001', active=False))
+    users['UR-404'].get(
+        status_code=404,
+        return_value={'error_code': 'AC_001', 'errors': ['Not found.']},
+    )
+    async_client_mocker('devops').installations[installation['id']].get(
+        return_value=installation,
+    )
+    for _ in range(2):
+        async_client_mocker('helpdesk').cases.create(return_value=CaseFactory())
+
+    items = [
+        _bulk_create_item(name='first'),
+        _bulk_create_item(region_id='us-east'),
+        _bulk_create_item('UR-001'),
+        _bulk_create_item('UR-404'),
+        _bulk_create_item(name='second'),
+    ]
+
+    with round_trips.budget(
+        mongo={'find': 1, 'aggregate': 1, 'insert': 1, 'update': 2},
+        connect=6,
+    ):
+        results = await DB.bulk_create(items, db, context, async_connect_client, config)
+
+    assert [result['status_code'] for result in results] == [201, 400, 400, 400, 201]
+    assert results[1]['message'] == 'Region does not exist.'
+    assert results[2]['message'] == 'Only active user can be a technical contact.'
+    assert results[3]['message'] == 'Not found.'
+    assert [results[n]['database']['name'] for n in (0, 4)] == ['first', 'second']
+
+    db_documents = await db[Collections.DB].find().to_list(length=None)
+    assert sorted(doc['name'] for doc in db_documents) == ['first', 'second']
+    assert all(len(doc['cases']) == 1 for doc in db_documents)
+    assert all(doc['status'] == DBStatus.REVIEWING for doc in db_documents)
+
+    stats = await DBStats.get(db)
+    assert stats['status'] == {DBStatus.REVIEWING: 2}
+
+
+@pytest.fixture()
+def bulk_create_mocks(mocker):
+    mocker.patch(
+        'dbaas.services.Region.retrieve_many',
+        AsyncMock(return_value={'eu-west': RegionFactory(id='eu-west')}),
+    )
+    mocker.patch(
+        'dbaas.services.ConnectAccountUser.retrieve_many',
+        AsyncMock(return_value={'UR-000': UserFactory(id='UR-000')}),
+    )
+    mocker.patch('dbaas.services.ConnectInstallation.retrieve', AsyncMock())
+    mocker.patch('dbaas.services.DBStats.record_changes', AsyncMock())
+
+    def insert(db_documents, *args):
+        for n, db_document in db_documents.items():
+            db_document['id'] = f'DB-{n}'
+        return {}
+
+    mocker.patch('dbaas.services.DB._insert_db_documents', AsyncMock(side_effect=insert))
+
+    db = MagicMock()
+    db[Collections.DB].delete_many = AsyncMock()
+    db[Collections.DB].bulk_write = AsyncMock()
+
+    return db
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_quota_exceeded(mocker, bulk_create_mocks, config):
+    mocker.patch(
+        'dbaas.services.DB._validate_allowed_db_number_per_account',
+        AsyncMock(side_effect=ValueError('Max allowed number of databases is reached: 1.')),
+    )
+    case_p = mocker.patch('dbaas.services.ConnectHelpdeskCase.create_from_db_document')
+    context = Context(account_id='VA-000', user_id='UR-000')
+
+    results = await DB.bulk_create(
+        [_bulk_create_item(), _bulk_create_item(region_id='us-east'), _bulk_create_item()],
+        bulk_create_mocks,
+        context,
+        MagicMock(),
+        config,
+    )
+
+    assert results == [
+        {'status_code': 400, 'message': 'Max allowed number of databases is reached: 1.'},
+        {'status_code': 400, 'message': 'Region does not exist.'},
+        {'status_code': 400, 'message': 'Max allowed number of databases is reached: 1.'},
+    ]
+    DB._validate_allowed_db_number_per_account.assert_awaited_once_with(
+        bulk_create_mocks, context, config, number=2,
+    )
+    case_p.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_case_error(mocker, bulk_create_mocks, config):
+    mocker.patch('dbaas.services.DB._validate_allowed_db_number_per_account', AsyncMock())
+    mocker.patch(
+        'dbaas.services.ConnectHelpdeskCase.create_from_db_document',
+        AsyncMock(side_effect=[CaseFactory(id='CS-1'), ClientError(status_code=502)]),
+    )
+    context = Context(account_id='VA-000', user_id='UR-000')
+
+    results = await DB.bulk_create(
+        [_bulk_create_item(), _bulk_create_item()],
+        bulk_create_mocks,
+        context,
+        MagicMock(),
+        config,
+    )
+
+    assert results[0]['status_code'] == 201
+    assert results[0]['database']['cases'] == [{'id': 'CS-1'}]
+    assert results[1] == {'status_code': 503, 'message': 'Service Unavailable.'}
+
+    db_coll = bulk_create_mocks[Collections.DB]
+    db_coll.delete_many.assert_awaited_once_with({'id': {'$in': ['DB-1']}})
+    assert [write._filter for write in db_coll.bulk_write.call_args[0][0]] == [{'id': 'DB-0'}]
+    changes = DBStats.record_changes.call_args[0][1]
+    assert [(before, after['id']) for before, after in changes] == [(None, 'DB-0')]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_unexpected_case_error(mocker, bulk_create_mocks, config):
+    mocker.patch('dbaas.services.DB._validate_allowed_db_number_per_account', AsyncMock())
+    mocker.patch(
+        'dbaas.services.ConnectHelpdeskCase.create_from_db_document',
+        AsyncMock(side_effect=[
+            CaseFactory(id='CS-1'), ClientError(status_code=502), RuntimeError('Boom.'),
+        ]),
+    )
+
+    with pytest.raises(RuntimeError):
+        await DB.bulk_create(
+            [_bulk_create_item(), _bulk_create_item(), _bulk_create_item()],
+            bulk_create_mocks,
+            Context(account_id='VA-000', user_id='UR-000'),
+            MagicMock(),
+            config,
+        )
+
+    db_coll = bulk_create_mocks[Collections.DB]
+    db_coll.delete_many.assert_awaited_once_with({'id': {'$in': ['DB-0', 'DB-1', 'DB-2']}})
+    db_coll.bulk_write.assert_not_awaited()
+    DBStats.record_changes.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_actor_error(mocker, bulk_create_mocks, config):
+    retrieve_many_p = mocker.patch(
+        'dbaas.services.ConnectAccountUser.retrieve_many',
+        AsyncMock(return_value={'UR-000': ClientError(status_code=503)}),
+    )
+
+    with pytest.raises(ClientError):
+        await DB.bulk_create(
+            [_bulk_create_item()],
+            bulk_create_mocks,
+            Context(account_id='VA-000', user_id='UR-000'),
+            MagicMock(),
+            config,
+        )
+
+    retrieve_many_p.assert_awaited_once()
+
+
+@pytest.mark.parametrize('error, result', (
+    (
+        ClientError(status_code=404, errors=['Not found.']),
+        {'status_code': 400, 'message': 'Not found.'},
+    ),
+    (ClientError('Bad.', status_code=400), {'status_code': 400, 'message': 'Bad.'}),
+    (ClientError(status_code=500), {'status_code': 503, 'message': 'Service Unavailable.'}),
+    (ClientError(), {'status_code': 503, 'message': 'Service Unavailable.'}),
+))
+def test__client_error_result(error, result):
+    assert DB._client_error_result(error) == result
+
+
+@pytest.mark.asyncio
+async def test__insert_db_documents(mocker, config):
+    db = MagicMock()
+    db_coll = db[Collections.DB]
+    inserted = []
+
+    async def insert_many(db_documents, ordered):
+        inserted.append([doc['name'] for doc in db_documents])
+        if len(inserted) == 1:
+            raise BulkWriteError({'writeErrors': [
+                {'index': 1, 'code': 11000, 'errmsg': 'duplicate'},
+                {'index': 2, 'code': 1, 'errmsg': 'err'},
+            ]})
+
+    db_coll.insert_many = insert_many
+    logger = MagicMock()
+    db_documents = {0: {'name': 'a'}, 3: {'name': 'b'}, 4: {'name': 'c'}}
+
+    results = await DB._insert_db_documents(db_documents, db, config, logger)
+
+    assert results == {4: {'status_code': 503, 'message': 'DB writing error.'}}
+    assert inserted == [['a', 'b', 'c'], ['b']]
+    assert len({doc['id'] for doc in db_documents.values()}) == 3
+    logger.logger.warning.assert_called_once_with('ID regeneration attempt %d...', 1)
+
+
+@pytest.mark.asyncio
+async def test__insert_db_documents_id_generation_error(mocker, config):
+    db = MagicMock()
+    db[Collections.DB].insert_many = AsyncMock(side_effect=BulkWriteError({
+        'writeErrors': [{'index': 0, 'code': 11000, 'errmsg': 'duplicate'}],
+    }))
+
+    results = await DB._insert_db_documents({2: {'name': 'a'}}, db, config, MagicMock())
+
+    assert results == {2: {'status_code': 400, 'message': 'ID generation error.'}}
+    assert db[Collections.DB].insert_many.await_count == DB.MAX_ID_GENERATION_RETRIES
+
+
+@pytest.mark.asyncio
+async def test__insert_db_documents_operation_failure(config):
+    db = MagicMock()
+    db[Collections.DB].insert_many = AsyncMock(side_effect=OperationFailure('err'))
+
+    with pytest.raises(ClientError) as e:
+        await DB._insert_db_documents({0: {'name': 'a'}}, db, config, MagicMock())
+
+    assert e.value.status_code == 503
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('error_cls', (ValueError, ClientError))
 async def test_create_error(error_cls, mocker):
@@ -656,9 +1240,13 @@ async def test_update_partial_update_ok(mocker, db):
     actor_p.assert_called_once_with('context', 'client')
 
     db_document['name'] = 'new'
+    db_document['search_name'] = 'new'
     db_document['events'].update(updated_event)
+    db_document['updated_at'] = 'DT'
     repr_p.assert_called_once_with(db_document)
     assert db_document_from_db['name'] == 'new'
+    assert db_document_from_db['search_name'] == 'new'
+    assert db_document_from_db['updated_at'] == 'DT'
     assert db_document_from_db['events']['created']
     assert db_document_from_db['events']['updated'] == updated_event
     assert db_document_from_db['description'] == 'old'
@@ -702,6 +1290,7 @@ async def test_update_full_update_ok(mocker, db):
     actor_p.assert_called_once_with('context', 'client')
 
     db_document['name'] = 'new'
+    db_document['search_name'] = 'new'
     db_document['description'] = 'new'
     db_document['tech_contact'] = {
         'id': 'UR-789',
@@ -709,8 +1298,11 @@ async def test_update_full_update_ok(mocker, db):
         'email': 'x@y.test',
     }
     db_document['events'].update(updated_event)
+    db_document['updated_at'] = 'DT'
     repr_p.assert_called_once_with(db_document)
     assert db_document_from_db['name'] == 'new'
+    assert db_document_from_db['search_name'] == 'new'
+    assert db_document_from_db['updated_at'] == 'DT'
     assert db_document_from_db['events']['created']
     assert db_document_from_db['events']['updated'] == updated_event
     assert db_document_from_db['description'] == 'new'
@@ -797,8 +1389,10 @@ async def test_reconfigure_by_common_installation(mocker, db, action, details, c
 
     db_document['status'] = DBStatus.RECONFIGURING
     db_document['events'].update(reconfigured_event)
+    db_document['updated_at'] = 'DT'
     repr_p.assert_called_once_with(db_document)
     assert db_document_from_db['status'] == DBStatus.RECONFIGURING
+    assert db_document_from_db['updated_at'] == 'DT'
     assert db_document_from_db['cases'] == [existing_helpdesk_case, {'id': helpdesk_case['id']}]
     assert db_document_from_db['events']['created']
     assert db_document_from_db['events']['reconfigured'] == reconfigured_event
@@ -840,9 +1434,11 @@ async def test_delete(mocker, db, status):
 
     db_document['status'] = DBStatus.DELETED
     db_document['events'].update(deleted_event)
+    db_document['updated_at'] = 'DT'
     repr_p.assert_called_once_with(db_document)
     case_res_p.assert_called_once_with(db_document, 'client')
     assert db_document_from_db['status'] == DBStatus.DELETED
+    assert db_document_from_db['updated_at'] == 'DT'
     assert db_document_from_db['events']['created']
     assert db_document_from_db['events']['deleted'] == deleted_event
 
@@ -866,7 +1462,7 @@ async def test_activate_active_without_credentials(mocker, db, config):
     assert result == 'aa'
 
     db_document['status'] = DBStatus.ACTIVE
-    repr_p.assert_called_once_with(db_document, config=config)
+    repr_p.assert_called_once_with(db_document)
     case_res_p.assert_not_called()
     assert db_document_from_db['status'] == DBStatus.ACTIVE
     assert db_document_from_db['events']['created']
@@ -908,7 +1504,8 @@ async def test_activate_reconfiguring_without_credentials(mocker, db, config):
     db_document['status'] = DBStatus.ACTIVE
     db_document['workload'] = DBWorkload.LARGE
     db_document['events'].update(activated_event)
-    repr_p.assert_called_once_with(db_document, config=config)
+    db_document['updated_at'] = 'DT'
+    repr_p.assert_called_once_with(db_document)
     case_res_p.assert_called_once_with(db_document, 'client')
     assert db_document_from_db['status'] == DBStatus.ACTIVE
     assert db_document_from_db['events']['created']
@@ -931,6 +1528,7 @@ async def test_activate_with_credentials(mocker, db, status, config):
 
     mocker.patch('dbaas.services.DB._db_document_repr', return_value='rc')
     mocker.patch('dbaas.services.DB._resolve_last_db_document_case')
+    mocker.patch('dbaas.services.LeadTimes.record_activation', AsyncMock())
     dt = mocker.patch('dbaas.services.datetime', wraps=datetime)
     dt.now.return_value = 'DT'
 
@@ -951,6 +1549,231 @@ async def test_activate_with_credentials(mocker, db, status, config):
     assert count_docs == 1
 
 
+@pytest.mark.asyncio
+async def test_activate_and_delete_update_stats(mocker, db, config):
+    db_document = DBFactory(status=DBStatus.REVIEWING, workload=DBWorkload.SMALL)
+    await db[Collections.DB].insert_one(db_document)
+    await DBStats.rebuild(db)
+
+    mocker.patch('dbaas.services.DB._resolve_last_db_document_case')
+
+    activated_db_document = await DB._activate(
+        db_document,
+        data={'credentials': {'username': 'user'}, 'workload': DBWorkload.LARGE},
+        db=db,
+        config=config,
+        client='client',
+    )
+    stats = await DBStats.get(db)
+
+    assert stats['status'] == {DBStatus.ACTIVE: 1}
+    assert stats['workload'] == {DBWorkload.LARGE: 1}
+
+    lead_times = await LeadTimes.get(db, {'workload': DBWorkload.SMALL})
+    assert lead_times['create']['count'] == 1
+
+    await DB.delete(activated_db_document, db, client='client')
+    stats = await DBStats.get(db)
+
+    assert stats['total'] == 1
+    assert stats['status'] == {DBStatus.DELETED: 1}
+    assert stats['account_id'] == {db_document['account_id']: 1}
+
+
+def test__ids_query(common_context):
+    assert DB._ids_query(common_context, ['DB-1', 'DB-2']) == {
+        'status': {'$ne': DBStatus.DELETED},
+        'account_id': common_context.account_id,
+        'id': {'$in': ['DB-1', 'DB-2']},
+    }
+
+
+def test__bulk_result(mocker):
+    mocker.patch('dbaas.services.DB._db_document_repr', return_value='repr')
+
+    assert DB._bulk_result('DB-1', 404, message='Database not found.') == {
+        'id': 'DB-1',
+        'status_code': 404,
+        'message': 'Database not found.',
+    }
+    assert DB._bulk_result('DB-1', 200, db_document={'id': 'DB-1'}) == {
+        'id': 'DB-1',
+        'status_code': 200,
+        'database': 'repr',
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_action_activate(mocker, db, config, admin_context):
+    reviewing = DBFactory(status=DBStatus.REVIEWING, workload=DBWorkload.SMALL)
+    active = DBFactory(status=DBStatus.ACTIVE)
+    no_credentials = DBFactory(status=DBStatus.REVIEWING)
+    await db[Collections.DB].insert_many([reviewing, active, no_credentials])
+    await DBStats.rebuild(db)
+
+    cases_p = mocker.patch('dbaas.services.DB._resolve_last_db_documents_cases')
+    credentials = {'username': 'user'}
+
+    results = await DB.bulk_action(
+        DBAction.ACTIVATE,
+        [
+            {'id': reviewing['id'], 'credentials': credentials},
+            {'id': 'DB-404'},
+            {'id': active['id']},
+            {'id': no_credentials['id']},
+            {'id': reviewing['id']},
+        ],
+        db=db,
+        context=admin_context,
+        config=config,
+        client='client',
+    )
+
+    assert [(result['id'], result['status_code']) for result in results] == [
+        (reviewing['id'], 200),
+        ('DB-404', 404),
+        (active['id'], 200),
+        (no_credentials['id'], 400),
+    ]
+    assert results[0]['database']['status'] == DBStatus.ACTIVE
+    assert results[1]['message'] == 'Database not found.'
+    assert results[2]['database']['id'] == active['id']
+    assert results[3]['message'] == 'Credentials are required for DB activation.'
+
+    db_document_from_db = await db[Collections.DB].find_one({'id': reviewing['id']})
+    assert db_document_from_db['status'] == DBStatus.ACTIVE
+    assert db_document_from_db['events']['activated']
+    assert DB._decrypt_dict(db_document_from_db['credentials'], config) == credentials
+
+    db_document_from_db = await db[Collections.DB].find_one({'id': no_credentials['id']})
+    assert db_document_from_db['status'] == DBStatus.REVIEWING
+
+    stats = await DBStats.get(db)
+    assert stats['status'] == {DBStatus.ACTIVE: 2, DBStatus.REVIEWING: 1}
+
+    lead_times = await LeadTimes.get(db, {'workload': DBWorkload.SMALL})
+    assert lead_times['create']['count'] == 1
+
+    assert [doc['id'] for doc in cases_p.call_args[0][0]] == [reviewing['id']]
+
+
+@pytest.mark.asyncio
+async def test_bulk_action_delete_is_account_scoped(mocker, db, config):
+    own = DBFactory(status=DBStatus.ACTIVE, account_id='PA-000-000')
+    other = DBFactory(status=DBStatus.ACTIVE, account_id='PA-111-111')
+    await db[Collections.DB].insert_many([own, other])
+
+    mocker.patch('dbaas.services.DB._resolve_last_db_documents_cases')
+
+    results = await DB.bulk_action(
+        DBAction.DELETE,
+        [{'id': own['id']}, {'id': other['id']}],
+        db=db,
+        context=Context(account_id='PA-000-000'),
+        config=config,
+        client='client',
+    )
+
+    assert [result['status_code'] for result in results] == [200, 404]
+    assert results[0]['database']['status'] == DBStatus.DELETED
+
+    db_document_from_db = await db[Collections.DB].find_one({'id': other['id']})
+    assert db_document_from_db['status'] == DBStatus.ACTIVE
+
+
+@pytest.mark.asyncio
+async def test_bulk_action_write_error(mocker, admin_context, config):
+    db_documents = [DBFactory(status=DBStatus.ACTIVE), DBFactory(status=DBStatus.ACTIVE)]
+    db = MagicMock()
+    db_coll = db[Collections.DB]
+    db_coll.find.return_value.to_list = AsyncMock(return_value=db_documents)
+    db_coll.bulk_write = AsyncMock(side_effect=BulkWriteError({
+        'writeErrors': [{'index': 1, 'code': 1, 'errmsg': 'err'}],
+    }))
+    record_p = mocker.patch('dbaas.services.DBStats.record_changes', AsyncMock())
+    cases_p = mocker.patch('dbaas.services.DB._resolve_last_db_documents_cases')
+    client = MagicMock()
+
+    results = await DB.bulk_action(
+        DBAction.DELETE,
+        [{'id': db_document['id']} for db_document in db_documents],
+        db=db,
+        context=admin_context,
+        config=config,
+        client=client,
+    )
+
+    assert [result['status_code'] for result in results] == [200, 503]
+    assert results[1]['message'] == 'DB writing error.'
+    assert len(db_coll.bulk_write.call_args[0][0]) == 2
+
+    changes = record_p.call_args[0][1]
+    assert [before['id'] for before, _ in changes] == [db_documents[0]['id']]
+    assert cases_p.call_args[0][0] == [db_documents[0]]
+    client.logger.logger.error.assert_called_once()
+
+    [(before, after)] = changes
+    assert 'deleted' not in before['events']
+    assert 'deleted' in after['events']
+    assert 'deleted' not in db_documents[1]['events']
+
+
+@pytest.mark.asyncio
+async def test_bulk_action_delete_rejects_activation_fields(mocker, admin_context, config):
+    db_documents = [DBFactory(status=DBStatus.ACTIVE), DBFactory(status=DBStatus.ACTIVE)]
+    db = MagicMock()
+    db_coll = db[Collections.DB]
+    db_coll.find.return_value.to_list = AsyncMock(return_value=db_documents)
+    db_coll.bulk_write = AsyncMock()
+    mocker.patch('dbaas.services.DBStats.record_changes', AsyncMock())
+    mocker.patch('dbaas.services.DB._resolve_last_db_documents_cases')
+
+    results = await DB.bulk_action(
+        DBAction.DELETE,
+        [
+            {'id': db_documents[0]['id'], 'credentials': None, 'workload': None},
+            {
+                'id': db_documents[1]['id'],
+                'credentials': {'host': 'h', 'username': 'u', 'password': 'p'},
+                'workload': None,
+            },
+        ],
+        db=db,
+        context=admin_context,
+        config=config,
+        client=MagicMock(),
+    )
+
+    assert [result['status_code'] for result in results] == [200, 400]
+    assert results[1]['message'] == 'Credentials and workload can only be set on activation.'
+    assert [write._filter for write in db_coll.bulk_write.call_args[0][0]] == [
+        {'id': db_documents[0]['id']},
+    ]
+
+
+@pytest.mark.asyncio
+async def test__resolve_last_db_documents_cases(mocker):
+    task_p = mocker.patch('dbaas.services.create_background_task')
+    resolve_p = mocker.patch('dbaas.services.ConnectHelpdeskCase.resolve_many', MagicMock())
+
+    DB._resolve_last_db_documents_cases(
+        [{'cases': [{'id': 'CS-1'}]}, {}, {'cases': [{'id': 'CS-2'}, {'id': 'CS-3'}]}],
+        'client',
+    )
+
+    resolve_p.assert_called_once_with(['CS-1', 'CS-3'], 'client')
+    task_p.assert_called_once_with(resolve_p.return_value)
+
+
+@pytest.mark.asyncio
+async def test__resolve_last_db_documents_cases_no_cases(mocker):
+    task_p = mocker.patch('dbaas.services.create_background_task')
+
+    DB._resolve_last_db_documents_cases([{}, {'cases': []}], 'client')
+
+    task_p.assert_not_called()
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('document', ({}, {'cases': []}))
 async def test__resolve_last_db_document_case_no_case(mocker, document):
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import threading
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from dbaas.crypto import (
+    CryptoExecutor,
+    EncryptionMode,
+    get_crypto_executor,
+    get_key_ring,
+    KeyRing,
+)
+from dbaas.database import DBEnvVar
+from dbaas.metrics import CRYPTO_PENDING_JOBS
+from dbaas.timings import TimingKind
+
+
+def _envelope_header(token: bytes) -> bytes:
+    return token[:1 + KeyRing.WRAPPED_DATA_KEY_LENGTH]
+
+
+def test_key_ring_requires_keys():
+    with pytest.raises(ValueError) as e:
+        KeyRing([])
+
+    assert str(e.value) == 'At least one encryption key is required.'
+
+
+def test_key_ring_encrypts_with_primary_key():
+    primary_key, retired_key = Fernet.generate_key(), Fernet.generate_key()
+    key_ring = KeyRing([primary_key, retired_key])
+
+    token = key_ring.encrypt(b'secret')
+
+    assert Fernet(primary_key).decrypt(token) == b'secret'
+    with pytest.raises(InvalidToken):
+        Fernet(retired_key).decrypt(token)
+
+
+def test_key_ring_decrypts_and_rotates_retired_key_tokens():
+    primary_key, retired_key = Fernet.generate_key(), Fernet.generate_key()
+    key_ring = KeyRing([primary_key, retired_key])
+    retired_token = Fernet(retired_key).encrypt(b'secret')
+
+    assert key_ring.decrypt(retired_token) == b'secret'
+    assert Fernet(primary_key).decrypt(key_ring.rotate(retired_token)) == b'secret'
+
+
+def test_key_ring_unknown_key():
+    key_ring = KeyRing([Fernet.generate_key()])
+
+    with pytest.raises(InvalidToken):
+        key_ring.decrypt(Fernet(Fernet.generate_key()).encrypt(b'secret'))
+
+
+def test_get_key_ring_is_cached(config):
+    assert get_key_ring(config) is get_key_ring(dict(config))
+
+
+@pytest.mark.parametrize('retired_keys', (None, '', ' , '))
+def test_get_key_ring_without_retired_keys(config, retired_keys):
+    config[DBEnvVar.RETIRED_ENCRYPTION_KEYS] = retired_keys
+    token = Fernet(bytes.fromhex(config[DBEnvVar.ENCRYPTION_KEY])).encrypt(b'value')
+
+    assert get_key_ring(config).decrypt(token) == b'value'
+
+
+def test_get_key_ring_with_retired_keys(config):
+    retired_key = Fernet.generate_key()
+    config[DBEnvVar.RETIRED_ENCRYPTION_KEYS] = f'{Fernet.generate_key().hex()}, {retired_key.hex()}'
+    key_ring = get_key_ring(config)
+
+    assert key_ring.decrypt(Fernet(retired_key).encrypt(b'old')) == b'old'
+
+    primary_key = bytes.fromhex(config[DBEnvVar.ENCRYPTION_KEY])
+    assert Fernet(primary_key).decrypt(key_ring.encrypt(b'new')) == b'new'
+
+
+def test_key_ring_unknown_mode():
+    with pytest.raises(ValueError) as e:
+        KeyRing([Fernet.generate_key()], mode='rot13')
+
+    assert str(e.value) == 'Unknown encryption mode: rot13.'
+
+
+def test_envelope_key_ring_round_trip():
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+
+    token = key_ring.encrypt(b'secret')
+
+    assert token[:1] == KeyRing.ENVELOPE_VERSION
+    assert key_ring.decrypt(token) == b'secret'
+
+
+def test_envelope_token_is_smaller_than_fernet_token():
+    key = Fernet.generate_key()
+    value = b'x' * 100
+
+    envelope_token = KeyRing([key], mode=EncryptionMode.ENVELOPE).encrypt(value)
+    fernet_token = KeyRing([key]).encrypt(value)
+
+    assert len(envelope_token) < len(fernet_token)
+
+
+def test_envelope_key_ring_reuses_data_key(mocker):
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+    generate_p = mocker.spy(AESGCM, 'generate_key')
+
+    first, second = key_ring.encrypt(b'a'), key_ring.encrypt(b'b')
+
+    assert generate_p.call_count == 1
+    assert _envelope_header(first) == _envelope_header(second)
+
+
+def test_envelope_key_ring_renews_exhausted_data_key(mocker):
+    mocker.patch.object(KeyRing, 'DATA_KEY_MAX_USES', 1)
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+
+    first, second = key_ring.encrypt(b'a'), key_ring.encrypt(b'b')
+
+    assert _envelope_header(first) != _envelope_header(second)
+    assert key_ring.decrypt(first) == b'a'
+    assert key_ring.decrypt(second) == b'b'
+
+
+def test_envelope_key_ring_caches_unwrapped_data_keys(mocker):
+    key = Fernet.generate_key()
+    token = KeyRing([key], mode=EncryptionMode.ENVELOPE).encrypt(b'secret')
+    key_ring = KeyRing([key], mode=EncryptionMode.ENVELOPE)
+    unwrap_p = mocker.spy(key_ring._key_encryption_keys[0], 'decrypt')
+
+    assert key_ring.decrypt(token) == key_ring.decrypt(token) == b'secret'
+    assert unwrap_p.call_count == 1
+
+
+def test_envelope_key_ring_data_key_cache_is_bounded(mocker):
+    mocker.patch.object(KeyRing, 'DATA_KEY_MAX_USES', 1)
+    mocker.patch.object(KeyRing, 'DATA_KEY_CACHE_SIZE', 2)
+    key = Fernet.generate_key()
+    writer = KeyRing([key], mode=EncryptionMode.ENVELOPE)
+    reader = KeyRing([key])
+
+    for value in (b'a', b'b', b'c'):
+        assert reader.decrypt(writer.encrypt(value)) == value
+
+    assert len(reader._unwrapped_data_keys) == 2
+
+
+def test_envelope_key_ring_decrypts_retired_key_tokens():
+    primary_key, retired_key = Fernet.generate_key(), Fernet.generate_key()
+    token = KeyRing([retired_key], mode=EncryptionMode.ENVELOPE).encrypt(b'old')
+    key_ring = KeyRing([primary_key, retired_key], mode=EncryptionMode.ENVELOPE)
+
+    assert key_ring.decrypt(token) == b'old'
+
+    rotated_token = key_ring.rotate(token)
+    assert KeyRing([primary_key]).decrypt(rotated_token) == b'old'
+
+
+@pytest.mark.parametrize('mode', EncryptionMode.all())
+def test_key_ring_decrypts_both_formats(mode):
+    key = Fernet.generate_key()
+    key_ring = KeyRing([key], mode=mode)
+
+    assert key_ring.decrypt(Fernet(key).encrypt(b'fernet')) == b'fernet'
+    assert key_ring.decrypt(
+        KeyRing([key], mode=EncryptionMode.ENVELOPE).encrypt(b'envelope'),
+    ) == b'envelope'
+
+
+def test_envelope_key_ring_unknown_key():
+    token = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE).encrypt(b'secret')
+
+    with pytest.raises(InvalidToken):
+        KeyRing([Fernet.generate_key()]).decrypt(token)
+
+
+def test_envelope_key_ring_tampered_token():
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+    token = key_ring.encrypt(b'secret')
+
+    with pytest.raises(InvalidToken):
+        key_ring.decrypt(token[:-1] + bytes([token[-1] ^ 1]))
+
+
+@pytest.mark.parametrize('length', (1, 61, 70, 73, 88))
+def test_envelope_key_ring_truncated_token(length):
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+    token = key_ring.encrypt(b'secret')
+
+    with pytest.raises(InvalidToken):
+        key_ring.decrypt(token[:length])
+
+
+@pytest.mark.parametrize('mode, expected_mode', (
+    (None, EncryptionMode.FERNET),
+    ('', EncryptionMode.FERNET),
+    (EncryptionMode.ENVELOPE, EncryptionMode.ENVELOPE),
+))
+def test_get_key_ring_mode(config, mode, expected_mode):
+    config[DBEnvVar.ENCRYPTION_MODE] = mode
+
+    assert get_key_ring(config).mode == expected_mode
+
+
+@pytest.mark.asyncio
+async def test_crypto_executor_runs_in_thread_pool():
+    executor = CryptoExecutor(max_workers=1, lag_threshold=0)
+
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith('dbaas-crypto')
+
+
+@pytest.mark.asyncio
+async def test_crypto_executor_tracks_pending_jobs(metrics):
+    executor = CryptoExecutor(max_workers=1, lag_threshold=0)
+
+    pending = await executor.run(lambda: CRYPTO_PENDING_JOBS._values[()])
+
+    assert pending == 1
+    assert CRYPTO_PENDING_JOBS._values[()] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_workers', (0, 1))
+async def test_crypto_executor_records_request_timing(mocker, max_workers):
+    record_p = mocker.patch('dbaas.timings.record_timing')
+    executor = CryptoExecutor(max_workers=max_workers, lag_threshold=10)
+
+    assert await executor.run(lambda: 'x') == 'x'
+
+    record_p.assert_called_once_with(TimingKind.CRYPTO, mocker.ANY)
+
+
+@pytest.mark.asyncio
+async def test_crypto_executor_runs_inline(mocker):
+    warning_p = mocker.patch('dbaas.crypto._logger.warning')
+    executor = CryptoExecutor(max_workers=0, lag_threshold=10)
+
+    result = await executor.run(lambda *a: (threading.current_thread().name, a), 1, 2)
+
+    assert result == (threading.current_thread().name, (1, 2))
+    warning_p.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_crypto_executor_inline_lag_is_logged(mocker):
+    mocker.patch('dbaas.crypto.time.perf_counter', side_effect=[0.9, 1.0, 1.05, 1.1])
+    warning_p = mocker.patch('dbaas.crypto._logger.warning')
+    executor = CryptoExecutor(max_workers=0, lag_threshold=0.01)
+
+    def slow():
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        await executor.run(slow)
+
+    warning_p.assert_called_once_with(
+        'Inline crypto call %s blocked the event loop for %.1f ms.',
+        slow.__qualname__,
+        pytest.approx(50),
+    )
+
+
+@pytest.mark.parametrize('workers, threshold, expected', (
+    (None, None, (2, 0.01)),
+    ('0', '25', (0, 0.025)),
+))
+def test_get_crypto_executor(config, workers, threshold, expected):
+    if workers is not None:
+        config['DB_CRYPTO_EXECUTOR_WORKERS'] = workers
+        config['DB_CRYPTO_LOOP_LAG_THRESHOLD_MS'] = threshold
+
+    executor = get_crypto_executor(config)
+
+    assert (executor.max_workers, executor.lag_threshold) == expected
+    assert get_crypto_executor(config) is executor
@@ -4,11 +4,14 @@
 # All rights reserved.
 #
 
+from datetime import datetime, timedelta
+
 import pytest
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo.errors import OperationFailure
 
 from dbaas.database import (
+    close_db_clients,
     Collections,
     DBEnvVar,
     get_db,
@@ -18,6 +21,9 @@ from dbaas.database import (
     prepare_region_collection,
     validate_db_configuration,
 )
+from dbaas.metrics import MONGO_POOL_MAX_SIZE, MongoCommandMetrics, MongoPoolMetrics
+from dbaas.slow_queries import SlowQueryListener
+from dbaas.tracing import MongoTracingListener
 
 
 @pytest.mark.asyncio
@@ -39,6 +45,57 @@ async def test_get_db_connection_error(config, patch_connection_string):
         await db.client.server_info()
 
 
+def test_get_db_event_listeners(config, patch_connection_string):
+    db = get_db(config)
+
+    listeners = {type(listener): listener for listener in db.client.options.event_listeners}
+    assert set(listeners) == {
+        MongoCommandMetrics,
+        MongoPoolMetrics,
+        MongoTracingListener,
+        SlowQueryListener,
+    }
+    assert listeners[SlowQueryListener].client is db.client.delegate
+    assert listeners[SlowQueryListener].collections == (Collections.DB, Collections.REGION)
+
+
+def test_get_db_slow_query_listener_disabled(config, patch_connection_string):
+    config['DB_SLOW_QUERY_THRESHOLD_MS'] = '0'
+
+    db = get_db(config)
+
+    listeners = db.client.options.event_listeners
+    assert not any(isinstance(listener, SlowQueryListener) for listener in listeners)
+
+
+def test_get_db_shares_client(config, patch_connection_string):
+    db = get_db(config)
+
+    assert get_db(config).client is db.client
+    assert get_db({**config, DBEnvVar.DB: 'other'}).client is db.client
+    assert get_db({**config, 'DB_SLOW_QUERY_THRESHOLD_MS': '0'}).client is not db.client
+
+
+@pytest.mark.asyncio
+async def test_get_db_pool_metrics_stay_flat(config, patch_connection_string, metrics):
+    for _ in range(10):
+        await get_db(config).command('ping')
+
+    assert MONGO_POOL_MAX_SIZE._values == {
+        (f'{config[DBEnvVar.HOST]}:27017',): MongoPoolMetrics.DEFAULT_MAX_POOL_SIZE,
+    }
+
+
+def test_close_db_clients(config, patch_connection_string, mocker):
+    close_p = mocker.patch.object(AsyncIOMotorClient, 'close')
+    db = get_db(config)
+
+    close_db_clients()
+
+    close_p.assert_called_once_with()
+    assert get_db(config).client is not db.client
+
+
 def test_get_full_connection_string():
     assert get_full_connection_string('host') == 'mongodb+srv://host/'
 
@@ -124,3 +181,37 @@ async def test_prepare_region_collection_exists(config, db, logger):
     assert collection.full_name == f'{db_name}.{coll_name}'
 
     logger.info.assert_called_once_with('Collection %s already exists.', Collections.REGION)
+
+
+@pytest.mark.asyncio
+async def test_prepare_db_collection_backfills_updated_at(config, db, logger):
+    created_at = datetime(2025, 1, 1, 10)
+    await db[Collections.DB].insert_many([
+        {'id': 'DB-1', 'events': {'created': {'at': created_at}}},
+        {'id': 'DB-2', 'updated_at': created_at + timedelta(days=1)},
+    ])
+
+    await prepare_db_collection(db, logger)
+
+    db1 = await db[Collections.DB].find_one({'id': 'DB-1'})
+    db2 = await db[Collections.DB].find_one({'id': 'DB-2'})
+    assert db1['updated_at'] == created_at
+    assert db2['updated_at'] == created_at + timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_prepare_db_collection_backfills_search_name(config, db, logger):
+    await db[Collections.DB].insert_many([
+        {'id': 'DB-1', 'name': 'My Orders'},
+        {'id': 'DB-2', 'name': 'Users', 'search_name': 'users'},
+        {'id': 'DB-3', 'name': 'ÄPFEL Straße'},
+    ])
+
+    await prepare_db_collection(db, logger)
+
+    db1 = await db[Collections.DB].find_one({'id': 'DB-1'})
+    db2 = await db[Collections.DB].find_one({'id': 'DB-2'})
+    db3 = await db[Collections.DB].find_one({'id': 'DB-3'})
+    assert db1['search_name'] == 'my orders'
+    assert db2['search_name'] == 'users'
+    assert db3['search_name'] == 'äpfel straße'
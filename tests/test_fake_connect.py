@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import httpx
+import pytest
+from connect.client import AsyncConnectClient, ClientError
+
+from dbaas.fake_connect import FakeConnectApi
+
+
+@pytest.fixture()
+def fake_connect():
+    api = FakeConnectApi(latency=0, endpoint_error_rate={'helpdesk/cases/{id}/resolve': 1})
+    api.start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture()
+def fake_connect_client(fake_connect):
+    return AsyncConnectClient('ApiKey SU-000-000:fake', endpoint=fake_connect.url, max_retries=0)
+
+
+@pytest.mark.asyncio
+async def test_fake_connect_api(fake_connect, fake_connect_client):
+    client = fake_connect_client
+
+    impersonate = client('devops').services['SRVC-0000-0000'].installations['EIN-0000-0000']
+    assert await impersonate.action('impersonate').post() == {
+        'installation_api_key': 'ApiKey SU-000-000:EIN-0000-0000',
+    }
+
+    installation = await client('devops').installations['EIN-0000-0000'].get()
+    assert installation['environment']['extension']['owner']['id'] == 'VA-000-000'
+
+    user = await client.accounts['VA-000-000'].users['UR-000-001'].get()
+    assert user['id'] == 'UR-000-001'
+    assert user['active'] is True
+
+    first_case = await client('helpdesk').cases.create(payload={'subject': 'Subject'})
+    second_case = await client('helpdesk').cases.create(payload={'subject': 'Subject'})
+    assert first_case == {'id': 'CS-000-000-001', 'subject': 'Subject', 'state': 'pending'}
+    assert second_case['id'] == 'CS-000-000-002'
+
+    with pytest.raises(ClientError) as e:
+        await client('helpdesk').cases[first_case['id']]('resolve').post()
+
+    assert e.value.status_code == 503
+    assert fake_connect.requests == {
+        'POST devops/services/{id}/installations/{id}/impersonate': 1,
+        'GET devops/installations/{id}': 1,
+        'GET accounts/{id}/users/{id}': 1,
+        'POST helpdesk/cases': 2,
+        'POST helpdesk/cases/{id}/resolve': 1,
+    }
+    assert fake_connect.errors == {'POST helpdesk/cases/{id}/resolve': 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method, path, status', (
+    ('GET', '/public/v1/helpdesk/cases/CS-1/unknown', 404),
+    ('GET', '/public/v1/helpdesk/cases', 405),
+))
+async def test_fake_connect_api_unknown_requests(fake_connect, method, path, status):
+    async with httpx.AsyncClient() as client:
+        response = await client.request(method, f'http://127.0.0.1:{fake_connect.port}{path}')
+
+    assert response.status_code == status
+    assert response.json()['error_code'] == f'HTTP_{status}'
+
+
+@pytest.mark.asyncio
+async def test_fake_connect_api_latency(mocker):
+    sleep = mocker.patch('dbaas.fake_connect.asyncio.sleep', mocker.AsyncMock())
+    api = FakeConnectApi(
+        latency=0.05,
+        jitter=0.01,
+        endpoint_latency={'helpdesk/cases': 0.3},
+        seed=1,
+    )
+
+    assert await api.handle('GET', '/public/v1/accounts/VA-000-000/users/UR-000-000', b'') == (
+        200, FakeConnectApi._user('VA-000-000', 'UR-000-000', {})[1],
+    )
+    status, _ = await api.handle('POST', '/public/v1/helpdesk/cases', b'{"subject": "S"}')
+    assert status == 201
+
+    (user_delay,), (case_delay,) = (call.args for call in sleep.await_args_list)
+    assert 0.05 <= user_delay <= 0.06
+    assert 0.3 <= case_delay <= 0.31
+
+
+@pytest.mark.asyncio
+async def test_fake_connect_api_error_rate(mocker):
+    api = FakeConnectApi(latency=0, error_rate=0.5, seed=1)
+
+    statuses = [
+        (await api.handle('POST', '/public/v1/helpdesk/cases', b'{}'))[0]
+        for _ in range(200)
+    ]
+
+    assert 60 < statuses.count(503) < 140
+    assert statuses.count(503) + statuses.count(201) == 200
+    assert api.errors['POST helpdesk/cases'] == statuses.count(503)
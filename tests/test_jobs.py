@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from dbaas.crypto import EncryptionMode, KeyRing
+from dbaas.database import Collections, DBEnvVar
+from dbaas.jobs import CredentialsReEncryption
+from dbaas.services import DB
+
+from tests.factories import DBFactory
+
+
+@pytest.fixture
+def rotated_config(config):
+    retired_key = config[DBEnvVar.ENCRYPTION_KEY]
+
+    return {
+        **config,
+        DBEnvVar.ENCRYPTION_KEY: Fernet.generate_key().hex(),
+        DBEnvVar.RETIRED_ENCRYPTION_KEYS: retired_key,
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_re_encrypts_credentials(db, config, rotated_config, logger, mocker):
+    sleep_p = mocker.patch('dbaas.jobs.asyncio.sleep')
+    credentials = {'username': 'user', 'password': 'pwd'}
+
+    db_documents = DBFactory.create_batch(5, credentials=DB._encrypt_dict(credentials, config))
+    no_credentials_db = DBFactory()
+    del no_credentials_db['credentials']
+    await db[Collections.DB].insert_many([*db_documents, no_credentials_db])
+
+    processed = await CredentialsReEncryption.run(
+        db, rotated_config, logger, batch_size=2, ops_per_second=None,
+    )
+
+    assert processed == 5
+    primary_only_config = {
+        **rotated_config,
+        DBEnvVar.RETIRED_ENCRYPTION_KEYS: None,
+    }
+    async for db_document in db[Collections.DB].find({'credentials': {'$exists': True}}):
+        assert DB._decrypt_dict(db_document['credentials'], primary_only_config) == credentials
+
+    assert await db[Collections.JOB].count_documents({}) == 0
+    sleep_p.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_resumes_from_checkpoint(db, config, rotated_config, logger):
+    db_documents = DBFactory.create_batch(3, credentials=DB._encrypt_dict({'a': 1}, config))
+    result = await db[Collections.DB].insert_many(db_documents)
+    await db[Collections.JOB].insert_one({
+        '_id': CredentialsReEncryption.NAME,
+        'last_id': result.inserted_ids[1],
+        'processed': 2,
+    })
+
+    processed = await CredentialsReEncryption.run(db, rotated_config, logger, ops_per_second=0)
+
+    assert processed == 3
+    untouched = await db[Collections.DB].find_one({'_id': result.inserted_ids[0]})
+    assert untouched['credentials'] == db_documents[0]['credentials']
+    logger.info.assert_any_call(
+        'Resuming re-encryption after %s (%d processed).', result.inserted_ids[1], 2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_restart_ignores_checkpoint(db, config, rotated_config, logger):
+    db_documents = DBFactory.create_batch(2, credentials=DB._encrypt_dict({'a': 1}, config))
+    result = await db[Collections.DB].insert_many(db_documents)
+    await db[Collections.JOB].insert_one({
+        '_id': CredentialsReEncryption.NAME,
+        'last_id': result.inserted_ids[1],
+        'processed': 2,
+    })
+
+    processed = await CredentialsReEncryption.run(
+        db, rotated_config, logger, ops_per_second=0, restart=True,
+    )
+
+    assert processed == 2
+
+
+@pytest.mark.asyncio
+async def test_run_nothing_to_re_encrypt(db, config, logger):
+    assert await CredentialsReEncryption.run(db, config, logger) == 0
+
+    logger.info.assert_called_once_with('Re-encryption is completed: %d documents.', 0)
+
+
+def test__prepare_update_matches_old_value(config, mocker):
+    key_ring = mocker.MagicMock()
+    key_ring.rotate.return_value = b'new'
+
+    update = CredentialsReEncryption._prepare_update({'_id': 1, 'credentials': b'old'}, key_ring)
+
+    assert update._filter == {'_id': 1, 'credentials': b'old'}
+    assert update._doc == {'$set': {'credentials': b'new'}}
+    key_ring.rotate.assert_called_once_with(b'old')
+
+
+def test__prepare_updates(mocker):
+    key_ring = mocker.MagicMock()
+    key_ring.rotate.side_effect = [b'n1', b'n2']
+
+    updates, skipped_documents = CredentialsReEncryption._prepare_updates(
+        [{'_id': 1, 'credentials': b'o1'}, {'_id': 2, 'credentials': b'o2'}],
+        key_ring,
+    )
+
+    assert [update._doc for update in updates] == [
+        {'$set': {'credentials': b'n1'}},
+        {'$set': {'credentials': b'n2'}},
+    ]
+    assert skipped_documents == []
+
+
+def test__prepare_updates_skips_invalid_tokens(mocker):
+    key_ring = mocker.MagicMock()
+    key_ring.rotate.side_effect = [b'n1', InvalidToken, b'n3']
+    db_documents = [{'_id': n, 'credentials': b'o'} for n in range(3)]
+
+    updates, skipped_documents = CredentialsReEncryption._prepare_updates(db_documents, key_ring)
+
+    assert [update._filter['_id'] for update in updates] == [0, 2]
+    assert skipped_documents == [db_documents[1]]
+
+
+def test__prepare_updates_skips_truncated_envelopes():
+    key_ring = KeyRing([Fernet.generate_key()], mode=EncryptionMode.ENVELOPE)
+    token = key_ring.encrypt(b'secret')
+    db_documents = [
+        {'_id': n, 'credentials': credentials}
+        for n, credentials in enumerate((token, token[:70], token[:80]))
+    ]
+
+    updates, skipped_documents = CredentialsReEncryption._prepare_updates(db_documents, key_ring)
+
+    assert [update._filter['_id'] for update in updates] == [0]
+    assert skipped_documents == db_documents[1:]
+
+
+@pytest.mark.asyncio
+async def test_run_skips_undecryptable_credentials(db, config, rotated_config, logger):
+    credentials = DB._encrypt_dict({'a': 1}, config)
+    corrupted_db = DBFactory(credentials=b'corrupted')
+    null_credentials_db = DBFactory(credentials=None)
+    db_documents = [
+        DBFactory(credentials=credentials),
+        corrupted_db,
+        null_credentials_db,
+        DBFactory(credentials=credentials),
+    ]
+    result = await db[Collections.DB].insert_many(db_documents)
+
+    processed = await CredentialsReEncryption.run(
+        db, rotated_config, logger, batch_size=10, ops_per_second=None,
+    )
+
+    assert processed == 2
+    primary_only_config = {**rotated_config, DBEnvVar.RETIRED_ENCRYPTION_KEYS: None}
+    for n in (0, 3):
+        db_document = await db[Collections.DB].find_one({'_id': result.inserted_ids[n]})
+        assert DB._decrypt_dict(db_document['credentials'], primary_only_config) == {'a': 1}
+
+    db_document = await db[Collections.DB].find_one({'_id': result.inserted_ids[1]})
+    assert db_document['credentials'] == b'corrupted'
+    logger.warning.assert_any_call(
+        'Skipped %s (%s): credentials cannot be decrypted.',
+        result.inserted_ids[1],
+        corrupted_db['id'],
+    )
+    logger.warning.assert_any_call(
+        '%d documents with undecryptable credentials were skipped.', 1,
+    )
+    assert await db[Collections.JOB].count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('ops_per_second, elapsed, delay', (
+    (10, 0.1, 0.9),
+    (100, 0.0, 0.1),
+))
+async def test__throttle_sleeps(mocker, ops_per_second, elapsed, delay):
+    mocker.patch('dbaas.jobs.time.monotonic', return_value=100 + elapsed)
+    sleep_p = mocker.patch('dbaas.jobs.asyncio.sleep')
+
+    await CredentialsReEncryption._throttle(100, 10, ops_per_second)
+
+    assert sleep_p.call_args[0][0] == pytest.approx(delay)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('ops_per_second, elapsed', ((None, 0), (0, 0), (10, 2)))
+async def test__throttle_does_not_sleep(mocker, ops_per_second, elapsed):
+    mocker.patch('dbaas.jobs.time.monotonic', return_value=100 + elapsed)
+    sleep_p = mocker.patch('dbaas.jobs.asyncio.sleep')
+
+    await CredentialsReEncryption._throttle(100, 10, ops_per_second)
+
+    sleep_p.assert_not_called()
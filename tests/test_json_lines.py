@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import io
+import json
+import threading
+
+import pytest
+
+from dbaas.json_lines import JsonLinesWriter
+
+
+def test_json_lines_writer():
+    stream = io.StringIO()
+    writer = JsonLinesWriter(stream)
+
+    writer.write({'a': 1})
+    writer.write({'at': b'bytes'})
+    writer.flush()
+
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {'a': 1},
+        {'at': "b'bytes'"},
+    ]
+
+    writer.close()
+    assert not stream.closed
+    assert not writer._thread.is_alive()
+
+
+@pytest.fixture()
+def blocked_stream(mocker):
+    """ A stream whose first write blocks until `release` is set. """
+    stream = mocker.MagicMock()
+    stream.writing = threading.Event()
+    stream.release = threading.Event()
+
+    def write(data):
+        stream.writing.set()
+        stream.release.wait()
+
+    stream.write.side_effect = write
+
+    return stream
+
+
+def test_json_lines_writer_batches(blocked_stream):
+    writer = JsonLinesWriter(blocked_stream, max_batch_size=2)
+
+    writer.write({'n': 0})
+    blocked_stream.writing.wait()
+    for n in range(1, 4):
+        writer.write({'n': n})
+    blocked_stream.release.set()
+    writer.close()
+
+    assert [call.args[0] for call in blocked_stream.write.call_args_list] == [
+        '{"n": 0}\n',
+        '{"n": 1}\n{"n": 2}\n',
+        '{"n": 3}\n',
+    ]
+    assert blocked_stream.flush.call_count == 3
+
+
+def test_json_lines_writer_drops_when_full(blocked_stream):
+    writer = JsonLinesWriter(blocked_stream, max_queue_size=2)
+
+    writer.write({'n': 0})
+    blocked_stream.writing.wait()
+    for n in range(1, 5):
+        writer.write({'n': n})
+    blocked_stream.release.set()
+    writer.close()
+
+    assert writer.dropped == 2
+    assert blocked_stream.write.call_args_list[-1].args[0] == '{"n": 1}\n{"n": 2}\n'
+
+    writer.write({'n': 5})
+    assert writer.dropped == 3
+
+
+def test_json_lines_writer_close(tmp_path):
+    stream = open(tmp_path / 'lines.jsonl', 'a', encoding='utf-8')
+    writer = JsonLinesWriter(stream, close_stream=True)
+
+    writer.write({'a': 1})
+    writer.close()
+    writer.close()
+
+    assert stream.closed
+    assert (tmp_path / 'lines.jsonl').read_text() == '{"a": 1}\n'
+
+
+def test_json_lines_writer_write_error(mocker, caplog):
+    stream = mocker.MagicMock()
+    stream.write.side_effect = OSError('No space left on device')
+    writer = JsonLinesWriter(stream)
+
+    writer.write({'a': 1})
+    writer.flush()
+    writer.write({'a': 2})
+    writer.close()
+
+    assert stream.write.call_count == 2
+    assert 'Failed to write 1 JSON lines: No space left on device' in caplog.text
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import json
+import re
+from collections import Counter
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from dbaas.constants import ContextCallTypes, DBStatus
+from dbaas.database import Collections, get_db
+from dbaas.fake_connect import FakeConnectApi
+from dbaas.loadtest import (
+    AppServer,
+    build_app,
+    LoadReport,
+    LoadTest,
+    percentile,
+    run_load_test,
+    WORKLOADS,
+)
+from dbaas.seed import DatasetSeeder
+
+
+ACCOUNTS = ['VA-000-000', 'VA-000-001']
+
+
+class FakeApi:
+    """ Answers the API requests of the load test from memory. """
+
+    def __init__(self):
+        self.databases = {
+            'DBS-000': {'id': 'DBS-000', 'status': DBStatus.ACTIVE, 'account': ACCOUNTS[0]},
+            'DBS-001': {'id': 'DBS-001', 'status': DBStatus.REVIEWING, 'account': ACCOUNTS[0]},
+            'DBS-002': {'id': 'DBS-002', 'status': DBStatus.ACTIVE, 'account': ACCOUNTS[1]},
+        }
+        self.requests = Counter()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        headers = request.headers
+        assert headers['x-connect-api-gateway-url'] == 'http://connect/public/v1'
+        assert json.loads(headers['x-connect-config']) == {'DB_NAME': 'db'}
+
+        account_id = headers['x-connect-account-id']
+        path = request.url.path.removeprefix('/api')
+        self.requests[f'{request.method} {re.sub(r"DBS-[0-9]+", "{id}", path)}'] += 1
+
+        if path == '/v1/regions':
+            return httpx.Response(200, json=[{'id': 'eu', 'name': 'EU'}])
+
+        if path == '/v1/databases' and request.method == 'GET':
+            return httpx.Response(200, json=[
+                db for db in self.databases.values() if db['account'] == account_id
+            ])
+
+        if path == '/v1/databases':
+            data = json.loads(request.content)
+            assert data['tech_contact']['id'] == account_id.replace('VA-', 'UR-')
+            assert data['region']['id'] == 'eu'
+
+            db_id = f'DBS-{len(self.databases):03}'
+            self.databases[db_id] = {
+                'id': db_id, 'status': DBStatus.REVIEWING, 'account': account_id,
+            }
+            return httpx.Response(201, json=self.databases[db_id])
+
+        db_id, action = re.fullmatch(r'/v1/databases/([^/]+)/?(\w*)', path).groups()
+        db = self.databases[db_id]
+        if action == 'reconfigure':
+            if db['status'] != DBStatus.ACTIVE:
+                return httpx.Response(400, json={'message': 'Only active DB can be reconfigured.'})
+            db['status'] = DBStatus.RECONFIGURING
+
+        elif action == 'activate':
+            assert headers['x-connect-call-type'] == ContextCallTypes.ADMIN
+            db['status'] = DBStatus.ACTIVE
+
+        return httpx.Response(200, json=db)
+
+
+@pytest.fixture()
+def fake_api():
+    return FakeApi()
+
+
+@pytest.fixture()
+async def load_test(fake_api):
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(fake_api),
+        base_url='http://dbaas/api',
+    ) as client:
+        load_test = LoadTest(
+            client, 'http://connect/public/v1', {'DB_NAME': 'db'}, ACCOUNTS, seed=1,
+        )
+        await load_test.prepare()
+
+        yield load_test
+
+
+@pytest.mark.parametrize('q, expected', ((0, 1), (50, 5), (90, 9), (99, 10), (100, 10)))
+def test_percentile(q, expected):
+    assert percentile(list(range(1, 11)), q) == expected
+
+
+def test_percentile_empty():
+    assert percentile([], 50) == 0.0
+
+
+def test_load_report():
+    report = LoadReport('mixed', concurrency=2)
+    for duration in (0.01, 0.02, 0.03, 0.04):
+        report.record('list', 200, duration)
+    report.record('create', 400, 0.1)
+    report.skipped['reconfigure'] += 1
+    report.elapsed = 2.0
+
+    data = report.to_dict()
+    assert data['requests'] == 5
+    assert data['throughput'] == 2.5
+    assert data['skipped'] == {'reconfigure': 1}
+    assert data['operations'] == [
+        {
+            'operation': 'create',
+            'requests': 1,
+            'errors': 1,
+            'throughput': 0.5,
+            'p50': 0.1,
+            'p90': 0.1,
+            'p99': 0.1,
+            'max': 0.1,
+            'statuses': {'400': 1},
+        },
+        {
+            'operation': 'list',
+            'requests': 4,
+            'errors': 0,
+            'throughput': 2.0,
+            'p50': 0.02,
+            'p90': 0.04,
+            'p99': 0.04,
+            'max': 0.04,
+            'statuses': {'200': 4},
+        },
+    ]
+
+    rendered = report.render()
+    lines = rendered.splitlines()
+    assert lines[0] == 'mixed: 5 requests in 2.00 s, 2.5 req/s, concurrency 2'
+    assert lines[1].split() == [
+        'operation', 'requests', 'errors', 'req/s', 'p50', 'ms', 'p90', 'ms', 'p99', 'ms', 'max',
+        'ms',
+    ]
+    assert lines[3].split() == ['list', '4', '0', '2.0', '20.0', '40.0', '40.0', '40.0']
+    assert lines[4] == '  reconfigure: 1 skipped, no database to act on'
+
+
+@pytest.mark.asyncio
+async def test_load_test_prepare(load_test):
+    assert load_test.regions == ['eu']
+    assert load_test.databases == {ACCOUNTS[0]: ['DBS-000', 'DBS-001'], ACCOUNTS[1]: ['DBS-002']}
+    assert load_test.active_databases == {ACCOUNTS[0]: ['DBS-000'], ACCOUNTS[1]: ['DBS-002']}
+
+
+@pytest.mark.asyncio
+async def test_load_test_list_heavy(load_test, fake_api):
+    report = await load_test.run('list-heavy', requests=50, concurrency=5)
+
+    requests = report.to_dict()['requests']
+    assert requests == 50
+    assert set(report.durations) == {'list', 'retrieve'}
+    assert len(report.durations['list']) > len(report.durations['retrieve'])
+    assert fake_api.requests['GET /v1/databases/{id}'] == len(report.durations['retrieve'])
+
+
+@pytest.mark.asyncio
+async def test_load_test_create_burst(load_test, fake_api):
+    report = await load_test.run('create-burst', requests=10, concurrency=10)
+
+    assert report.statuses == {'create': {201: 10}}
+    assert len(fake_api.databases) == 13
+    assert sum(len(db_ids) for db_ids in load_test.databases.values()) == 13
+
+
+@pytest.mark.asyncio
+async def test_load_test_reconfigure_storm(load_test, fake_api):
+    report = await load_test.run('reconfigure-storm', requests=20, concurrency=4)
+
+    reconfigured = len(report.durations['reconfigure'])
+    assert reconfigured + report.skipped['reconfigure'] == 20
+    assert report.statuses['reconfigure'] == {200: reconfigured}
+    assert report.statuses['activate'] == {200: reconfigured}
+    assert sorted(db_id for db_ids in load_test.active_databases.values() for db_id in db_ids) == [
+        'DBS-000', 'DBS-002',
+    ]
+    assert {db['status'] for db in fake_api.databases.values()} == {
+        DBStatus.ACTIVE, DBStatus.REVIEWING,
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_test_reconfigure_failure_keeps_database(load_test, fake_api):
+    fake_api.databases['DBS-000']['status'] = DBStatus.RECONFIGURING
+    load_test.accounts = [ACCOUNTS[0]]
+
+    report = await load_test.run('reconfigure-storm', requests=3, concurrency=1)
+
+    assert report.statuses == {'reconfigure': {400: 3}}
+    assert load_test.active_databases[ACCOUNTS[0]] == ['DBS-000']
+
+
+@pytest.mark.asyncio
+async def test_load_test_skips_without_databases(load_test):
+    load_test.databases = {account_id: [] for account_id in ACCOUNTS}
+    load_test.active_databases = {account_id: [] for account_id in ACCOUNTS}
+
+    list_heavy = await load_test.run('list-heavy', requests=40, concurrency=2)
+    reconfigure_storm = await load_test.run('reconfigure-storm', requests=5, concurrency=2)
+
+    assert list_heavy.skipped['retrieve'] == 40 - len(list_heavy.durations['list'])
+    assert 'retrieve' not in list_heavy.durations
+    assert reconfigure_storm.skipped == {'reconfigure': 5}
+    assert not reconfigure_storm.durations
+
+
+def test_workloads():
+    assert set(WORKLOADS) == {'list-heavy', 'create-burst', 'reconfigure-storm', 'mixed'}
+    for weights in WORKLOADS.values():
+        assert all(hasattr(LoadTest, f'_{operation}') for operation in weights)
+
+
+def test_build_app():
+    app = build_app()
+
+    paths = {route.path for route in app.routes}
+    assert '/api/v1/databases' in paths
+    assert '/api/v1/databases/{db_id}/reconfigure' in paths
+    assert app.root_path == '/public/v1'
+    assert len(app.user_middleware) == 5
+
+
+def test_app_server(config, logger, mocker):
+    app = FastAPI()
+    app.get('/api/v1/ping')(lambda: {'pong': True})
+    start_app = mocker.patch('dbaas.loadtest.start_app', return_value=app)
+    close_db_clients = mocker.patch('dbaas.loadtest.close_db_clients')
+
+    server = AppServer(logger, config)
+    server.start()
+    try:
+        response = httpx.get(f'{server.url}/v1/ping')
+
+    finally:
+        server.stop()
+
+    assert response.json() == {'pong': True}
+    assert server.url == f'http://127.0.0.1:{server.port}/api'
+    start_app.assert_awaited_once_with(logger, config)
+    assert close_db_clients.call_count == 2
+    assert not server._thread.is_alive()
+
+
+def test_app_server_startup_error(config, logger, mocker):
+    mocker.patch('dbaas.loadtest.start_app', side_effect=ValueError('No database.'))
+    mocker.patch('dbaas.loadtest.close_db_clients')
+
+    server = AppServer(logger, config)
+    with pytest.raises(ValueError, match='No database.'):
+        server.start()
+
+    server.stop()
+    assert server.port is None
+
+
+@pytest.mark.asyncio
+async def test_run_load_test(config, logger, patch_connection_string, db, mocker):
+    mocker.patch('dbaas.webapp.start_loop_monitor')
+    connect_api = FakeConnectApi(latency=0)
+    connect_api.start()
+
+    seeder = DatasetSeeder(config, accounts=3, regions=1, seed=1)
+    try:
+        reports = await run_load_test(
+            config,
+            logger,
+            connect_api,
+            workloads=['list-heavy', 'reconfigure-storm'],
+            requests=20,
+            concurrency=4,
+            seeder=seeder,
+            documents=30,
+            seed=1,
+        )
+
+    finally:
+        connect_api.stop()
+
+    list_heavy, reconfigure_storm = reports
+    assert list_heavy.statuses['list'] == {200: len(list_heavy.durations['list'])}
+    assert reconfigure_storm.statuses['activate'] == {
+        200: len(reconfigure_storm.durations['reconfigure']),
+    }
+    assert connect_api.requests['POST helpdesk/cases'] == len(
+        reconfigure_storm.durations['reconfigure'],
+    )
+    assert await get_db(config)[Collections.DB].count_documents({}) == 30
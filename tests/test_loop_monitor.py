@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dbaas.loop_monitor import (
+    EVENT_LOOP_BLOCKED,
+    EVENT_LOOP_LAG,
+    EventLoopMonitor,
+    start_loop_monitor,
+)
+
+
+def _blocking_step():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor(metrics, caplog):
+    monitor = EventLoopMonitor(threshold=0.05, interval=0.01)
+    monitor.start()
+
+    with caplog.at_level('WARNING', logger='dbaas.loop_monitor'):
+        await asyncio.sleep(0.05)
+        _blocking_step()
+        await asyncio.sleep(0.05)
+
+    monitor.stop()
+
+    assert EVENT_LOOP_BLOCKED._values == {(): 1}
+    assert EVENT_LOOP_LAG._values[()][-1] > 1
+    assert EVENT_LOOP_LAG._values[()][-2] >= 0.1
+
+    record = caplog.records[-1]
+    assert record.blocked_ms >= 50
+    assert '_blocking_step (tests/test_loop_monitor.py:' in record.stack[-1]
+    assert '_blocking_step' in record.getMessage()
+
+
+def test_event_loop_monitor_check_is_not_blocked(metrics):
+    monitor = EventLoopMonitor(threshold=0.05)
+    monitor.thread_id = threading.get_ident()
+
+    monitor.check()
+
+    assert EVENT_LOOP_BLOCKED._values == {}
+
+
+def test_event_loop_monitor_check_reports_once(metrics):
+    monitor = EventLoopMonitor(threshold=0.05)
+    monitor.thread_id = threading.get_ident()
+    monitor._heartbeat -= 1
+
+    monitor.check()
+    monitor.check()
+
+    assert EVENT_LOOP_BLOCKED._values == {(): 1}
+
+
+def test_event_loop_monitor_check_unknown_thread(metrics):
+    monitor = EventLoopMonitor(threshold=0.05)
+    monitor.thread_id = -1
+    monitor._heartbeat -= 1
+
+    monitor.check()
+
+    assert EVENT_LOOP_BLOCKED._values == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('config, threshold', (
+    ({}, 0.1),
+    ({'DB_LOOP_BLOCK_THRESHOLD_MS': '20'}, 0.02),
+))
+async def test_start_loop_monitor(mocker, config, threshold):
+    mocker.patch('dbaas.loop_monitor._monitor', None)
+    start_p = mocker.patch.object(EventLoopMonitor, 'start')
+
+    monitor = start_loop_monitor(config)
+
+    assert monitor.threshold == threshold
+    assert start_loop_monitor(config) is monitor
+    start_p.assert_called_once_with()
+
+
+def test_start_loop_monitor_disabled(mocker):
+    mocker.patch('dbaas.loop_monitor._monitor', None)
+
+    assert start_loop_monitor({'DB_LOOP_BLOCK_THRESHOLD_MS': '0'}) is None
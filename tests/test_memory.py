@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import tracemalloc
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from dbaas.memory import (
+    get_allocation_diff,
+    get_object_counts,
+    get_snapshot_report,
+    get_top_allocations,
+    MemorySnapshots,
+)
+from dbaas.schemas import RegionOut
+
+
+@pytest.fixture()
+def snapshots(mocker):
+    snapshots = MemorySnapshots(max_size=2)
+    mocker.patch('dbaas.memory.memory_snapshots', snapshots)
+    mocker.patch('dbaas.webapp.memory_snapshots', snapshots)
+
+    yield snapshots
+
+    snapshots.stop()
+
+
+def _allocate():
+    return [bytearray(1024) for _ in range(100)]
+
+
+def test_memory_snapshots_start_stop(snapshots):
+    snapshots.start()
+    assert snapshots.is_tracing()
+    assert tracemalloc.get_traceback_limit() == 1
+
+    snapshots.start(3)
+    assert tracemalloc.get_traceback_limit() == 3
+
+    snapshots.take()
+    snapshots.stop()
+
+    assert not snapshots.is_tracing()
+    assert len(snapshots._snapshots) == 0
+
+
+def test_memory_snapshots_take(snapshots):
+    snapshots.start()
+
+    first, previous = snapshots.take()
+    assert previous is None
+
+    second, previous = snapshots.take()
+    assert previous is first
+
+    third, previous = snapshots.take()
+    assert previous is second
+    assert list(snapshots._snapshots) == [second, third]
+
+
+def test_memory_snapshots_take_not_tracing(snapshots):
+    with pytest.raises(ValueError) as e:
+        snapshots.take()
+
+    assert str(e.value) == 'Memory tracing is not enabled.'
+
+
+def test_get_top_allocations(snapshots):
+    snapshots.start()
+    allocated = _allocate()  # noqa: F841
+    snapshot, _ = snapshots.take()
+
+    top = get_top_allocations(snapshot['snapshot'], limit=5)
+
+    assert len(top) <= 5
+    assert top[0]['location'].startswith('tests/test_memory.py:')
+    assert top[0]['size_bytes'] >= 100 * 1024
+
+
+def test_get_top_allocations_with_traceback(snapshots):
+    snapshots.start(2)
+    allocated = _allocate()  # noqa: F841
+    snapshot, _ = snapshots.take()
+
+    top = get_top_allocations(snapshot['snapshot'], limit=1)
+
+    assert top[0]['location'].count(' < ') == 1
+
+
+def test_get_allocation_diff(snapshots):
+    snapshots.start()
+    previous, _ = snapshots.take()
+    allocated = _allocate()  # noqa: F841
+    snapshot, _ = snapshots.take()
+
+    diff = get_allocation_diff(snapshot['snapshot'], previous['snapshot'], limit=3)
+
+    assert diff[0]['location'].startswith('tests/test_memory.py:')
+    assert diff[0]['size_diff_bytes'] >= 100 * 1024
+    assert diff[0]['count_diff'] >= 100
+
+
+def test_get_object_counts():
+    objects = [
+        {'_id': 1, 'id': 'DB-1'},
+        RegionOut(id='RG-1', name='Region'),
+        AsyncIOMotorClient(connect=False),
+    ]
+
+    counts = get_object_counts()
+
+    assert counts['documents'] >= 1
+    assert counts['pydantic_models'] >= 1
+    assert counts['motor_clients'] >= 1
+    assert counts['mongo_clients'] >= 1
+    objects[2].close()
+
+
+def test_get_snapshot_report(snapshots):
+    snapshots.start()
+    # Allocations of two lines, so the top doesn't depend on other threads allocating.
+    first_buffer = bytearray(4096)
+    second_buffer = bytearray(4096)
+
+    first = get_snapshot_report(limit=2)
+    second = get_snapshot_report(limit=2)
+
+    assert first['previous_id'] is None
+    assert first['diff'] is None
+    assert len(first['top']) == 2
+    assert second['previous_id'] == first['id']
+    assert isinstance(second['diff'], list)
+    assert set(second['objects']) == {
+        'documents', 'pydantic_models', 'motor_clients', 'mongo_clients',
+    }
+
+    del first_buffer, second_buffer
+
+
+def test_update_memory_tracing(admin_api_client, snapshots):
+    response = admin_api_client.put('/api/v1/memory/tracing', json={'enabled': True, 'frames': 2})
+
+    assert response.status_code == 200
+    assert response.json()['enabled'] is True
+    assert tracemalloc.get_traceback_limit() == 2
+
+    response = admin_api_client.put('/api/v1/memory/tracing', json={'enabled': False})
+
+    assert response.json() == {'enabled': False, 'current_bytes': 0, 'peak_bytes': 0}
+
+
+def test_create_memory_snapshot(admin_api_client, snapshots):
+    snapshots.start()
+
+    response = admin_api_client.post('/api/v1/memory/snapshots', params={'limit': 3})
+
+    assert response.status_code == 201
+    assert len(response.json()['top']) == 3
+    assert response.json()['diff'] is None
+
+
+def test_create_memory_snapshot_not_tracing(admin_api_client, snapshots):
+    response = admin_api_client.post('/api/v1/memory/snapshots')
+
+    assert response.status_code == 400
+    assert response.json() == {'message': 'Memory tracing is not enabled.'}
+
+
+def test_get_memory_objects(admin_api_client, mocker):
+    counts = {'documents': 1, 'pydantic_models': 2, 'motor_clients': 3, 'mongo_clients': 3}
+    mocker.patch('dbaas.webapp.get_object_counts', return_value=counts)
+
+    response = admin_api_client.get('/api/v1/memory/objects')
+
+    assert response.status_code == 200
+    assert response.json() == counts
+
+
+@pytest.mark.parametrize('method, url, kwargs', (
+    ('put', '/api/v1/memory/tracing', {'json': {'enabled': True}}),
+    ('post', '/api/v1/memory/snapshots', {}),
+    ('get', '/api/v1/memory/objects', {}),
+))
+def test_memory_endpoints_403(api_client, snapshots, method, url, kwargs):
+    response = getattr(api_client, method)(url, **kwargs)
+
+    assert response.status_code == 403
+    assert not snapshots.is_tracing()
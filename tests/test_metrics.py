@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+from connect.client import ClientError
+
+from dbaas.metrics import (
+    CONNECT_REQUEST_DURATION,
+    CONNECT_REQUEST_ERRORS,
+    Counter,
+    Gauge,
+    get_connect_endpoint,
+    get_mongo_event_listeners,
+    Histogram,
+    HTTP_REQUEST_DURATION,
+    HTTP_RESPONSES,
+    MetricsRegistry,
+    MONGO_COMMAND_DURATION,
+    MONGO_COMMAND_FAILURES,
+    MONGO_POOL_CHECKED_OUT,
+    MONGO_POOL_CONNECTIONS,
+    MONGO_POOL_MAX_SIZE,
+    MongoCommandMetrics,
+    MongoPoolMetrics,
+    observe_connect_call,
+)
+
+from tests.factories import DBFactory
+
+
+def test_counter_render():
+    counter = Counter('c_total', 'Some counter.', ('a', 'b'))
+    counter.inc(a='x', b=1)
+    counter.inc(2.5, a='x', b=1)
+    counter.inc(a='y"\\\n', b=2)
+
+    assert counter.render() == [
+        '# HELP c_total Some counter.',
+        '# TYPE c_total counter',
+        'c_total{a="x",b="1"} 3.5',
+        'c_total{a="y\\"\\\\\\n",b="2"} 1',
+    ]
+
+
+def test_counter_invalid_labels():
+    counter = Counter('c_total', 'Some counter.', ('a',))
+
+    with pytest.raises(ValueError):
+        counter.inc(b='x')
+
+
+def test_gauge_render():
+    gauge = Gauge('g', 'Some gauge.')
+    gauge.inc()
+    gauge.inc(3)
+    gauge.dec()
+
+    assert gauge.render()[-1] == 'g 3'
+
+    gauge.set(0.5)
+    assert gauge.render()[-1] == 'g 0.5'
+
+
+def test_histogram_render():
+    histogram = Histogram('h_seconds', 'Some histogram.', ('route',), buckets=(1, 0.1))
+    histogram.observe(0.05, route='/a')
+    histogram.observe(0.5, route='/a')
+    histogram.observe(5, route='/a')
+
+    assert histogram.render() == [
+        '# HELP h_seconds Some histogram.',
+        '# TYPE h_seconds histogram',
+        'h_seconds_bucket{route="/a",le="0.1"} 1',
+        'h_seconds_bucket{route="/a",le="1"} 2',
+        'h_seconds_bucket{route="/a",le="+Inf"} 3',
+        'h_seconds_sum{route="/a"} 5.55',
+        'h_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_registry_render_and_clear():
+    registry = MetricsRegistry()
+    counter = registry.counter('c_total', 'Counter.')
+    gauge = registry.gauge('g', 'Gauge.')
+    counter.inc()
+    gauge.set(2)
+
+    assert registry.render() == (
+        '# HELP c_total Counter.\n'
+        '# TYPE c_total counter\n'
+        'c_total 1\n'
+        '# HELP g Gauge.\n'
+        '# TYPE g gauge\n'
+        'g 2\n'
+    )
+
+    registry.clear()
+    assert 'c_total 1' not in registry.render()
+
+
+@pytest.mark.parametrize('db_document, status', ((DBFactory(), 200), (None, 404)))
+def test_metrics_middleware(api_client, mocker, metrics, db_document, status):
+    mocker.patch('dbaas.webapp.DB.retrieve', return_value=db_document)
+    route = '/api/v1/databases/{db_id}'
+
+    api_client.get('/api/v1/databases/DB-1')
+
+    assert HTTP_RESPONSES._values == {('GET', route, str(status)): 1}
+    assert HTTP_REQUEST_DURATION._values[('GET', route)][-1] == 1
+
+
+def test_metrics_middleware_unmatched_route(api_client, metrics):
+    api_client.get('/api/v2/unknown')
+
+    assert HTTP_RESPONSES._values == {('GET', 'unmatched', '404'): 1}
+
+
+def test_metrics_middleware_error(api_client, mocker, metrics):
+    mocker.patch('dbaas.webapp.DB.list', side_effect=RuntimeError)
+
+    with pytest.raises(RuntimeError):
+        api_client.get('/api/v1/databases')
+
+    assert HTTP_RESPONSES._values == {('GET', '/api/v1/databases', '500'): 1}
+
+
+def test_mongo_command_metrics(mocker, metrics):
+    listener = MongoCommandMetrics()
+    listener.started(mocker.MagicMock())
+    listener.succeeded(mocker.MagicMock(command_name='find', duration_micros=2000))
+    listener.failed(mocker.MagicMock(command_name='insert', duration_micros=500))
+
+    assert MONGO_COMMAND_DURATION._values[('find',)][-2:] == [0.002, 1]
+    assert MONGO_COMMAND_DURATION._values[('insert',)][-2:] == [0.0005, 1]
+    assert MONGO_COMMAND_FAILURES._values == {('insert',): 1}
+
+
+def test_mongo_pool_metrics(mocker, metrics):
+    listener = MongoPoolMetrics()
+    address = ('db.host', 27017)
+
+    listener.pool_created(mocker.MagicMock(address=address, options={'maxPoolSize': 10}))
+    listener.pool_ready(mocker.MagicMock(address=address))
+    listener.connection_created(mocker.MagicMock(address=address))
+    listener.connection_ready(mocker.MagicMock(address=address))
+    listener.connection_created(mocker.MagicMock(address=address))
+    listener.connection_check_out_started(mocker.MagicMock(address=address))
+    listener.connection_checked_out(mocker.MagicMock(address=address))
+    listener.connection_check_out_failed(mocker.MagicMock(address=address))
+
+    assert MONGO_POOL_MAX_SIZE._values == {('db.host:27017',): 10}
+    assert MONGO_POOL_CONNECTIONS._values == {('db.host:27017',): 2}
+    assert MONGO_POOL_CHECKED_OUT._values == {('db.host:27017',): 1}
+
+    listener.connection_checked_in(mocker.MagicMock(address=address))
+    listener.pool_cleared(mocker.MagicMock(address=address))
+    listener.connection_closed(mocker.MagicMock(address=address))
+    listener.connection_closed(mocker.MagicMock(address=address))
+    listener.pool_closed(mocker.MagicMock(address=address))
+
+    assert MONGO_POOL_MAX_SIZE._values == {('db.host:27017',): 0}
+    assert MONGO_POOL_CONNECTIONS._values == {('db.host:27017',): 0}
+    assert MONGO_POOL_CHECKED_OUT._values == {('db.host:27017',): 0}
+
+
+def test_mongo_pool_metrics_default_max_pool_size(mocker, metrics):
+    MongoPoolMetrics().pool_created(mocker.MagicMock(address=('h', 1), options={}))
+
+    assert MONGO_POOL_MAX_SIZE._values == {('h:1',): 100}
+
+
+def test_get_mongo_event_listeners():
+    listeners = get_mongo_event_listeners()
+
+    assert [type(listener) for listener in listeners] == [MongoCommandMetrics, MongoPoolMetrics]
+    assert listeners[1] is not get_mongo_event_listeners()[1]
+
+
+@pytest.mark.parametrize('path, endpoint', (
+    ('devops/services/SRVC-000/installations/EIN-123/impersonate', (
+        'devops/services/{id}/installations/{id}/impersonate'
+    )),
+    ('/helpdesk/cases/CA-123-456/resolve', 'helpdesk/cases/{id}/resolve'),
+    ('users/UR-123-456-789?limit=10', 'users/{id}'),
+    ('accounts', 'accounts'),
+))
+def test_get_connect_endpoint(path, endpoint):
+    assert get_connect_endpoint(path) == endpoint
+
+
+def test_observe_connect_call_ok(metrics):
+    with observe_connect_call('get', 'users/UR-123'):
+        pass
+
+    assert CONNECT_REQUEST_DURATION._values[('GET', 'users/{id}')][-1] == 1
+    assert CONNECT_REQUEST_ERRORS._values == {}
+
+
+def test_observe_connect_call_error(metrics):
+    with pytest.raises(ClientError):
+        with observe_connect_call('post', 'helpdesk/cases'):
+            raise ClientError(status_code=400)
+
+    assert CONNECT_REQUEST_DURATION._values[('POST', 'helpdesk/cases')][-1] == 1
+    assert CONNECT_REQUEST_ERRORS._values == {('POST', 'helpdesk/cases', '400'): 1}
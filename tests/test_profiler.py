@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import threading
+import time
+
+import pytest
+
+from dbaas.profiler import ProfileStore, SamplingProfiler
+
+from tests.factories import DBFactory
+
+
+ADMIN_CONTEXT = {'call_type': 'admin'}
+
+
+@pytest.fixture()
+def profiles(mocker):
+    store = ProfileStore()
+    mocker.patch('dbaas.profiler.profiles', store)
+    mocker.patch('dbaas.webapp.profiles', store)
+
+    return store
+
+
+def _busy_loop():
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampling_profiler():
+    profiler = SamplingProfiler(threading.get_ident(), interval=0.001)
+
+    profiler.start()
+    _busy_loop()
+    profiler.stop()
+
+    folded = profiler.folded()
+    assert sum(profiler.samples.values()) > 0
+    assert '_busy_loop (tests/test_profiler.py:' in folded
+    assert folded.splitlines()[0].rsplit(' ', 1)[1].isdigit()
+
+
+def test_sampling_profiler_unknown_thread():
+    profiler = SamplingProfiler(-1)
+
+    profiler.sample()
+
+    assert profiler.folded() == ''
+
+
+def test_sampling_profiler_folded():
+    profiler = SamplingProfiler(1)
+    profiler.samples[('a', 'b')] = 1
+    profiler.samples[('a', 'c')] = 3
+
+    assert profiler.folded() == 'a;c 3\na;b 1'
+
+
+def test_profile_store():
+    store = ProfileStore(max_size=2)
+    for profile_id in ('a', 'b', 'c'):
+        store.add({'id': profile_id})
+
+    assert store.get('a') is None
+    assert store.get('c') == {'id': 'c'}
+
+
+@pytest.mark.parametrize('params, headers', (
+    ({'profile': '1'}, {}),
+    ({}, {'X-DBaaS-Profile': '1'}),
+))
+def test_profiling_middleware(api_client, mocker, profiles, params, headers):
+    mocker.patch('dbaas.webapp.DB.list', return_value=[DBFactory()])
+
+    response = api_client.get(
+        '/api/v1/databases',
+        params=params,
+        headers=headers,
+        context=ADMIN_CONTEXT,
+    )
+
+    assert response.status_code == 200
+    profile = profiles.get(response.headers['x-dbaas-profile-id'])
+    assert profile['method'] == 'GET'
+    assert profile['path'].endswith('/api/v1/databases')
+    assert profile['folded'] == '' or ' ' in profile['folded']
+
+
+@pytest.mark.parametrize('params, context', (
+    ({}, ADMIN_CONTEXT),
+    ({'profile': '1'}, {}),
+    ({'profile': '1'}, {'call_type': 'user'}),
+    ({'profile': '0'}, ADMIN_CONTEXT),
+))
+def test_profiling_middleware_is_skipped(api_client, mocker, profiles, params, context):
+    mocker.patch('dbaas.webapp.DB.list', return_value=[])
+    profiler_p = mocker.patch('dbaas.profiler.SamplingProfiler')
+
+    response = api_client.get('/api/v1/databases', params=params, context=context)
+
+    assert response.status_code == 200
+    assert 'x-dbaas-profile-id' not in response.headers
+    profiler_p.assert_not_called()
+
+
+def test_profiling_middleware_one_profile_at_a_time(api_client, mocker, profiles):
+    mocker.patch('dbaas.webapp.DB.list', return_value=[])
+    lock = mocker.patch('dbaas.profiler._profiling_lock')
+    lock.acquire.return_value = False
+
+    response = api_client.get(
+        '/api/v1/databases',
+        params={'profile': '1'},
+        context=ADMIN_CONTEXT,
+    )
+
+    assert 'x-dbaas-profile-id' not in response.headers
+    lock.release.assert_not_called()
+
+
+def test_profiling_middleware_error(api_client, mocker, profiles):
+    mocker.patch('dbaas.webapp.DB.list', side_effect=RuntimeError)
+    add_p = mocker.patch.object(profiles, 'add')
+
+    with pytest.raises(RuntimeError):
+        api_client.get('/api/v1/databases', params={'profile': '1'}, context=ADMIN_CONTEXT)
+
+    add_p.assert_called_once()
+
+
+def test_retrieve_profile_200(admin_api_client, profiles):
+    profiles.add({'id': 'abc', 'folded': 'a;b 1'})
+
+    response = admin_api_client.get('/api/v1/profiles/abc')
+
+    assert response.status_code == 200
+    assert response.text == 'a;b 1'
+
+
+def test_retrieve_profile_404(admin_api_client, profiles):
+    response = admin_api_client.get('/api/v1/profiles/abc')
+
+    assert response.status_code == 404
+    assert response.json() == {'message': 'Profile not found.'}
+
+
+def test_retrieve_profile_403(api_client, profiles):
+    profiles.add({'id': 'abc', 'folded': 'a;b 1'})
+
+    response = api_client.get('/api/v1/profiles/abc')
+
+    assert response.status_code == 403
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from dbaas.database import Collections
+from dbaas.query_shapes import (
+    get_plan_stages,
+    get_query_shapes,
+    get_winning_plan,
+    QueryShape,
+    verify_query_shapes,
+)
+
+from tests.factories import DBFactory, RegionFactory
+
+
+def test_get_query_shapes():
+    shapes = {shape.name: shape for shape in get_query_shapes()}
+
+    assert shapes['DB.list (admin)'].query == {'status': {'$ne': 'deleted'}}
+    assert shapes['DB.list'].query == {'status': {'$ne': 'deleted'}, 'account_id': 'VA-000-000'}
+    assert shapes['DB.list'].sort == [('events.created.at', -1)]
+    assert shapes['DB.changes (admin)'].query == {
+        'updated_at': {'$lte': datetime(2025, 1, 1, tzinfo=timezone.utc)},
+    }
+    assert len(shapes['DB.changes since'].query['$or']) == 2
+    assert shapes['DB.retrieve'].query['id'] == 'DB-000-000'
+    assert shapes['DB.retrieve_credentials'].projection == {'status': 1, 'credentials': 1}
+    assert shapes['DB.search by name'].sort == [('search_name', 1)]
+    assert shapes['DB.search by text'].query['$text'] == {'$search': 'db'}
+    assert shapes['DB.search by text'].query['account_id'] == 'VA-000-000'
+    assert 'DB.search by text (admin)' not in shapes
+    assert shapes['DB.bulk_action'].query['id'] == {'$in': ['DB-000-000', 'DB-000-001']}
+    assert shapes['DBStats.record_change'].collection == 'db_stats'
+    assert shapes['Region.retrieve_many'].collection == 'region'
+    assert shapes['LeadTimes._get_backlog'].query == {
+        'status': 'reviewing',
+        'region.id': 'eu-west',
+        'workload': 'small',
+    }
+    assert shapes['Region.list'].sort == [('name', 1)]
+
+
+def test_explain_command_find():
+    shape = QueryShape('s', 'c', {'a': 1}, sort=[('b', -1), ('c', 1)], projection={'d': 1})
+
+    command = shape.explain_command()
+
+    assert list(command.items()) == [
+        ('find', 'c'), ('filter', {'a': 1}), ('sort', {'b': -1, 'c': 1}), ('projection', {'d': 1}),
+    ]
+    assert list(command['sort']) == ['b', 'c']
+
+
+def test_explain_command_count():
+    command = QueryShape('s', 'c', {'a': 1}, command=QueryShape.COUNT).explain_command()
+
+    assert command == {'count': 'c', 'query': {'a': 1}}
+
+
+def test_explain_command_update():
+    command = QueryShape('s', 'c', {'a': 1}, command=QueryShape.UPDATE).explain_command()
+
+    assert command['update'] == 'c'
+    assert command['updates'][0]['q'] == {'a': 1}
+
+
+def test_get_plan_stages():
+    plan = {
+        'stage': 'FETCH',
+        'inputStage': {
+            'stage': 'SORT_MERGE',
+            'inputStages': [{'stage': 'IXSCAN'}, {'stage': 'COLLSCAN'}],
+        },
+    }
+
+    assert get_plan_stages(plan) == ['FETCH', 'SORT_MERGE', 'IXSCAN', 'COLLSCAN']
+
+
+@pytest.mark.parametrize('explain_result', (
+    {'queryPlanner': {'winningPlan': {'stage': 'IXSCAN'}}},
+    {'queryPlanner': {'winningPlan': {'queryPlan': {'stage': 'IXSCAN'}}}},
+))
+def test_get_winning_plan(explain_result):
+    assert get_winning_plan(explain_result) == {'stage': 'IXSCAN'}
+
+
+@pytest.mark.asyncio
+async def test_verify_query_shapes(mocker):
+    db = mocker.MagicMock()
+    db.command = AsyncMock(side_effect=(
+        {'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}}},
+        {'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}}},
+    ))
+    shapes = [QueryShape('good', 'c', {}), QueryShape('bad', 'c', {})]
+
+    problems = await verify_query_shapes(db, shapes)
+
+    assert problems == ['bad: COLLSCAN, SORT in SORT > COLLSCAN']
+    db.command.assert_called_with(
+        'explain',
+        shapes[1].explain_command(),
+        verbosity='queryPlanner',
+    )
+
+
+@pytest.mark.asyncio
+async def test_query_shapes_are_covered_by_indexes(db):
+    await db[Collections.DB].insert_many(DBFactory.create_batch(50))
+    await db[Collections.REGION].insert_many(RegionFactory.create_batch(2))
+
+    assert await verify_query_shapes(db) == []
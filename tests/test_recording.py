@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import io
+import json
+import threading
+
+import pytest
+
+from dbaas import recording
+from dbaas.recording import configure_recording, RequestRecorder, sanitize
+
+from tests.factories import DBFactory
+
+
+@pytest.fixture()
+def recorded(mocker):
+    stream = io.StringIO()
+    recorder = RequestRecorder(stream)
+    mocker.patch('dbaas.recording._recorder', recorder)
+
+    def get_recorded():
+        recorder.flush()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield get_recorded
+
+    recorder.close()
+
+
+def test_sanitize():
+    assert sanitize({
+        'workload': 'small',
+        'credentials': {'host': 'h', 'port': 27017, 'password': 'p', 'tls': True},
+        'users': [{'id': 'UR-1', 'password': 'p'}],
+        'description': None,
+        'items': [{'name': 'n', 'description': 'd', 'tech_contact': {'id': 'UR-1'}}],
+        'details': 'Call me at +1 555 0100',
+        'email': 'user@example.com',
+    }) == {
+        'workload': 'small',
+        'credentials': {
+            'host': 'redacted', 'port': 'redacted', 'password': 'redacted', 'tls': True,
+        },
+        'users': [{'id': 'UR-1', 'password': 'redacted'}],
+        'description': None,
+        'items': [{'name': 'redacted', 'description': 'redacted', 'tech_contact': {'id': 'UR-1'}}],
+        'details': 'redacted',
+        'email': 'redacted',
+    }
+
+
+@pytest.mark.parametrize('sample_rate, random_value, expected', (
+    (1, 0.99, True),
+    (0.1, 0.05, True),
+    (0.1, 0.5, False),
+    (0, 0, False),
+))
+def test_request_recorder_is_sampled(mocker, sample_rate, random_value, expected):
+    mocker.patch('dbaas.recording.random.random', return_value=random_value)
+
+    assert RequestRecorder(io.StringIO(), sample_rate).is_sampled() is expected
+
+
+def test_configure_recording(mocker, tmp_path):
+    mocker.patch('dbaas.recording._recorder', None)
+    path = tmp_path / 'requests.jsonl'
+
+    configure_recording({
+        'DB_REQUEST_RECORDING': str(path),
+        'DB_REQUEST_RECORDING_SAMPLE_RATE': '0.5',
+    })
+
+    assert recording._recorder.sample_rate == 0.5
+    stream = recording._recorder.stream
+    recording._recorder.record({'at': 1})
+    recording._recorder.flush()
+    assert path.read_text() == '{"at": 1}\n'
+
+    configure_recording({'DB_REQUEST_RECORDING': 'stdout'})
+    assert recording._recorder.sample_rate == 1
+    assert stream.closed
+
+    configure_recording({})
+    assert recording._recorder is None
+
+
+def test_request_recorder_writes_in_background(mocker):
+    stream = mocker.MagicMock()
+    recorder = RequestRecorder(stream, close_stream=True)
+    writer_thread = recorder._writer._thread
+    written_from = []
+    stream.write.side_effect = lambda data: written_from.append(threading.current_thread())
+
+    recorder.record({'at': 1})
+    recorder.close()
+
+    assert written_from == [writer_thread]
+    stream.close.assert_called_once_with()
+
+
+def test_recording_middleware(admin_api_client, mocker, recorded):
+    db_doc = DBFactory(status='active')
+    mocker.patch('dbaas.webapp.DB.retrieve', return_value=db_doc)
+    mocker.patch('dbaas.webapp.DB.activate', return_value=db_doc)
+
+    response = admin_api_client.post(
+        f"/api/v1/databases/{db_doc['id']}/activate?x=1&search=Jane",
+        json={'credentials': {'username': 'u', 'password': 'secret', 'host': 'h', 'name': 'n'}},
+        context={'call_type': 'admin'},
+        headers={'X-Connect-Installation-Api-Key': 'ApiKey SU-1:secret'},
+    )
+    assert response.status_code == 200
+
+    [trace] = recorded()
+    assert trace['at'] > 0
+    assert trace['duration'] > 0
+    assert {key: trace[key] for key in trace if key not in ('at', 'duration')} == {
+        'method': 'POST',
+        'path': f"/api/v1/databases/{db_doc['id']}/activate",
+        'route': '/api/v1/databases/{db_id}/activate',
+        'path_params': {'db_id': db_doc['id']},
+        'query': [['x', '1'], ['search', 'redacted']],
+        'context': {'account_id': 'redacted', 'call_type': 'admin', 'user_id': 'redacted'},
+        'body': {'credentials': {
+            'username': 'redacted', 'password': 'redacted', 'host': 'redacted', 'name': 'redacted',
+        }},
+        'status': 200,
+    }
+    assert 'secret' not in json.dumps(trace)
+    assert 'Jane' not in json.dumps(trace)
+
+
+def test_recording_middleware_unmatched_and_failed(api_client, mocker, recorded):
+    mocker.patch('dbaas.webapp.DB.list', side_effect=RuntimeError)
+
+    api_client.get('/api/unknown')
+    with pytest.raises(RuntimeError):
+        api_client.get('/api/v1/databases')
+
+    unmatched, failed = recorded()
+    assert unmatched['route'] is None
+    assert unmatched['status'] == 404
+    assert unmatched['body'] is None
+    assert failed['route'] == '/api/v1/databases'
+    assert failed['status'] == 500
+
+
+def test_recording_middleware_skips_large_and_invalid_bodies(api_client, mocker, recorded):
+    mocker.patch('dbaas.recording.MAX_BODY_SIZE', 10)
+
+    api_client.post('/api/v1/regions', json={'id': 'region', 'name': 'Long name'})
+    api_client.post('/api/v1/regions', content=b'not json')
+
+    assert [trace['body'] for trace in recorded()] == [None, None]
+
+
+def test_recording_middleware_disabled(api_client, mocker):
+    mocker.patch('dbaas.recording._recorder', None)
+    mocker.patch('dbaas.webapp.DB.list', return_value=[])
+
+    assert api_client.get('/api/v1/databases').status_code == 200
+
+
+def test_recording_middleware_not_sampled(api_client, mocker, recorded):
+    mocker.patch('dbaas.recording._recorder.sample_rate', 0)
+    mocker.patch('dbaas.webapp.DB.list', return_value=[])
+
+    api_client.get('/api/v1/databases')
+
+    assert recorded() == []
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import json
+
+import httpx
+import pytest
+
+from dbaas.replay import get_operation, get_recorded_report, load_traces, TraceReplayer
+
+
+def _trace(at: float, method: str = 'GET', path: str = '/api/v1/databases', **kwargs) -> dict:
+    return {
+        'at': at,
+        'method': method,
+        'path': path,
+        'route': path,
+        'path_params': {},
+        'query': [],
+        'context': {'call_type': 'user', 'account_id': 'redacted', 'user_id': 'redacted'},
+        'body': None,
+        'status': 200,
+        'duration': 0.1,
+        **kwargs,
+    }
+
+
+def test_load_traces():
+    lines = [json.dumps(_trace(2)), '', json.dumps(_trace(1)) + '\n']
+
+    assert [trace['at'] for trace in load_traces(lines)] == [1, 2]
+
+
+@pytest.mark.parametrize('route, expected', (
+    ('/api/v1/databases/{db_id}', 'GET /api/v1/databases/{db_id}'),
+    (None, 'GET /api/v1/databases/DB-1'),
+))
+def test_get_operation(route, expected):
+    assert get_operation(_trace(1, path='/api/v1/databases/DB-1', route=route)) == expected
+
+
+def test_get_recorded_report():
+    report = get_recorded_report([
+        _trace(10, duration=0.2),
+        _trace(11, method='POST', status=400, duration=0.5),
+        _trace(12, duration=0.1),
+    ])
+
+    assert report.elapsed == pytest.approx(2.1)
+    assert report.statuses == {
+        'GET /api/v1/databases': {200: 2},
+        'POST /api/v1/databases': {400: 1},
+    }
+    assert sorted(report.durations['GET /api/v1/databases']) == [0.1, 0.2]
+
+
+def test_get_recorded_report_empty():
+    assert get_recorded_report([]).elapsed == 0.0
+
+
+def test_trace_replayer_invalid_speed():
+    with pytest.raises(ValueError):
+        TraceReplayer(httpx.AsyncClient(), 'http://connect/public/v1', {}, speed=0)
+
+
+@pytest.mark.asyncio
+async def test_trace_replayer(mocker):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201 if request.method == 'POST' else 200, json={})
+
+    sleep = mocker.patch('dbaas.replay.asyncio.sleep', mocker.AsyncMock())
+    traces = [
+        _trace(100),
+        _trace(
+            101,
+            method='POST',
+            query=[['x', '1']],
+            body={'name': 'DB'},
+            context={'call_type': 'admin'},
+            status=400,
+        ),
+        _trace(104, path='/api/v1/regions'),
+    ]
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url='http://dbaas',
+    ) as client:
+        replayer = TraceReplayer(
+            client,
+            'http://connect/public/v1',
+            {'DB_NAME': 'db'},
+            speed=2,
+            account_id='VA-000-000',
+        )
+        report = await replayer.run(traces)
+
+    delays = [call.args[0] for call in sleep.await_args_list]
+    assert len(delays) == 2
+    assert 0.4 < delays[0] <= 0.5
+    assert 1.9 < delays[1] <= 2
+
+    assert [str(request.url) for request in requests] == [
+        'http://dbaas/api/v1/databases',
+        'http://dbaas/api/v1/databases?x=1',
+        'http://dbaas/api/v1/regions',
+    ]
+    assert json.loads(requests[1].content) == {'name': 'DB'}
+    assert requests[0].headers['x-connect-account-id'] == 'VA-000-000'
+    assert 'x-connect-user-id' not in requests[0].headers
+    assert requests[0].headers['x-connect-api-gateway-url'] == 'http://connect/public/v1'
+    assert requests[0].headers['x-connect-config'] == '{"DB_NAME": "db"}'
+    assert requests[1].headers['x-connect-call-type'] == 'admin'
+    assert 'x-connect-account-id' not in requests[1].headers
+
+    assert report.statuses == {
+        'GET /api/v1/databases': {200: 1},
+        'POST /api/v1/databases': {201: 1},
+        'GET /api/v1/regions': {200: 1},
+    }
+    assert replayer.status_changes == {'POST /api/v1/databases: 400 -> 201': 1}
+
+
+@pytest.mark.parametrize('context, expected', (
+    (
+        {'call_type': 'user', 'account_id': 'redacted', 'user_id': 'redacted'},
+        {'call_type': 'user', 'account_id': 'VA-000-001', 'user_id': 'UR-000-001'},
+    ),
+    (
+        {'call_type': 'user', 'account_id': 'VA-000-000'},
+        {'call_type': 'user', 'account_id': 'VA-000-000'},
+    ),
+    ({'call_type': 'admin'}, {'call_type': 'admin'}),
+))
+def test_trace_replayer_context(context, expected):
+    replayer = TraceReplayer(
+        httpx.AsyncClient(),
+        'http://connect/public/v1',
+        {},
+        account_id='VA-000-001',
+        user_id='UR-000-001',
+    )
+
+    assert replayer._get_context(_trace(1, context=context)) == expected
+
+
+@pytest.mark.asyncio
+async def test_trace_replayer_no_traces():
+    replayer = TraceReplayer(httpx.AsyncClient(), 'http://connect/public/v1', {})
+
+    report = await replayer.run([])
+
+    assert report.to_dict()['requests'] == 0
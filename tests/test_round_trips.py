@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+
+from dbaas.database import get_db
+
+from tests.round_trips import MongoCommandCounter, RoundTrips
+
+
+def test_budget_ok():
+    round_trips = RoundTrips()
+    round_trips.add_mongo_command('stale')
+
+    with round_trips.budget(mongo={'find': 2, 'insert': 1}, connect=1):
+        round_trips.add_mongo_command('find')
+        round_trips.add_mongo_command('find')
+        round_trips.add_connect_request('get', 'accounts/VA-000/users/UR-000')
+
+    assert round_trips.mongo == {'find': 2}
+    assert round_trips.connect == ['GET accounts/{id}/users/{id}']
+
+
+@pytest.mark.parametrize('mongo, connect, commands, requests, error', (
+    ({'find': 1}, None, ('find', 'find'), (), "MongoDB commands over budget {'find': 1}"),
+    ({'find': 1}, None, ('count',), (), "MongoDB commands over budget {'find': 1}"),
+    (None, 0, ('find',), ('users/UR-1',), 'Connect API requests over budget of 0'),
+))
+def test_budget_exceeded(mongo, connect, commands, requests, error):
+    round_trips = RoundTrips()
+
+    with pytest.raises(AssertionError) as e:
+        with round_trips.budget(mongo=mongo, connect=connect):
+            for command_name in commands:
+                round_trips.add_mongo_command(command_name)
+
+            for path in requests:
+                round_trips.add_connect_request('get', path)
+
+    assert str(e.value).startswith(error)
+
+
+def test_mongo_command_counter(mocker):
+    round_trips = RoundTrips()
+    counter = MongoCommandCounter(round_trips)
+
+    counter.started(mocker.MagicMock(command_name='find'))
+    counter.succeeded(mocker.MagicMock(command_name='find'))
+    counter.failed(mocker.MagicMock(command_name='find'))
+
+    assert round_trips.mongo == {'find': 1}
+
+
+def test_round_trips_fixture_patches_get_db(config, patch_connection_string, round_trips):
+    db = get_db(config)
+
+    listeners = db.client.options.event_listeners
+    counter = next(listener for listener in listeners if isinstance(listener, MongoCommandCounter))
+    assert counter.round_trips is round_trips
+
+
+@pytest.mark.asyncio
+async def test_round_trips_fixture_counts_connect_requests(
+    async_client_mocker, async_connect_client, round_trips,
+):
+    async_client_mocker('helpdesk').cases['CS-000-000']('resolve').post()
+
+    with round_trips.budget(connect=1):
+        await async_connect_client('helpdesk').cases['CS-000-000']('resolve').post()
+
+    assert round_trips.connect == ['POST helpdesk/cases/{id}/resolve']
@@ -4,12 +4,15 @@
 # All rights reserved.
 #
 
+from datetime import datetime
+
 import pytest
 from fastapi.encoders import jsonable_encoder
 
 from dbaas.constants import DBStatus, DBWorkload
 from dbaas.schemas import (
     DatabaseActivate,
+    DatabaseBulkAction,
     DatabaseInCreate,
     DatabaseInUpdate,
     DatabaseOutDetail,
@@ -143,6 +146,36 @@ def test_database_activate_fail(data):
         DatabaseActivate(**data)
 
 
+def test_database_bulk_action():
+    data = DatabaseBulkAction(**{
+        'action': 'delete',
+        'items': [
+            {'id': 'DB-1'},
+            {'id': 'DB-2', 'credentials': {'host': 'h', 'username': 'u', 'password': 'p'}},
+        ],
+    })
+
+    assert [item.dict() for item in data.items] == [
+        {'id': 'DB-1', 'workload': None, 'credentials': None},
+        {
+            'id': 'DB-2',
+            'workload': None,
+            'credentials': {'host': 'h', 'username': 'u', 'password': 'p', 'name': None},
+        },
+    ]
+
+
+@pytest.mark.parametrize('item', [
+    {},
+    {'id': ''},
+    {'id': 'DB-1', 'credentials': {'host': 'h'}},
+    {'id': 'DB-1', 'workload': 'new'},
+])
+def test_database_bulk_action_fail(item):
+    with pytest.raises(ValueError):
+        DatabaseBulkAction(action='activate', items=[item])
+
+
 @pytest.mark.parametrize('data', [
     {
         'name': 'DB1',
@@ -217,6 +250,7 @@ def test_database_out_list():
         tech_contact__name='user',
         cases=CaseFactory.create_batch(2),
         events={'happened': {'at': 1}},
+        updated_at=datetime(2025, 1, 2, 3, 4, 5),
         account_id='VA-123',
     )
 
@@ -230,6 +264,7 @@ def test_database_out_list():
         'status': 'reviewing',
         'case': None,
         'events': {'happened': {'at': 1}},
+        'updated_at': '2025-01-02T03:04:05',
         'owner': {'id': 'VA-123'},
     }
 
@@ -265,12 +300,8 @@ def test_database_out_detail():
         'status': 'active',
         'case': {'id': 'CS-100'},
         'events': {'passed': {'by': 2}},
-        'credentials': {
-            'username': 'some',
-            'host': 'some',
-            'password': 'qwerty',
-            'name': None,
-        },
+        'credentials_available': False,
+        'updated_at': None,
         'owner': {'id': 'PA-123'},
     }
 
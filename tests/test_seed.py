@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+from collections import Counter
+from unittest.mock import AsyncMock
+
+import pytest
+
+from dbaas.constants import DBStatus
+from dbaas.database import Collections
+from dbaas.schemas import DatabaseOutDetail
+from dbaas.seed import DatasetSeeder
+from dbaas.services import DB
+from dbaas.stats import DBStats, LeadTimes
+
+
+@pytest.fixture()
+def seeder(config):
+    return DatasetSeeder(config, accounts=20, regions=3, max_cases=30, seed=1)
+
+
+def test_generate_db_documents_are_reproducible(config):
+    first = DatasetSeeder(config, seed=2).generate_db_documents(0, 5)
+    second = DatasetSeeder(config, seed=2).generate_db_documents(0, 5)
+
+    assert [document['account_id'] for document in first] == [
+        document['account_id'] for document in second
+    ]
+    assert [document['id'] for document in first] == [
+        'DBS-000-000-000', 'DBS-000-000-001', 'DBS-000-000-002', 'DBS-000-000-003',
+        'DBS-000-000-004',
+    ]
+
+
+def test_generate_db_documents_distribution(seeder):
+    documents = seeder.generate_db_documents(0, 2000)
+
+    accounts = Counter(document['account_id'] for document in documents)
+    assert accounts[seeder.accounts[0]] > 5 * accounts[seeder.accounts[-1]]
+
+    statuses = Counter(document['status'] for document in documents)
+    assert set(statuses) == set(DatasetSeeder.STATUS_WEIGHTS)
+    assert statuses[DBStatus.ACTIVE] > statuses[DBStatus.REVIEWING]
+
+    cases = [len(document['cases']) for document in documents]
+    assert min(cases) == 1
+    assert 10 < max(cases) <= 30
+
+    assert {document['region']['id'] for document in documents} == {
+        'region-00', 'region-01', 'region-02',
+    }
+
+
+def test_generate_db_documents_reconfigured_events(seeder):
+    documents = seeder.generate_db_documents(0, 2000)
+
+    reconfiguring = [
+        document for document in documents if document['status'] == DBStatus.RECONFIGURING
+    ]
+    assert reconfiguring
+    for document in reconfiguring:
+        events = document['events']
+        assert events['activated']['at'] <= events['reconfigured']['at']
+        assert events['reconfigured']['by']['id'] == document['tech_contact']['id']
+
+    reconfigured_active = [
+        document for document in documents
+        if document['status'] == DBStatus.ACTIVE and 'reconfigured' in document['events']
+    ]
+    assert reconfigured_active
+    for document in reconfigured_active:
+        events = document['events']
+        assert events['reconfigured']['at'] <= events['activated']['at']
+
+    assert not any(
+        'reconfigured' in document['events']
+        for document in documents
+        if document['status'] in (DBStatus.REVIEWING, DBStatus.DELETED)
+    )
+
+
+@pytest.mark.parametrize('status', (DBStatus.ACTIVE, DBStatus.DELETED, DBStatus.REVIEWING))
+def test_generate_db_document(seeder, config, mocker, status):
+    mocker.patch.object(seeder.random, 'choices', side_effect=lambda population, **kw: (
+        [status] if population is seeder._statuses else [population[0]]
+    ))
+
+    document = seeder.generate_db_document(1234567)
+
+    assert document['id'] == 'DBS-001-234-567'
+    assert document['status'] == status
+    assert document['updated_at'] == max(event['at'] for event in document['events'].values())
+    assert ('deleted' in document['events']) is (status == DBStatus.DELETED)
+
+    if status == DBStatus.REVIEWING:
+        assert 'credentials' not in document
+    else:
+        credentials = DB._decrypt_dict(document['credentials'], config)
+        assert credentials['username'] == 'user1234567'
+
+    DatabaseOutDetail(**DB._db_document_repr(document))
+
+
+@pytest.mark.asyncio
+async def test_run(seeder, mocker, logger):
+    db = {Collections.DB: mocker.MagicMock(), Collections.REGION: mocker.MagicMock()}
+    db[Collections.DB].insert_many = AsyncMock(
+        side_effect=lambda documents, ordered: mocker.MagicMock(inserted_ids=documents),
+    )
+    db[Collections.REGION].bulk_write = AsyncMock()
+    rebuild_p = mocker.patch('dbaas.seed.DBStats.rebuild', AsyncMock())
+    lead_times_rebuild_p = mocker.patch('dbaas.seed.LeadTimes.rebuild', AsyncMock())
+
+    inserted = await seeder.run(db, logger, documents=25, batch_size=10, start=100)
+
+    assert inserted == 25
+    batches = [c.args[0] for c in db[Collections.DB].insert_many.call_args_list]
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert batches[0][0]['id'] == 'DBS-000-000-100'
+    assert batches[-1][-1]['id'] == 'DBS-000-000-124'
+    assert len(db[Collections.REGION].bulk_write.call_args.args[0]) == 3
+    rebuild_p.assert_awaited_once_with(db)
+    lead_times_rebuild_p.assert_awaited_once_with(db)
+    logger.info.assert_called_with('Seeding is completed: %d documents.', 25)
+
+
+@pytest.mark.asyncio
+async def test_run_seeds_db(db, config, logger):
+    seeder = DatasetSeeder(config, accounts=5, seed=3)
+
+    await seeder.run(db, logger, documents=30, batch_size=7)
+    await seeder.run(db, logger, documents=0)
+
+    assert await db[Collections.DB].count_documents({}) == 30
+    assert await db[Collections.REGION].count_documents({}) == DatasetSeeder.DEFAULT_REGIONS
+    assert (await DBStats.get(db))['total'] == 30
+
+    db_documents = await db[Collections.DB].find(
+        {'events.activated': {'$exists': True}},
+    ).to_list(length=None)
+    reconfigured = [
+        db_document for db_document in db_documents
+        if 'reconfigured' in db_document['events']
+        and db_document['events']['reconfigured']['at'] <= db_document['events']['activated']['at']
+    ]
+    created = [
+        db_document for db_document in db_documents
+        if 'reconfigured' not in db_document['events']
+    ]
+    lead_times = await LeadTimes.get(db)
+    assert lead_times['create']['count'] == len(created) > 0
+    assert lead_times['reconfigure']['count'] == len(reconfigured)
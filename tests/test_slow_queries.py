@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+
+from dbaas.database import get_db
+from dbaas.slow_queries import (
+    get_command_shape,
+    get_slow_query_listener,
+    get_winning_plan_summary,
+    MONGO_SLOW_COMMANDS,
+    redact,
+    SlowQueryListener,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_explained_at(mocker):
+    mocker.patch.dict('dbaas.slow_queries._explained_at', clear=True)
+
+
+@pytest.fixture()
+def listener():
+    return SlowQueryListener(('db', 'region'), threshold=0.1)
+
+
+def _run_command(mocker, listener, command, duration_micros, failed=False):
+    command_name = next(iter(command))
+    event_kwargs = {
+        'command_name': command_name,
+        'connection_id': ('host', 27017),
+        'request_id': 1,
+        'database_name': 'dbaas',
+    }
+
+    listener.started(mocker.MagicMock(command=command, **event_kwargs))
+    finish = listener.failed if failed else listener.succeeded
+    finish(mocker.MagicMock(duration_micros=duration_micros, **event_kwargs))
+
+
+@pytest.mark.parametrize('failed', (False, True))
+def test_slow_query_listener_logs_slow_command(mocker, metrics, listener, failed):
+    warning_p = mocker.patch('dbaas.slow_queries._logger.warning')
+
+    _run_command(mocker, listener, {
+        'find': 'db',
+        'filter': {'account_id': 'PA-123', 'status': {'$ne': 'deleted'}},
+        'sort': {'events.created.at': -1},
+        'lsid': {'id': 'x'},
+    }, 250000, failed=failed)
+
+    shape = {
+        'filter': {'account_id': '?', 'status': {'$ne': '?'}},
+        'sort': {'events.created.at': -1},
+    }
+    warning_p.assert_called_once_with(
+        'Slow MongoDB command %s on %s took %.1f ms: %s',
+        'find',
+        'db',
+        250.0,
+        shape,
+        extra={'command': 'find', 'collection': 'db', 'duration_ms': 250.0, 'shape': shape},
+    )
+    assert MONGO_SLOW_COMMANDS._values == {('find', 'db'): 1}
+    assert listener._pending == {}
+
+
+@pytest.mark.parametrize('command, duration_micros', (
+    ({'find': 'db', 'filter': {}}, 99999),
+    ({'find': 'job', 'filter': {}}, 500000),
+    ({'insert': 'db', 'documents': [{}]}, 500000),
+    ({'getMore': 123, 'collection': 'db'}, 500000),
+))
+def test_slow_query_listener_ignores_command(mocker, metrics, listener, command, duration_micros):
+    warning_p = mocker.patch('dbaas.slow_queries._logger.warning')
+
+    _run_command(mocker, listener, command, duration_micros)
+
+    warning_p.assert_not_called()
+    assert listener._pending == {}
+
+
+def test_slow_query_listener_pending_commands_are_bounded(mocker, listener):
+    mocker.patch.object(SlowQueryListener, 'MAX_PENDING_COMMANDS', 1)
+
+    for request_id in (1, 2):
+        listener.started(mocker.MagicMock(
+            command={'find': 'db'},
+            command_name='find',
+            connection_id=('h', 1),
+            request_id=request_id,
+        ))
+
+    assert list(listener._pending) == [(('h', 1), 1)]
+
+
+def test_slow_query_listener_submits_explain(mocker, listener):
+    submit_p = mocker.patch('dbaas.slow_queries._explain_executor.submit')
+    mocker.patch('dbaas.slow_queries._logger.warning')
+    listener.explain = True
+    listener.bind(mocker.MagicMock())
+    command = {'count': 'db', 'query': {'account_id': 'PA-1'}}
+
+    _run_command(mocker, listener, command, 500000)
+    _run_command(mocker, listener, command, 500000)
+
+    submit_p.assert_called_once_with(listener._explain, 'dbaas', 'db', command)
+
+
+def test_slow_query_listeners_of_many_clients_explain_once(
+    mocker, config, patch_connection_string,
+):
+    submit_p = mocker.patch('dbaas.slow_queries._explain_executor.submit')
+    mocker.patch('dbaas.slow_queries._logger.warning')
+    config = {**config, 'DB_SLOW_QUERY_EXPLAIN': 'true'}
+    command = {'find': 'db', 'filter': {'id': 'DB-1'}}
+
+    for _ in range(2):
+        db = get_db(config)
+        listener = next(
+            listener for listener in db.client.options.event_listeners
+            if isinstance(listener, SlowQueryListener)
+        )
+        _run_command(mocker, listener, command, 500000)
+
+    submit_p.assert_called_once()
+
+
+@pytest.mark.parametrize('explain, bound, command', (
+    (False, True, {'find': 'db'}),
+    (True, False, {'find': 'db'}),
+    (True, True, {'update': 'db', 'updates': []}),
+))
+def test_slow_query_listener_does_not_explain(mocker, listener, explain, bound, command):
+    submit_p = mocker.patch('dbaas.slow_queries._explain_executor.submit')
+    mocker.patch('dbaas.slow_queries._logger.warning')
+    listener.explain = explain
+    if bound:
+        listener.bind(mocker.MagicMock())
+
+    _run_command(mocker, listener, command, 500000)
+
+    submit_p.assert_not_called()
+
+
+def test_slow_query_listener_explains_again_after_interval(mocker, listener):
+    monotonic_p = mocker.patch('dbaas.slow_queries.time.monotonic', return_value=1000)
+    listener.explain = True
+    listener.bind(mocker.MagicMock())
+
+    assert listener._should_explain('find', 'db', {'filter': {}})
+    assert not listener._should_explain('find', 'db', {'filter': {}})
+    assert listener._should_explain('find', 'db', {'filter': {'id': '?'}})
+
+    monotonic_p.return_value = 1000 + SlowQueryListener.EXPLAIN_INTERVAL
+    assert listener._should_explain('find', 'db', {'filter': {}})
+
+
+def test_slow_query_listener_explain(mocker, listener):
+    client = mocker.MagicMock()
+    client['dbaas'].command.return_value = {'queryPlanner': {'winningPlan': {
+        'stage': 'SORT',
+        'inputStage': {'stage': 'COLLSCAN'},
+    }}}
+    warning_p = mocker.patch('dbaas.slow_queries._logger.warning')
+    listener.bind(client)
+
+    listener._explain('dbaas', 'db', {
+        'find': 'db',
+        'filter': {'a': 1},
+        'lsid': {'id': 'x'},
+        '$db': 'dbaas',
+        'txnNumber': 1,
+    })
+
+    client['dbaas'].command.assert_called_once_with(
+        'explain',
+        {'find': 'db', 'filter': {'a': 1}},
+        verbosity='queryPlanner',
+    )
+    warning_p.assert_called_once_with(
+        'Winning plan of slow MongoDB command on %s: %s',
+        'db',
+        'SORT > COLLSCAN',
+        extra={'collection': 'db', 'plan': 'SORT > COLLSCAN'},
+    )
+
+
+def test_slow_query_listener_explain_error(mocker, listener):
+    client = mocker.MagicMock()
+    error = RuntimeError('boom')
+    client['dbaas'].command.side_effect = error
+    warning_p = mocker.patch('dbaas.slow_queries._logger.warning')
+    listener.bind(client)
+
+    listener._explain('dbaas', 'db', {'find': 'db'})
+
+    warning_p.assert_called_once_with(
+        'Failed to explain slow MongoDB command on %s: %s', 'db', error,
+    )
+
+
+@pytest.mark.parametrize('command_name, command, shape', (
+    ('find', {'find': 'db'}, {'filter': {}}),
+    (
+        'aggregate',
+        {'aggregate': 'db', 'pipeline': [
+            {'$match': {'id': {'$in': ['DB-1', 'DB-2']}}},
+            {'$sort': {'updated_at': 1, 'id': 1}},
+            {'$limit': 10},
+        ]},
+        {'pipeline': [
+            {'$match': {'id': {'$in': ['?']}}},
+            {'$sort': {'updated_at': 1, 'id': 1}},
+            {'$limit': '?'},
+        ]},
+    ),
+    ('count', {'count': 'db', 'query': {'a': 1}}, {'filter': {'a': '?'}}),
+    ('distinct', {'distinct': 'db', 'key': 'x'}, {'filter': {}}),
+    (
+        'findAndModify',
+        {'findAndModify': 'db', 'query': {'id': 'x'}, 'sort': {'id': 1}},
+        {'filter': {'id': '?'}, 'sort': {'id': 1}},
+    ),
+    (
+        'update',
+        {'update': 'db', 'updates': [{'q': {'id': 'x'}, 'u': {'$set': {'name': 'y'}}}]},
+        {'filter': [{'id': '?'}]},
+    ),
+    ('delete', {'delete': 'db', 'deletes': [{'q': {'id': 'x'}}]}, {'filter': [{'id': '?'}]}),
+))
+def test_get_command_shape(command_name, command, shape):
+    assert get_command_shape(command_name, command) == shape
+
+
+@pytest.mark.parametrize('value, redacted', (
+    ('secret', '?'),
+    (1, '?'),
+    ([1, 2], ['?']),
+    ({'$or': [{'a': 1}, {'b': {'$gt': 2}}]}, {'$or': [{'a': '?'}, {'b': {'$gt': '?'}}]}),
+))
+def test_redact(value, redacted):
+    assert redact(value) == redacted
+
+
+@pytest.mark.parametrize('result, summary', (
+    ({}, ''),
+    ({'queryPlanner': {'winningPlan': {
+        'stage': 'FETCH',
+        'inputStage': {'stage': 'IXSCAN', 'indexName': 'id_1'},
+    }}}, 'FETCH > IXSCAN(id_1)'),
+    ({'queryPlanner': {'winningPlan': {'queryPlan': {
+        'stage': 'OR',
+        'inputStages': [{'stage': 'IXSCAN', 'indexName': 'a_1'}, {'stage': 'IXSCAN'}],
+    }}}}, 'OR > IXSCAN(a_1)'),
+    ({'stages': [{'$cursor': {'queryPlanner': {'winningPlan': {
+        'stage': 'COLLSCAN',
+    }}}}]}, 'COLLSCAN'),
+))
+def test_get_winning_plan_summary(result, summary):
+    assert get_winning_plan_summary(result) == summary
+
+
+@pytest.mark.parametrize('threshold, explain, expected', (
+    (None, None, (0.1, False)),
+    ('250', 'true', (0.25, True)),
+    ('50', 'no', (0.05, False)),
+))
+def test_get_slow_query_listener(threshold, explain, expected):
+    config = {}
+    if threshold:
+        config['DB_SLOW_QUERY_THRESHOLD_MS'] = threshold
+    if explain:
+        config['DB_SLOW_QUERY_EXPLAIN'] = explain
+
+    listener = get_slow_query_listener(config, ('db',))
+
+    assert (listener.threshold, listener.explain) == expected
+    assert listener.collections == ('db',)
+
+
+def test_get_slow_query_listener_disabled():
+    assert get_slow_query_listener({'DB_SLOW_QUERY_THRESHOLD_MS': '0'}, ('db',)) is None
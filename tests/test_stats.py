@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo import UpdateOne
+
+from dbaas.constants import DBStatus, DBWorkload
+from dbaas.database import Collections, get_db
+from dbaas.stats import DBStats, LeadTimes
+
+from tests.factories import DBFactory, RegionFactory
+
+
+def test__cell():
+    db_document = DBFactory(
+        status=DBStatus.ACTIVE,
+        workload=DBWorkload.LARGE,
+        region=RegionFactory(id='eu-west'),
+        account_id='VA-000',
+    )
+
+    assert DBStats._cell(db_document) == {
+        'status': DBStatus.ACTIVE,
+        'region_id': 'eu-west',
+        'workload': DBWorkload.LARGE,
+        'account_id': 'VA-000',
+    }
+
+
+def test__rebuild_pipeline():
+    pipeline = DBStats._rebuild_pipeline()
+
+    assert pipeline[0]['$group']['_id']['region_id'] == '$region.id'
+    assert pipeline[-1] == {'$out': Collections.DB_STATS}
+
+
+@pytest.mark.asyncio
+async def test_record_change_same_cell():
+    db = MagicMock()
+    db_document = DBFactory(status=DBStatus.ACTIVE)
+
+    await DBStats.record_change(db, db_document, {**db_document, 'name': 'renamed'})
+
+    db.__getitem__.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_record_change_moves_between_cells():
+    db = MagicMock()
+    db[Collections.DB_STATS].bulk_write = AsyncMock()
+    before = DBFactory(status=DBStatus.ACTIVE)
+    after = {**before, 'status': DBStatus.DELETED}
+
+    await DBStats.record_change(db, before, after, session='session')
+
+    requests = db[Collections.DB_STATS].bulk_write.call_args[0][0]
+    assert requests == [
+        UpdateOne(DBStats._cell(before), {'$inc': {'count': -1}}, upsert=False),
+        UpdateOne(DBStats._cell(after), {'$inc': {'count': 1}}, upsert=True),
+    ]
+    assert db[Collections.DB_STATS].bulk_write.call_args[1] == {
+        'ordered': False,
+        'session': 'session',
+    }
+
+
+@pytest.mark.asyncio
+async def test_record_changes_merges_cells():
+    db = MagicMock()
+    db[Collections.DB_STATS].bulk_write = AsyncMock()
+    first = DBFactory(status=DBStatus.REVIEWING, workload=DBWorkload.SMALL, account_id='VA-1')
+    second = {**first, 'id': 'DB-2'}
+    third = DBFactory(status=DBStatus.ACTIVE)
+
+    await DBStats.record_changes(db, [
+        (first, {**first, 'status': DBStatus.ACTIVE}),
+        (second, {**second, 'status': DBStatus.ACTIVE}),
+        (third, {**third, 'name': 'renamed'}),
+    ])
+
+    requests = db[Collections.DB_STATS].bulk_write.call_args[0][0]
+    assert requests == [
+        UpdateOne(DBStats._cell(first), {'$inc': {'count': -2}}, upsert=False),
+        UpdateOne(
+            DBStats._cell({**first, 'status': DBStatus.ACTIVE}),
+            {'$inc': {'count': 2}},
+            upsert=True,
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_record_changes_no_changes():
+    db = MagicMock()
+
+    await DBStats.record_changes(db, [])
+
+    db.__getitem__.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_empty(db):
+    assert await DBStats.get(db) == {
+        'total': 0,
+        'status': {},
+        'region_id': {},
+        'workload': {},
+        'account_id': {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_after_rebuild(db):
+    region = RegionFactory(id='eu-west')
+    await db[Collections.DB].insert_many([
+        DBFactory(
+            status=DBStatus.ACTIVE, workload=DBWorkload.LARGE, region=region, account_id='VA-1',
+        ),
+        DBFactory(
+            status=DBStatus.ACTIVE, workload=DBWorkload.LARGE, region=region, account_id='VA-1',
+        ),
+        DBFactory(
+            status=DBStatus.REVIEWING, workload=DBWorkload.SMALL, region=region, account_id='VA-2',
+        ),
+        DBFactory(status=DBStatus.REVIEWING, workload=DBWorkload.LARGE, account_id='VA-2'),
+    ])
+
+    await DBStats.rebuild(db)
+
+    assert await db[Collections.DB_STATS].count_documents({}) == 3
+
+    stats = await DBStats.get(db)
+    assert stats['total'] == 4
+    assert stats['status'] == {DBStatus.ACTIVE: 2, DBStatus.REVIEWING: 2}
+    assert stats['account_id'] == {'VA-1': 2, 'VA-2': 2}
+
+    stats = await DBStats.get(db, {
+        'status': DBStatus.REVIEWING,
+        'region_id': 'eu-west',
+        'workload': None,
+    })
+    assert stats['total'] == 1
+    assert stats['workload'] == {DBWorkload.SMALL: 1}
+
+
+@pytest.mark.asyncio
+async def test_record_change_matches_rebuild(db):
+    db_document = DBFactory(status=DBStatus.REVIEWING)
+    await db[Collections.DB].insert_one(db_document)
+    await DBStats.record_change(db, None, db_document)
+
+    activated = {**db_document, 'status': DBStatus.ACTIVE, 'workload': DBWorkload.MEDIUM}
+    await db[Collections.DB].replace_one({'id': db_document['id']}, activated)
+    await DBStats.record_change(db, db_document, activated)
+
+    recorded = await DBStats.get(db)
+    await DBStats.rebuild(db)
+
+    assert await DBStats.get(db) == recorded
+    assert recorded['status'] == {DBStatus.ACTIVE: 1}
+    assert recorded['workload'] == {DBWorkload.MEDIUM: 1}
+
+
+@pytest.mark.asyncio
+async def test_prepare_builds_new_collection(config, patch_connection_string, logger):
+    db = get_db(config)
+    await db[Collections.DB].delete_many({})
+    await db[Collections.DB].insert_one(DBFactory(status=DBStatus.ACTIVE))
+    await db.drop_collection(Collections.DB_STATS)
+
+    await DBStats.prepare(db, logger)
+
+    assert (await DBStats.get(db))['status'] == {DBStatus.ACTIVE: 1}
+    index_info = await db[Collections.DB_STATS].index_information()
+    assert any(index.get('unique') for index in index_info.values())
+
+
+@pytest.mark.asyncio
+async def test_prepare_collection_exists(db, logger):
+    logger.reset_mock()
+
+    await DBStats.prepare(db, logger)
+
+    logger.info.assert_called_once_with('Collection %s already exists.', Collections.DB_STATS)
+
+
+@pytest.mark.parametrize('lead_time, label', (
+    (0, '300'),
+    (300, '300'),
+    (301, '900'),
+    (86400, '86400'),
+    (30 * 86400 + 1, 'inf'),
+))
+def test__bucket_label(lead_time, label):
+    assert LeadTimes._bucket_label(lead_time) == label
+
+
+def test__histogram_increments():
+    assert LeadTimes._histogram_increments([100, 200, 1000]) == {
+        'count': 3,
+        'sum_seconds': 1300,
+        'buckets.300': 2,
+        'buckets.1800': 1,
+    }
+
+
+def test__estimate_percentile():
+    counts = [0] * (len(LeadTimes.BUCKETS) + 1)
+    counts[0] = 5
+    counts[3] = 5
+
+    assert LeadTimes._estimate_percentile(counts, 50) == 300
+    assert LeadTimes._estimate_percentile(counts, 10) == 60
+    assert LeadTimes._estimate_percentile(counts, 90) == 1800 + 1800 * 4 / 5
+
+
+def test__estimate_percentile_open_bucket():
+    counts = [0] * len(LeadTimes.BUCKETS) + [3]
+
+    assert LeadTimes._estimate_percentile(counts, 50) == LeadTimes.BUCKETS[-1]
+
+
+@pytest.mark.parametrize('status, events, kind, has_start', (
+    (DBStatus.REVIEWING, {'created': {'at': 1}}, LeadTimes.CREATE, True),
+    (DBStatus.RECONFIGURING, {'reconfigured': {'at': 1}}, LeadTimes.RECONFIGURE, True),
+    (DBStatus.RECONFIGURING, {'created': {'at': 1}}, LeadTimes.RECONFIGURE, False),
+    (DBStatus.ACTIVE, {'created': {'at': 1}}, None, False),
+))
+def test__get_start(status, events, kind, has_start):
+    started_kind, started_at = LeadTimes._get_start({'status': status, 'events': events})
+
+    assert started_kind == kind
+    assert (started_at == 1) is has_start
+
+
+@pytest.mark.asyncio
+async def test_record_activation():
+    db = MagicMock()
+    db[Collections.LEAD_TIMES].bulk_write = AsyncMock()
+    created_at = datetime(2025, 1, 1, 10)
+    db_document = DBFactory(
+        status=DBStatus.REVIEWING,
+        workload=DBWorkload.SMALL,
+        region=RegionFactory(id='eu-west'),
+        events={'created': {'at': created_at}},
+    )
+
+    await LeadTimes.record_activation(
+        db,
+        db_document,
+        (created_at + timedelta(hours=1)).replace(tzinfo=timezone.utc),
+    )
+
+    db[Collections.LEAD_TIMES].bulk_write.assert_awaited_once_with(
+        [
+            UpdateOne(
+                {'kind': LeadTimes.CREATE, 'region_id': 'eu-west', 'workload': DBWorkload.SMALL},
+                {'$inc': {'count': 1, 'sum_seconds': 3600.0, 'buckets.3600': 1}},
+                upsert=True,
+            ),
+        ],
+        ordered=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_record_activation_without_start():
+    db = MagicMock()
+
+    await LeadTimes.record_activation(db, DBFactory(status=DBStatus.ACTIVE), datetime.now())
+
+    db.__getitem__.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_lead_times_get(db):
+    created_at = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    for minutes in (10, 20, 40):
+        await LeadTimes.record_activation(
+            db,
+            DBFactory(
+                status=DBStatus.REVIEWING,
+                workload=DBWorkload.SMALL,
+                events={'created': {'at': created_at}},
+            ),
+            created_at + timedelta(minutes=minutes),
+        )
+
+    await db[Collections.DB].insert_many([
+        DBFactory(
+            status=DBStatus.REVIEWING,
+            workload=DBWorkload.SMALL,
+            events={'created': {'at': created_at + timedelta(hours=hours)}},
+        )
+        for hours in (0, 12)
+    ])
+
+    lead_times = await LeadTimes.get(db, {'workload': DBWorkload.SMALL, 'region_id': None})
+
+    assert lead_times['create']['count'] == 3
+    assert lead_times['create']['mean_seconds'] == pytest.approx(70 / 3 * 60)
+    assert 900 < lead_times['create']['percentiles_seconds']['p50'] <= 1800
+    assert lead_times['reconfigure'] == {
+        'count': 0,
+        'mean_seconds': None,
+        'percentiles_seconds': {},
+    }
+    assert lead_times['backlog']['count'] == 2
+    assert lead_times['backlog']['oldest_age_seconds'] == pytest.approx(86400, abs=60)
+    assert 43200 < lead_times['backlog']['percentiles_seconds']['p50'] <= 86400
+    assert lead_times['backlog']['percentiles_seconds']['p99'] <= 172800
+
+    lead_times = await LeadTimes.get(db, {'workload': DBWorkload.LARGE})
+
+    assert lead_times['create']['count'] == 0
+    assert lead_times['backlog']['count'] == 0
+
+
+def test__backlog_pipeline():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    pipeline = LeadTimes._backlog_pipeline({'region_id': 'eu-west', 'workload': None}, now)
+
+    assert pipeline[0] == {'$match': {'status': DBStatus.REVIEWING, 'region.id': 'eu-west'}}
+    assert pipeline[-1]['$bucket']['boundaries'] == [0, *LeadTimes.BUCKETS]
+    assert pipeline[-1]['$bucket']['default'] == 'inf'
+
+
+@pytest.mark.asyncio
+async def test__get_backlog(mocker):
+    db = MagicMock()
+    db[Collections.DB].aggregate.return_value.to_list = AsyncMock(return_value=[
+        {'_id': 0, 'count': 2, 'oldest_age_seconds': 120.0},
+        {'_id': 3600, 'count': 1, 'oldest_age_seconds': 5000.0},
+        {'_id': 'inf', 'count': 1, 'oldest_age_seconds': 3000000.0},
+    ])
+
+    backlog = await LeadTimes._get_backlog(db, {})
+
+    assert backlog['count'] == 4
+    assert backlog['oldest_age_seconds'] == 3000000.0
+    assert backlog['percentiles_seconds'] == {
+        'p50': 300.0,
+        'p90': float(LeadTimes.BUCKETS[-1]),
+        'p99': float(LeadTimes.BUCKETS[-1]),
+    }
+    db[Collections.DB].aggregate.return_value.to_list.assert_awaited_once_with(length=None)
+
+
+@pytest.mark.asyncio
+async def test__get_backlog_empty(mocker):
+    db = MagicMock()
+    db[Collections.DB].aggregate.return_value.to_list = AsyncMock(return_value=[])
+
+    assert await LeadTimes._get_backlog(db, {}) == {
+        'count': 0,
+        'oldest_age_seconds': None,
+        'percentiles_seconds': {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_lead_times_rebuild(db):
+    created_at = datetime(2025, 1, 1, 10)
+    hour = timedelta(hours=1)
+    await db[Collections.DB].insert_many([
+        DBFactory(status=DBStatus.ACTIVE, events={
+            'created': {'at': created_at},
+            'activated': {'at': created_at + hour},
+        }),
+        DBFactory(status=DBStatus.ACTIVE, events={
+            'created': {'at': created_at},
+            'reconfigured': {'at': created_at + hour},
+            'activated': {'at': created_at + 3 * hour},
+        }),
+        DBFactory(status=DBStatus.RECONFIGURING, events={
+            'created': {'at': created_at},
+            'activated': {'at': created_at + hour},
+            'reconfigured': {'at': created_at + 2 * hour},
+        }),
+        DBFactory(status=DBStatus.REVIEWING),
+    ])
+
+    await LeadTimes.rebuild(db)
+    lead_times = await LeadTimes.get(db)
+
+    assert lead_times['create']['count'] == 1
+    assert lead_times['create']['mean_seconds'] == 3600
+    assert lead_times['reconfigure']['count'] == 1
+    assert lead_times['reconfigure']['mean_seconds'] == 7200
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import pytest
+
+from dbaas.metrics import MongoCommandMetrics, observe_connect_call
+from dbaas.timings import (
+    _request_timings,
+    get_request_timings,
+    record_timing,
+    RequestTimings,
+    timed,
+    TimedJSONResponse,
+    TimingKind,
+)
+
+from tests.factories import DBFactory
+
+
+@pytest.fixture()
+def request_timings():
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+
+    yield timings
+
+    _request_timings.reset(token)
+
+
+def test_request_timings_server_timing():
+    timings = RequestTimings()
+    timings.add(TimingKind.MONGO, 0.002)
+    timings.add(TimingKind.MONGO, 0.0015)
+    timings.add(TimingKind.CONNECT, 0.1)
+    timings.add(TimingKind.SERIALIZATION, 0.0001)
+
+    assert timings.server_timing(0.2) == (
+        'mongo;dur=3.5;desc="2 commands", connect;dur=100.0;desc="1 calls", '
+        'crypto;dur=0.0, serialization;dur=0.1, total;dur=200.0'
+    )
+
+
+def test_request_timings_summary():
+    timings = RequestTimings()
+    timings.add(TimingKind.CRYPTO, 0.01)
+    timings.add(TimingKind.CONNECT, 0.02)
+
+    assert timings.summary(0.05) == {
+        'total_ms': 50.0,
+        'mongo_ms': 0.0,
+        'mongo_commands': 0,
+        'connect_ms': 20.0,
+        'connect_calls': 1,
+        'crypto_ms': 10.0,
+        'serialization_ms': 0.0,
+    }
+
+
+def test_record_timing_without_request():
+    assert get_request_timings() is None
+
+    record_timing(TimingKind.MONGO, 1)
+
+
+def test_record_timing(request_timings):
+    record_timing(TimingKind.MONGO, 1)
+
+    assert get_request_timings() is request_timings
+    assert request_timings.durations[TimingKind.MONGO] == 1
+    assert request_timings.counts[TimingKind.MONGO] == 1
+
+
+def test_timed(request_timings):
+    with pytest.raises(ValueError):
+        with timed(TimingKind.CRYPTO):
+            raise ValueError
+
+    assert request_timings.durations[TimingKind.CRYPTO] > 0
+    assert request_timings.counts[TimingKind.CRYPTO] == 1
+
+
+def test_mongo_commands_are_recorded(mocker, request_timings):
+    listener = MongoCommandMetrics()
+    listener.succeeded(mocker.MagicMock(command_name='find', duration_micros=2000))
+    listener.failed(mocker.MagicMock(command_name='find', duration_micros=1000))
+
+    assert request_timings.durations[TimingKind.MONGO] == pytest.approx(0.003)
+    assert request_timings.counts[TimingKind.MONGO] == 2
+
+
+def test_connect_calls_are_recorded(request_timings):
+    with observe_connect_call('get', 'users/UR-1'):
+        pass
+
+    assert request_timings.counts[TimingKind.CONNECT] == 1
+
+
+def test_timed_json_response(request_timings):
+    response = TimedJSONResponse({'a': 1})
+
+    assert response.body == b'{"a":1}'
+    assert request_timings.counts[TimingKind.SERIALIZATION] == 1
+
+
+def test_timing_middleware(api_client, mocker, caplog):
+    def retrieve(*args):
+        record_timing(TimingKind.MONGO, 0.004)
+        record_timing(TimingKind.CONNECT, 0.002)
+        return DBFactory()
+
+    mocker.patch('dbaas.webapp.DB.retrieve', side_effect=retrieve)
+
+    with caplog.at_level('INFO', logger='dbaas.timings'):
+        response = api_client.get('/api/v1/databases/DB-1')
+
+    assert response.status_code == 200
+    server_timing = response.headers['server-timing'].split(', ')
+    assert server_timing[:3] == [
+        'mongo;dur=4.0;desc="1 commands"',
+        'connect;dur=2.0;desc="1 calls"',
+        'crypto;dur=0.0',
+    ]
+    assert server_timing[3].startswith('serialization;dur=')
+    assert server_timing[4].startswith('total;dur=')
+
+    record = caplog.records[-1]
+    assert record.getMessage().startswith('GET /api/v1/databases/{db_id} 200 total_ms=')
+    assert (record.route, record.status_code) == ('/api/v1/databases/{db_id}', 200)
+    assert record.timings['mongo_commands'] == 1
+    assert record.timings['connect_calls'] == 1
+    assert get_request_timings() is None
+
+
+def test_timing_middleware_error(api_client, mocker, caplog):
+    mocker.patch('dbaas.webapp.DB.list', side_effect=RuntimeError)
+
+    with caplog.at_level('INFO', logger='dbaas.timings'):
+        with pytest.raises(RuntimeError):
+            api_client.get('/api/v1/databases')
+
+    assert caplog.records[-1].status_code == 500
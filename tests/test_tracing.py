@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025, CloudBlue
+# All rights reserved.
+#
+
+import io
+import json
+import sys
+import threading
+
+import pytest
+
+from dbaas import tracing
+from dbaas.tracing import (
+    configure_tracing,
+    get_current_span,
+    JsonSpanExporter,
+    MongoTracingListener,
+    render_waterfall,
+    Span,
+    start_span,
+    traced,
+)
+from dbaas.utils import create_background_task, ObservedAsyncConnectClient
+
+from tests.factories import DBFactory
+
+
+def test_span_to_dict(mocker):
+    mocker.patch('dbaas.tracing.time.time', return_value=100.5)
+    mocker.patch('dbaas.tracing.time.perf_counter', side_effect=[1.0, 1.25])
+
+    span = Span('name', 'trace', 'parent', {'a': 1})
+    span.finish()
+
+    assert span.to_dict() == {
+        'trace_id': 'trace',
+        'span_id': span.span_id,
+        'parent_id': 'parent',
+        'name': 'name',
+        'start': 100.5,
+        'duration_ms': 250.0,
+        'attributes': {'a': 1},
+        'error': None,
+    }
+
+
+def test_json_span_exporter():
+    stream = io.StringIO()
+    span = Span('name', 'trace')
+    span.finish(0.001)
+
+    exporter = JsonSpanExporter(stream)
+    exporter.export(span)
+    exporter.flush()
+
+    assert json.loads(stream.getvalue()) == span.to_dict()
+    exporter.close()
+    assert not stream.closed
+
+
+def test_json_span_exporter_writes_in_background(mocker):
+    stream = mocker.MagicMock()
+    exporter = JsonSpanExporter(stream, close_stream=True)
+    writer_thread = exporter._writer._thread
+    written_from = []
+    stream.write.side_effect = lambda data: written_from.append(threading.current_thread())
+
+    span = Span('name', 'trace')
+    span.finish(0.001)
+    exporter.export(span)
+    exporter.close()
+
+    assert written_from == [writer_thread]
+    stream.close.assert_called_once_with()
+
+
+def test_configure_tracing(mocker, tmp_path):
+    mocker.patch('dbaas.tracing._exporter', None)
+
+    configure_tracing({'DB_TRACING_EXPORT': 'stdout'})
+    assert tracing._exporter.stream is sys.stdout
+
+    configure_tracing({'DB_TRACING_EXPORT': str(tmp_path / 'spans.jsonl')})
+    stream = tracing._exporter.stream
+    assert stream.name == str(tmp_path / 'spans.jsonl')
+
+    configure_tracing({})
+    assert tracing._exporter is None
+    assert stream.closed
+
+
+def test_start_span_disabled(mocker):
+    mocker.patch('dbaas.tracing._exporter', None)
+
+    with start_span('x') as span:
+        assert span is None
+        assert get_current_span() is None
+
+
+def test_start_span_nested(spans):
+    with start_span('parent', a=1) as parent:
+        with start_span('child') as child:
+            assert get_current_span() is child
+
+        assert get_current_span() is parent
+
+    assert get_current_span() is None
+    assert spans == [child, parent]
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+    assert parent.attributes == {'a': 1}
+
+
+def test_start_span_error(spans):
+    with pytest.raises(ValueError):
+        with start_span('x'):
+            raise ValueError('failed')
+
+    assert spans[0].error == "ValueError('failed')"
+
+
+@pytest.mark.asyncio
+async def test_traced(spans):
+    @traced()
+    async def func(a, b=2):
+        return a + b
+
+    @traced('custom')
+    async def other():
+        return await func(1, b=3)
+
+    assert await other() == 4
+    assert [span.name for span in spans] == [
+        'test_traced.<locals>.func',
+        'custom',
+    ]
+    assert spans[0].parent_id == spans[1].span_id
+
+
+@pytest.mark.asyncio
+async def test_background_task_inherits_span(spans):
+    @traced('background')
+    async def job():
+        pass
+
+    with start_span('request'):
+        task = create_background_task(job())
+
+    await task
+
+    background = next(span for span in spans if span.name == 'background')
+    request = next(span for span in spans if span.name == 'request')
+    assert background.parent_id == request.span_id
+
+
+def test_tracing_middleware(api_client, mocker, spans):
+    mocker.patch('dbaas.webapp.DB.retrieve', return_value=DBFactory())
+
+    response = api_client.get(
+        '/api/v1/databases/DB-1',
+        headers={'traceparent': f"00-{'a' * 32}-{'b' * 16}-01"},
+    )
+
+    assert response.status_code == 200
+    span = spans[-1]
+    assert span.name == 'GET /api/v1/databases/{db_id}'
+    assert span.trace_id == 'a' * 32
+    assert span.attributes['http.path'].endswith('/api/v1/databases/DB-1')
+    assert span.attributes['http.route'] == '/api/v1/databases/{db_id}'
+    assert span.attributes['http.status_code'] == 200
+
+
+def test_tracing_middleware_error(api_client, mocker, spans):
+    mocker.patch('dbaas.webapp.DB.list', side_effect=RuntimeError)
+
+    with pytest.raises(RuntimeError):
+        api_client.get('/api/v1/databases', headers={'traceparent': 'invalid'})
+
+    assert spans[-1].error == 'RuntimeError()'
+    assert len(spans[-1].trace_id) == 32
+
+
+def test_tracing_middleware_disabled(api_client, mocker):
+    mocker.patch('dbaas.tracing._exporter', None)
+    mocker.patch('dbaas.webapp.DB.list', return_value=[])
+
+    assert api_client.get('/api/v1/databases').status_code == 200
+
+
+def test_mongo_tracing_listener(mocker, spans):
+    listener = MongoTracingListener()
+    event_kwargs = {'connection_id': ('h', 1), 'request_id': 7}
+
+    with start_span('parent') as parent:
+        listener.started(mocker.MagicMock(
+            command={'find': 'db'},
+            command_name='find',
+            database_name='dbaas',
+            **event_kwargs,
+        ))
+        listener.succeeded(mocker.MagicMock(duration_micros=1500, **event_kwargs))
+        listener.started(mocker.MagicMock(
+            command={'getMore': 1},
+            command_name='getMore',
+            database_name='dbaas',
+            **event_kwargs,
+        ))
+        listener.failed(mocker.MagicMock(
+            duration_micros=10,
+            failure={'errmsg': 'x'},
+            **event_kwargs,
+        ))
+
+    find, get_more = spans[:2]
+    assert (find.name, find.parent_id, find.duration) == ('mongo.find', parent.span_id, 0.0015)
+    assert find.attributes == {'db.name': 'dbaas', 'db.collection': 'db'}
+    assert find.error is None
+    assert get_more.attributes['db.collection'] is None
+    assert get_more.error == "{'errmsg': 'x'}"
+
+
+def test_mongo_tracing_listener_disabled(mocker):
+    mocker.patch('dbaas.tracing._exporter', None)
+    listener = MongoTracingListener()
+
+    listener.started(mocker.MagicMock(command={'find': 'db'}, command_name='find'))
+
+    assert listener._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_connect_calls_are_traced(async_client_mocker, default_endpoint, spans):
+    async_client_mocker.accounts['PA-1'].users['UR-1'].get(return_value={'id': 'UR-1'})
+    client = ObservedAsyncConnectClient('key', endpoint=default_endpoint, use_specs=False)
+
+    await client.accounts['PA-1'].users['UR-1'].get()
+
+    assert [span.name for span in spans] == ['connect.GET accounts/{id}/users/{id}']
+
+
+def test_render_waterfall():
+    spans = [
+        {'span_id': 'b', 'parent_id': 'a', 'name': 'child', 'start': 0.5, 'duration_ms': 500},
+        {'span_id': 'a', 'parent_id': None, 'name': 'root', 'start': 0, 'duration_ms': 1000},
+        {
+            'span_id': 'c', 'parent_id': 'gone', 'name': 'orphan', 'start': 0.9,
+            'duration_ms': 100, 'error': 'x',
+        },
+    ]
+
+    assert render_waterfall(spans, width=10) == '\n'.join((
+        '|##########|    1000.0 ms root',
+        '|     #####|     500.0 ms   child',
+        '|         #|     100.0 ms orphan !',
+    ))
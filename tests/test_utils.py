@@ -4,15 +4,26 @@
 # All rights reserved.
 #
 
+import asyncio
+
 import pytest
-from connect.client import AsyncConnectClient
+from connect.client import AsyncConnectClient, ClientError
 from connect.eaas.core.inject.models import Context
 
-from dbaas.utils import get_installation_client, is_admin_context
+from dbaas.metrics import BACKGROUND_TASKS, CONNECT_REQUEST_DURATION, CONNECT_REQUEST_ERRORS
+from dbaas.utils import (
+    _background_tasks,
+    create_background_task,
+    gather_bounded,
+    get_installation_client,
+    is_admin_context,
+    ObservedAsyncConnectClient,
+    RateLimiter,
+)
 
 
 @pytest.mark.asyncio
-async def test_get_installation_client(async_client_mocker_factory, logger):
+async def test_get_installation_client(async_client_mocker_factory, logger, metrics):
     client_mocker = async_client_mocker_factory(base_url='https://localhost/public/v1')
 
     ctx = Context(extension_id='SRVC-000', installation_id='EIN-123')
@@ -36,13 +47,108 @@ async def test_get_installation_client(async_client_mocker_factory, logger):
         ctx, extension_client,
     )
 
-    assert isinstance(installation_admin_client, AsyncConnectClient)
+    assert isinstance(installation_admin_client, ObservedAsyncConnectClient)
     assert installation_admin_client.api_key == 'my_inst_api_key'
     assert installation_admin_client.endpoint == extension_client.endpoint
     assert installation_admin_client.default_headers == extension_client.default_headers
     assert installation_admin_client.logger == extension_client.logger
+    assert CONNECT_REQUEST_DURATION._values[(
+        'POST', 'devops/services/{id}/installations/{id}/impersonate',
+    )][-1] == 1
+
+
+@pytest.mark.asyncio
+async def test_observed_async_connect_client(async_client_mocker, default_endpoint, metrics):
+    async_client_mocker.users['UR-123'].get(return_value={'id': 'UR-123'})
+    async_client_mocker('helpdesk').cases.create(status_code=400, return_value={'errors': ['x']})
+    client = ObservedAsyncConnectClient('key', endpoint=default_endpoint, use_specs=False)
+
+    assert await client.users['UR-123'].get() == {'id': 'UR-123'}
+    with pytest.raises(ClientError):
+        await client('helpdesk').cases.create(payload={})
+
+    assert CONNECT_REQUEST_DURATION._values[('GET', 'users/{id}')][-1] == 1
+    assert CONNECT_REQUEST_DURATION._values[('POST', 'helpdesk/cases')][-1] == 1
+    assert CONNECT_REQUEST_ERRORS._values == {('POST', 'helpdesk/cases', '400'): 1}
+
+
+@pytest.mark.asyncio
+async def test_create_background_task(metrics):
+    event = asyncio.Event()
+
+    task = create_background_task(event.wait())
+    assert task in _background_tasks
+    assert BACKGROUND_TASKS._values[()] == 1
+
+    event.set()
+    await task
+    await asyncio.sleep(0)
+
+    assert task not in _background_tasks
+    assert BACKGROUND_TASKS._values[()] == 0
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded():
+    running = []
+    peak = []
+
+    async def work(n):
+        running.append(n)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(n)
+        if n == 3:
+            raise ValueError(n)
+
+        return n
+
+    results = await gather_bounded((work(n) for n in range(10)), 4, return_exceptions=True)
+
+    assert results[:3] == [0, 1, 2]
+    assert isinstance(results[3], ValueError)
+    assert results[4:] == list(range(4, 10))
+    assert max(peak) == 4
 
 
 @pytest.mark.parametrize('call_type, is_admin', (('admin', True), ('user', False)))
 def test_is_admin_context(call_type, is_admin):
     assert is_admin_context(Context(call_type=call_type)) is is_admin
+
+
+def test_rate_limiter_allows_up_to_limit():
+    limiter = RateLimiter(period=60)
+
+    assert [limiter.allow('UR-1', 2) for _ in range(3)] == [True, True, False]
+    assert limiter.allow('UR-2', 2)
+
+
+@pytest.mark.parametrize('limit', (0, None))
+def test_rate_limiter_no_limit(limit):
+    limiter = RateLimiter(period=60)
+
+    assert all(limiter.allow('UR-1', limit) for _ in range(100))
+
+
+def test_rate_limiter_window_slides(mocker):
+    now = mocker.patch('dbaas.utils.time.monotonic', return_value=100)
+    limiter = RateLimiter(period=10)
+
+    assert limiter.allow('UR-1', 1)
+    assert not limiter.allow('UR-1', 1)
+
+    now.return_value = 110
+    assert limiter.allow('UR-1', 1)
+
+
+def test_rate_limiter_forgets_expired_keys(mocker):
+    now = mocker.patch('dbaas.utils.time.monotonic', return_value=100)
+    mocker.patch.object(RateLimiter, 'MAX_TRACKED_KEYS', 2)
+    limiter = RateLimiter(period=10)
+    limiter.allow('UR-1', 1)
+    limiter.allow('UR-2', 1)
+
+    now.return_value = 120
+    limiter.allow('UR-3', 1)
+
+    assert list(limiter._calls) == ['UR-3']
@@ -10,13 +10,22 @@ from fastapi.encoders import jsonable_encoder
 from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
 
 from dbaas.constants import DBAction
+from dbaas.metrics import MetricsMiddleware, MONGO_COMMAND_FAILURES
+from dbaas.profiler import ProfilingMiddleware
+from dbaas.recording import RecordingMiddleware
 from dbaas.schemas import (
+    DatabaseBulkCreateResult,
+    DatabaseBulkResult,
+    DatabaseChanges,
     DatabaseInCreate,
     DatabaseInUpdate,
     DatabaseOutDetail,
     DatabaseOutList,
     RegionOut,
 )
+from dbaas.timings import TimedJSONResponse, TimingMiddleware
+from dbaas.tracing import TracingMiddleware
+from dbaas.utils import RateLimiter
 from dbaas.webapp import client_error_handler, DBaaSWebApplication, na_exception_handler
 
 from tests.constants import DB_DEP_MOCK, INSTALLATION_CLIENT_DEP_MOCK
@@ -61,13 +70,42 @@ def test_get_exception_handlers():
     }
 
 
+def test_get_middlewares():
+    assert DBaaSWebApplication.get_middlewares() == [
+        RecordingMiddleware,
+        MetricsMiddleware,
+        TimingMiddleware,
+        TracingMiddleware,
+        ProfilingMiddleware,
+    ]
+
+
+def test_get_routers():
+    routers = DBaaSWebApplication.get_routers()
+
+    assert routers[0].routes
+    assert [r.default_response_class for r in routers] == [TimedJSONResponse, TimedJSONResponse]
+
+
 @pytest.mark.asyncio
 async def test_on_start(mocker):
     p = mocker.patch('dbaas.webapp.prepare_db')
+    key_ring_p = mocker.patch('dbaas.webapp.get_key_ring')
+    tracing_p = mocker.patch('dbaas.webapp.configure_tracing')
+    recording_p = mocker.patch('dbaas.webapp.configure_recording')
+    loop_monitor_p = mocker.patch('dbaas.webapp.start_loop_monitor')
+    stats_p = mocker.patch('dbaas.webapp.DBStats.prepare')
+    lead_times_p = mocker.patch('dbaas.webapp.LeadTimes.prepare')
 
     await DBaaSWebApplication().on_startup(1, 2)
 
     p.assert_called_once_with(1, 2)
+    stats_p.assert_called_once_with(p.return_value, 1)
+    lead_times_p.assert_called_once_with(p.return_value, 1)
+    key_ring_p.assert_called_once_with(2)
+    tracing_p.assert_called_once_with(2)
+    recording_p.assert_called_once_with(2)
+    loop_monitor_p.assert_called_once_with(2)
 
 
 def test_list_databases_is_empty(api_client, mocker, common_context):
@@ -94,7 +132,74 @@ def test_list_databases_several_dbs(api_client, mocker, common_context):
     p.assert_called_once_with(DB_DEP_MOCK, common_context)
 
 
-def test_retrieve_database_200(api_client, mocker, common_context, config):
+def test_list_databases_search(api_client, mocker, common_context):
+    db_documents = DBFactory.create_batch(2, account_id='VA-123')
+    list_p = mocker.patch('dbaas.webapp.DB.list')
+    search_p = mocker.patch('dbaas.webapp.DB.search', return_value=db_documents)
+
+    response = api_client.get(DB_API, params={'search': ' orders ', 'limit': 2, 'offset': 4})
+    assert response.status_code == 200
+    assert [db_doc['id'] for db_doc in response.json()] == [d['id'] for d in db_documents]
+
+    search_p.assert_called_once_with(DB_DEP_MOCK, common_context, 'orders', limit=2, offset=4)
+    list_p.assert_not_called()
+
+
+def test_list_databases_blank_search(api_client, mocker, common_context):
+    list_p = mocker.patch('dbaas.webapp.DB.list', return_value=[])
+    search_p = mocker.patch('dbaas.webapp.DB.search')
+
+    response = api_client.get(DB_API, params={'search': '  '})
+    assert response.status_code == 200
+
+    list_p.assert_called_once_with(DB_DEP_MOCK, common_context)
+    search_p.assert_not_called()
+
+
+@pytest.mark.parametrize('params', (
+    {'search': 'x' * 129},
+    {'search': 'x', 'limit': 0},
+    {'search': 'x', 'limit': 101},
+    {'search': 'x', 'offset': 1001},
+))
+def test_list_databases_search_422(api_client, mocker, params):
+    search_p = mocker.patch('dbaas.webapp.DB.search')
+
+    response = api_client.get(DB_API, params=params)
+    assert response.status_code == 422
+
+    search_p.assert_not_called()
+
+
+@pytest.mark.parametrize('since', (None, 'token'))
+def test_list_database_changes_200(api_client, mocker, common_context, since):
+    db_documents = DBFactory.create_batch(2, account_id='VA-123')
+    p = mocker.patch('dbaas.webapp.DB.changes', return_value=(db_documents, 'next'))
+
+    response = api_client.get(f'{DB_API}/changes', params={'since': since} if since else None)
+    assert response.status_code == 200
+    assert response.json() == jsonable_encoder(DatabaseChanges(
+        items=[DatabaseOutList(**db_doc) for db_doc in db_documents],
+        next='next',
+    ))
+
+    p.assert_called_once_with(DB_DEP_MOCK, common_context, since=since)
+
+
+def test_list_database_changes_400(api_client, mocker, common_context):
+    def raise_ve(*a, **kw):
+        raise ValueError('Invalid changes token.')
+
+    p = mocker.patch('dbaas.webapp.DB.changes', side_effect=raise_ve)
+
+    response = api_client.get(f'{DB_API}/changes', params={'since': 'x'})
+    assert response.status_code == 400
+    assert response.json() == {'message': 'Invalid changes token.'}
+
+    p.assert_called_once_with(DB_DEP_MOCK, common_context, since='x')
+
+
+def test_retrieve_database_200(api_client, mocker, common_context):
     db_document = DBFactory()
     p = mocker.patch('dbaas.webapp.DB.retrieve', return_value=db_document)
 
@@ -102,17 +207,60 @@ def test_retrieve_database_200(api_client, mocker, common_context, config):
     assert response.status_code == 200
     assert response.json() == jsonable_encoder(DatabaseOutDetail(**db_document))
 
-    p.assert_called_once_with('DB-456-789', DB_DEP_MOCK, common_context, config=config)
+    p.assert_called_once_with('DB-456-789', DB_DEP_MOCK, common_context)
 
 
-def test_retrieve_database_404(api_client, mocker, common_context, config):
+def test_retrieve_database_404(api_client, mocker, common_context):
     p = mocker.patch('dbaas.webapp.DB.retrieve', return_value=None)
 
     response = api_client.get(f'{DB_API}/DB-123')
     assert response.status_code == 404
     assert response.json() == {'message': 'Database not found.'}
 
-    p.assert_called_once_with('DB-123', DB_DEP_MOCK, common_context, config=config)
+    p.assert_called_once_with('DB-123', DB_DEP_MOCK, common_context)
+
+
+@pytest.fixture()
+def credentials_rate_limiter(mocker):
+    return mocker.patch('dbaas.webapp._credentials_rate_limiter', RateLimiter())
+
+
+def test_retrieve_database_credentials_200(
+    api_client, mocker, common_context, config, credentials_rate_limiter,
+):
+    credentials = {'host': 'db.host', 'username': 'user', 'password': 'pswd', 'name': 'db'}
+    p = mocker.patch('dbaas.webapp.DB.retrieve_credentials', return_value=credentials)
+
+    response = api_client.get(f'{DB_API}/DB-456/credentials')
+    assert response.status_code == 200
+    assert response.json() == credentials
+
+    p.assert_called_once_with('DB-456', DB_DEP_MOCK, common_context, config)
+
+
+def test_retrieve_database_credentials_404(
+    api_client, mocker, common_context, config, credentials_rate_limiter,
+):
+    p = mocker.patch('dbaas.webapp.DB.retrieve_credentials', return_value=None)
+
+    response = api_client.get(f'{DB_API}/DB-123/credentials')
+    assert response.status_code == 404
+    assert response.json() == {'message': 'Credentials not found.'}
+
+    p.assert_called_once_with('DB-123', DB_DEP_MOCK, common_context, config)
+
+
+def test_retrieve_database_credentials_429(api_client, mocker, config, credentials_rate_limiter):
+    config['DB_CREDENTIALS_RATE_LIMIT'] = '2'
+    p = mocker.patch('dbaas.webapp.DB.retrieve_credentials', return_value={
+        'host': 'h', 'username': 'u', 'password': 'p',
+    })
+
+    responses = [api_client.get(f'{DB_API}/DB-123/credentials') for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[-1].json() == {'message': 'Too many requests.'}
+    assert p.call_count == 2
 
 
 def test_create_database_201(api_client, mocker, config, common_context):
@@ -445,6 +593,107 @@ def test_delete_database_404(admin_api_client, mocker, config, admin_context):
     delete_p.assert_not_called()
 
 
+def test_bulk_create_databases_200(api_client, mocker, config, common_context):
+    db_document = DBFactory()
+    results = [
+        {'status_code': 201, 'database': db_document},
+        {'status_code': 400, 'message': 'Region does not exist.'},
+    ]
+    bulk_create_p = mocker.patch('dbaas.webapp.DB.bulk_create', return_value=results)
+    item = {
+        'name': 'name',
+        'description': 'description',
+        'workload': 'small',
+        'tech_contact': {'id': 'UR-000'},
+        'region': {'id': 'eu-west'},
+    }
+
+    response = api_client.post(f'{DB_API}/bulk-create', json={'items': [item, item]})
+    assert response.status_code == 200
+    assert response.json() == jsonable_encoder(
+        [DatabaseBulkCreateResult(**result) for result in results],
+    )
+
+    bulk_create_p.assert_called_once_with(
+        [item, item],
+        db=DB_DEP_MOCK,
+        context=common_context,
+        client=INSTALLATION_CLIENT_DEP_MOCK,
+        config=config,
+    )
+
+
+@pytest.mark.parametrize('data', (
+    {'items': []},
+    {'items': [{'name': 'name'}]},
+    {},
+))
+def test_bulk_create_databases_422(api_client, mocker, data):
+    bulk_create_p = mocker.patch('dbaas.webapp.DB.bulk_create')
+
+    response = api_client.post(f'{DB_API}/bulk-create', json=data)
+    assert response.status_code == 422
+
+    bulk_create_p.assert_not_called()
+
+
+def test_bulk_action_databases_200(admin_api_client, mocker, config, admin_context):
+    db_document = DBFactory()
+    results = [
+        {'id': db_document['id'], 'status_code': 200, 'database': db_document},
+        {'id': 'DB-404', 'status_code': 404, 'message': 'Database not found.'},
+    ]
+    bulk_action_p = mocker.patch('dbaas.webapp.DB.bulk_action', return_value=results)
+    data = {
+        'action': 'activate',
+        'items': [{'id': db_document['id'], 'workload': 'large'}, {'id': 'DB-404'}],
+    }
+
+    response = admin_api_client.post(f'{DB_API}/bulk-actions', json=data)
+    assert response.status_code == 200
+    assert response.json() == jsonable_encoder([DatabaseBulkResult(**r) for r in results])
+
+    bulk_action_p.assert_called_once_with(
+        'activate',
+        [
+            {'id': db_document['id'], 'credentials': None, 'workload': 'large'},
+            {'id': 'DB-404', 'credentials': None, 'workload': None},
+        ],
+        db=DB_DEP_MOCK,
+        context=admin_context,
+        config=config,
+        client=INSTALLATION_CLIENT_DEP_MOCK,
+    )
+
+
+def test_bulk_action_databases_403(api_client, mocker):
+    bulk_action_p = mocker.patch('dbaas.webapp.DB.bulk_action')
+
+    response = api_client.post(
+        f'{DB_API}/bulk-actions',
+        json={'action': 'delete', 'items': [{'id': 'DB-1'}]},
+    )
+    assert response.status_code == 403
+    assert response.json() == {'message': 'Permission denied.'}
+
+    bulk_action_p.assert_not_called()
+
+
+@pytest.mark.parametrize('data', (
+    {'action': 'delete', 'items': []},
+    {'action': 'reconfigure', 'items': [{'id': 'DB-1'}]},
+    {'action': 'delete', 'items': [{'id': 'DB-1'}] * 101},
+    {'action': 'delete', 'items': [{}]},
+))
+def test_bulk_action_databases_422(admin_api_client, mocker, data):
+    bulk_action_p = mocker.patch('dbaas.webapp.DB.bulk_action')
+
+    response = admin_api_client.post(f'{DB_API}/bulk-actions', json=data)
+    assert response.status_code == 422
+
+    bulk_action_p.assert_not_called()
+
+
 def test_list_regions(api_client, mocker):
     region_documents = RegionFactory.create_batch(2)
     p = mocker.patch('dbaas.webapp.Region.list', return_value=region_documents)
@@ -493,3 +742,119 @@ def test_create_region_403(api_client, mocker):
     assert response.json() == {'message': 'Permission denied.'}
 
     p.assert_not_called()
+
+
+def test_get_stats_200(admin_api_client, mocker):
+    stats = {
+        'total': 3,
+        'status': {'active': 2, 'reviewing': 1},
+        'region_id': {'eu-west': 3},
+        'workload': {'large': 3},
+        'account_id': {'VA-000': 1, 'VA-001': 2},
+    }
+    p = mocker.patch('dbaas.webapp.DBStats.get', return_value=stats)
+
+    response = admin_api_client.get(
+        '/api/v1/stats',
+        params={'region_id': 'eu-west', 'workload': 'large'},
+    )
+    assert response.status_code == 200
+    assert response.json() == stats
+
+    p.assert_called_once_with(DB_DEP_MOCK, {
+        'status': None,
+        'region_id': 'eu-west',
+        'workload': 'large',
+        'account_id': None,
+    })
+
+
+def test_get_stats_403(api_client, mocker):
+    p = mocker.patch('dbaas.webapp.DBStats.get')
+
+    response = api_client.get('/api/v1/stats')
+    assert response.status_code == 403
+    assert response.json() == {'message': 'Permission denied.'}
+
+    p.assert_not_called()
+
+
+def test_get_lead_times_200(admin_api_client, mocker):
+    lead_times = {
+        'create': {
+            'count': 10,
+            'mean_seconds': 4000.0,
+            'percentiles_seconds': {'p50': 3600.0, 'p90': 7200.0, 'p99': 14400.0},
+        },
+        'reconfigure': {'count': 0, 'mean_seconds': None, 'percentiles_seconds': {}},
+        'backlog': {
+            'count': 1,
+            'oldest_age_seconds': 60.0,
+            'percentiles_seconds': {'p50': 60.0, 'p90': 60.0, 'p99': 60.0},
+        },
+    }
+    p = mocker.patch('dbaas.webapp.LeadTimes.get', return_value=lead_times)
+
+    response = admin_api_client.get('/api/v1/stats/lead-times', params={'workload': 'large'})
+    assert response.status_code == 200
+    assert response.json() == lead_times
+
+    p.assert_called_once_with(DB_DEP_MOCK, {'region_id': None, 'workload': 'large'})
+
+
+def test_get_lead_times_403(api_client, mocker):
+    p = mocker.patch('dbaas.webapp.LeadTimes.get')
+
+    response = api_client.get('/api/v1/stats/lead-times')
+    assert response.status_code == 403
+
+    p.assert_not_called()
+
+
+def test_get_metrics_200(admin_api_client, metrics):
+    MONGO_COMMAND_FAILURES.inc(command='find')
+
+    response = admin_api_client.get('/api/v1/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    assert 'dbaas_mongo_command_failures_total{command="find"} 1\n' in response.text
+
+
+def test_get_metrics_403(api_client):
+    response = api_client.get('/api/v1/metrics')
+    assert response.status_code == 403
+    assert response.json() == {'message': 'Permission denied.'}
+
+
+def test_scrape_metrics_200(api_client, config, metrics):
+    config['DB_METRICS_TOKEN'] = 'secret'
+    MONGO_COMMAND_FAILURES.inc(command='find')
+
+    response = api_client.get(
+        '/unauthorized/v1/metrics/scrape',
+        headers={'Authorization': 'Bearer secret'},
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    assert 'dbaas_mongo_command_failures_total{command="find"} 1\n' in response.text
+
+
+@pytest.mark.parametrize('token, headers', (
+    ('secret', {}),
+    ('secret', {'Authorization': 'Bearer other'}),
+    ('secret', {'Authorization': 'secret'}),
+    (None, {'Authorization': 'Bearer '}),
+    ('', {'Authorization': 'Bearer '}),
+))
+def test_scrape_metrics_403(api_client, config, token, headers):
+    config['DB_METRICS_TOKEN'] = token
+
+    response = api_client.get('/unauthorized/v1/metrics/scrape', headers=headers)
+    assert response.status_code == 403
+    assert response.json() == {'message': 'Permission denied.'}
+
+
+def test_scrape_metrics_is_unauthenticated():
+    _, no_auth_router = DBaaSWebApplication.get_routers()
+
+    assert [route.path for route in no_auth_router.routes] == ['/v1/metrics/scrape']
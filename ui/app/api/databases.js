@@ -16,6 +16,11 @@ export default rest(URL, {
     opts,
   ),
 
+  credentials: (id, opts = {}) => http.get(
+    `${URL}/${id}/credentials`,
+    opts,
+  ),
+
   activate: (id, data, opts = {}) => http.post(
     `${URL}/${id}/activate`,
     { body: data, ...opts },
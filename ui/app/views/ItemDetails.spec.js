@@ -4,7 +4,8 @@ import databases from '~api/databases';
 
 
 jest.mock('~api/databases', () => ({
-  get: jest.fn((id) => ({ id })),
+  get: jest.fn((id) => ({ id, credentials_available: id === 'yyy' })),
+  credentials: jest.fn(() => ({ username: 'user' })),
 }));
 
 describe('ItemDetails', () => {
@@ -23,6 +24,8 @@ describe('ItemDetails', () => {
         isActivateDialogOpened: false,
         isDeleteDialogOpened: false,
         loading: false,
+        credentialsLoading: false,
+        credentialsError: null,
         hidePassword: true,
         editingItem: null,
         localItem: null,
@@ -75,16 +78,77 @@ describe('ItemDetails', () => {
 
     describe('#load()', () => {
       beforeEach(async () => {
-        context = { item: 'xxx', localItem: null };
+        databases.credentials.mockClear();
+        context = { item: 'yyy', localItem: null, credentialsError: 'error' };
         await cmp.methods.load.call(context);
       });
 
       it('should call databases.get with proper id', () => {
-        expect(databases.get).toHaveBeenCalledWith('xxx');
+        expect(databases.get).toHaveBeenCalledWith('yyy');
       });
 
       it('should set localItem with returned value', () => {
-        expect(context.localItem).toEqual({ id: 'xxx' });
+        expect(context.localItem).toEqual({ id: 'yyy', credentials_available: true });
+      });
+
+      it('should reset credentialsError', () => {
+        expect(context.credentialsError).toBeNull();
+      });
+
+      it('should not request credentials', () => {
+        expect(databases.credentials).not.toHaveBeenCalled();
+      });
+    });
+
+    describe('#showCredentials()', () => {
+      beforeEach(() => {
+        databases.credentials.mockClear();
+        context = {
+          localItem: { id: 'yyy', credentials_available: true },
+          credentialsLoading: false,
+          credentialsError: null,
+        };
+      });
+
+      it('should set localItem credentials', async () => {
+        await cmp.methods.showCredentials.call(context);
+
+        expect(databases.credentials).toHaveBeenCalledWith('yyy');
+        expect(context.localItem).toEqual({
+          id: 'yyy',
+          credentials_available: true,
+          credentials: { username: 'user' },
+        });
+        expect(context.credentialsLoading).toBe(false);
+      });
+
+      it('should not request cached credentials again', async () => {
+        context.localItem.credentials = { username: 'cached' };
+
+        await cmp.methods.showCredentials.call(context);
+
+        expect(databases.credentials).not.toHaveBeenCalled();
+        expect(context.localItem.credentials).toEqual({ username: 'cached' });
+      });
+
+      it('should show a message when rate limited', async () => {
+        databases.credentials.mockRejectedValueOnce({ status: 429, message: 'Too many' });
+
+        await cmp.methods.showCredentials.call(context);
+
+        expect(context.credentialsError).toBe(
+          'Access information was requested too often. Please try again in a minute.',
+        );
+        expect(context.localItem.credentials).toBeUndefined();
+        expect(context.credentialsLoading).toBe(false);
+      });
+
+      it('should show the error message of other errors', async () => {
+        databases.credentials.mockRejectedValueOnce({ status: 404, message: 'Not found' });
+
+        await cmp.methods.showCredentials.call(context);
+
+        expect(context.credentialsError).toBe('Not found');
       });
     });
 